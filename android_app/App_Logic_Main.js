@@ -93,10 +93,11 @@ const App = () => {
             type: 'audio/mp4',
             name: 'chunk.mp4',
         });
-        formData.append('history', JSON.stringify(history));
 
         try {
             const response = await axios.post(BACKEND_URL, formData, {
+                // The route reads history from the query string
+                params: { history: JSON.stringify(history.slice(-3)) },
                 headers: {
                     'Content-Type': 'multipart/form-data',
                     'Authorization': `Bearer ${USER_TOKEN}`,
@@ -111,7 +112,7 @@ const App = () => {
                 setKeyPoints(key_points || []);
 
                 // Update history for next context
-                const newHistory = [...history, { question: newTranscript, answer: newAnswer }].slice(-10);
+                const newHistory = [...history, { question: newTranscript, answer: newAnswer || '' }].slice(-10);
                 setHistory(newHistory);
             }
         } catch (error) {
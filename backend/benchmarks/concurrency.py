@@ -0,0 +1,103 @@
+"""Event-loop concurrency benchmark for /interview/live-answer.
+
+Replaces the Groq and Supabase calls with stand-ins that sleep for a fixed
+upstream latency, then fires concurrent requests at the app in-process.
+`--inline` runs the blocking calls directly on the event loop (the old
+behaviour) for comparison.  Every request asks the same question, so the
+answer cache is off unless ANSWER_CACHE_SIZE is set; otherwise both modes
+would mostly measure cache hits.
+
+    cd backend
+    python -m benchmarks.concurrency --requests 50 --concurrency 50
+    python -m benchmarks.concurrency --requests 50 --concurrency 50 --inline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "bench-anon-key")
+os.environ.setdefault("GROQ_API_KEY", "bench-groq-key")
+os.environ.setdefault("ANSWER_CACHE_SIZE", "0")
+
+import anyio
+import httpx
+from main import app, BLOCKING_THREADS
+from utils.auth_dependency import get_current_user
+from routes import interview
+
+
+def _patch_upstreams(llm_latency: float, db_latency: float, inline: bool):
+    def fake_resume(db, user_id):
+        time.sleep(db_latency)
+        return "Backend engineer with Python experience.", "bench-resume-id"
+
+    def fake_answer(**kwargs):
+        time.sleep(llm_latency)
+        return {"answer": "ok", "key_points": [], "tip": "", "code": ""}
+
+    async def fake_user():
+        return {"sub": "bench-user"}
+
+    interview.get_full_resume_text = fake_resume
+    # Profile and retrieval index are in memory after the first request
+    interview.build_live_context = lambda db, user_id, resume_id, question: "Skills: Python"
+    interview.generate_live_answer = fake_answer
+    app.dependency_overrides[get_current_user] = fake_user
+
+    if inline:
+        async def run_inline(func, *args, **kwargs):
+            return func(*args, **kwargs)
+        interview.run_in_threadpool = run_inline
+
+
+async def _run(requests: int, concurrency: int) -> dict:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = BLOCKING_THREADS
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.post("/interview/live-answer", json={"question": "What is REST?"})
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--db-latency", type=float, default=0.05)
+    parser.add_argument("--inline", action="store_true", help="block the event loop like the old routes")
+    args = parser.parse_args()
+
+    _patch_upstreams(args.llm_latency, args.db_latency, args.inline)
+    result = asyncio.run(_run(args.requests, args.concurrency))
+    result["mode"] = "inline" if args.inline else "threadpool"
+    result["answer_cache_size"] = interview.answer_cache.maxsize
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""Local stand-ins for Groq and Supabase PostgREST, for offline benchmarks.
+
+Both are stdlib ThreadingHTTPServers on 127.0.0.1, so the app reaches them
+through its real clients (the Groq SDK via GROQ_BASE_URL, PostgREST via
+SUPABASE_URL) over real sockets, with configurable latency:
+
+  - FakeGroq serves /openai/v1/chat/completions (JSON or SSE streaming,
+    with `usage` / `x_groq.usage` like Groq) and
+    /openai/v1/audio/transcriptions.  Replies are valid JSON for whichever
+    prompt they get: a question list for question generation, a score for
+    evaluation, a live answer otherwise.
+  - FakePostgREST keeps tables in memory and understands the filters the
+    app uses (eq, neq, in, order, limit, select) plus the replace_resume
+    and match_resume_chunks RPCs.
+
+Run both standalone to point a separately started server at them:
+
+    cd backend
+    python -m benchmarks.fakes --llm-latency 0.4
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+import uuid
+import wave
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import numpy as np
+
+LIVE_ANSWER = {
+    "answer": "I'd put a token bucket per user in Redis and check it with one INCR.",
+    "key_points": ["O(1) check per request", "Burst size is the bucket capacity"],
+    "tip": "Mention how you'd handle clock skew across nodes.",
+    "code": "def allow(user):\n    return bucket[user].take()",
+    "code_language": "python",
+    "detected_level": "medium",
+}
+EVALUATION = {"score": 7, "feedback": "Clear and structured.", "improvement": "Quantify the impact."}
+TRANSCRIPT = "How would you rate limit an API per user?"
+
+
+def make_pdf(pages: list[str]) -> bytes:
+    """Minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode()}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def make_speech_wav(seconds: float = 2.0, rate: int = 16000) -> bytes:
+    """A voiced-speech stand-in (harmonic tone, syllable-rate envelope) the VAD passes."""
+    t = np.arange(int(rate * seconds)) / rate
+    tone = sum(np.sin(2 * np.pi * 180 * k * t) / k for k in range(1, 4))
+    samples = 0.2 * tone * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+class _Server:
+    """A ThreadingHTTPServer on an ephemeral port, served from a daemon thread."""
+
+    handler: type
+
+    def __init__(self, port: int = 0):
+        handler = type("Handler", (self.handler,), {"fake": self})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.requests = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real upstreams
+    fake: _Server
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# ── Groq ────────────────────────────────────────
+
+class _GroqHandler(_Handler):
+    def do_POST(self):
+        fake: FakeGroq = self.fake
+        fake.requests += 1
+        body = self._body()
+        if self.path.endswith("/audio/transcriptions"):
+            time.sleep(fake.stt_latency)
+            return self._json(200, {"text": TRANSCRIPT})
+        if not self.path.endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": f"No route {self.path}"}})
+
+        request = json.loads(body)
+        content = json.dumps(fake.reply_for(request["messages"][-1]["content"]))
+        usage = {
+            "prompt_tokens": len(request["messages"][-1]["content"]) // 4,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": (len(request["messages"][-1]["content"]) + len(content)) // 4,
+        }
+        completion = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "created": int(time.time()),
+            "model": request["model"],
+        }
+        if not request.get("stream"):
+            time.sleep(fake.llm_latency)
+            return self._json(200, {
+                **completion,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        time.sleep(fake.ttft)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = [content[i:i + fake.chunk_chars] for i in range(0, len(content), fake.chunk_chars)]
+        per_chunk = max(0.0, fake.llm_latency - fake.ttft) / max(1, len(pieces))
+        for i, piece in enumerate(pieces):
+            chunk = {
+                **completion,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            if i == len(pieces) - 1:
+                chunk["choices"][0]["finish_reason"] = "stop"
+                chunk["x_groq"] = {"id": completion["id"], "usage": usage}
+            self._chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            if per_chunk:
+                time.sleep(per_chunk)
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeGroq(_Server):
+    """Groq's OpenAI-compatible chat and transcription endpoints."""
+
+    handler = _GroqHandler
+
+    def __init__(
+        self,
+        llm_latency: float = 0.4,
+        ttft: float = 0.15,
+        stt_latency: float = 0.3,
+        chunk_chars: int = 8,
+        port: int = 0,
+    ):
+        super().__init__(port)
+        self.llm_latency = llm_latency
+        self.ttft = min(ttft, llm_latency)
+        self.stt_latency = stt_latency
+        self.chunk_chars = chunk_chars
+
+    @staticmethod
+    def reply_for(prompt: str):
+        if "Return a JSON array" in prompt:
+            count = 5
+            for word in prompt.split("generate exactly", 1)[1:]:
+                count = int(word.split()[0])
+            return [{"id": i, "question": f"Tell me about project {i}."} for i in range(1, count + 1)]
+        if '"score"' in prompt:
+            return EVALUATION
+        return LIVE_ANSWER
+
+
+# ── Supabase PostgREST ──────────────────────────
+
+def _matches(row: dict, column: str, condition: str) -> bool:
+    op, _, value = condition.partition(".")
+    actual = "" if row.get(column) is None else str(row.get(column))
+    if op == "eq":
+        return actual == value
+    if op == "neq":
+        return actual != value
+    if op == "in":
+        return actual in {v.strip().strip('"') for v in value.strip("()").split(",")}
+    return True
+
+
+class _PostgRESTHandler(_Handler):
+    def _route(self):
+        fake: FakePostgREST = self.fake
+        fake.requests += 1
+        # Always drain the body (DELETE sends one too) so keep-alive stays in sync
+        body = self._body()
+        time.sleep(fake.latency)
+        parts = urlsplit(self.path)
+        name = parts.path.split("/rest/v1/", 1)[-1]
+        return fake, name, parse_qsl(parts.query), json.loads(body or b"null")
+
+    def do_GET(self):
+        if not self.path.startswith("/rest/v1/"):
+            # e.g. the JWKS fetch: bench tokens are HS256
+            return self._json(404, {"message": "Not found"})
+        fake, table, params, _ = self._route()
+        self._json(200, fake.select(table, params))
+
+    def do_POST(self):
+        fake, name, params, payload = self._route()
+        if name.startswith("rpc/"):
+            return self._json(200, fake.rpc(name[4:], payload))
+        rows = payload if isinstance(payload, list) else [payload]
+        self._json(201, fake.insert(name, rows))
+
+    def do_PATCH(self):
+        fake, table, params, values = self._route()
+        self._json(200, fake.update(table, params, values))
+
+    def do_DELETE(self):
+        fake, table, params, _ = self._route()
+        self._json(200, fake.delete(table, params))
+
+
+class FakePostgREST(_Server):
+    """In-memory tables behind PostgREST's URL and filter syntax."""
+
+    handler = _PostgRESTHandler
+    _CONTROL = {"select", "order", "limit", "offset", "columns", "on_conflict"}
+
+    def __init__(self, latency: float = 0.02, port: int = 0):
+        super().__init__(port)
+        self.latency = latency
+        self.tables: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+
+    def _filter(self, table: str, params: list) -> list[dict]:
+        rows = self.tables.get(table, [])
+        for column, condition in params:
+            if column not in self._CONTROL:
+                rows = [r for r in rows if _matches(r, column, condition)]
+        return rows
+
+    def select(self, table: str, params: list) -> list[dict]:
+        with self._lock:
+            rows = list(self._filter(table, params))
+        options = dict(params)
+        if "order" in options:
+            column, _, direction = options["order"].partition(".")
+            rows.sort(key=lambda r: str(r.get(column) or ""), reverse=direction.startswith("desc"))
+        if "limit" in options:
+            rows = rows[: int(options["limit"])]
+        columns = [c.strip() for c in options.get("select", "*").split(",")]
+        if "*" not in columns:
+            rows = [{c: r.get(c) for c in columns} for r in rows]
+        return rows
+
+    def insert(self, table: str, rows: list[dict]) -> list[dict]:
+        now = datetime.now(timezone.utc).isoformat()
+        stored = [{"id": str(uuid.uuid4()), "created_at": now, **row} for row in rows]
+        with self._lock:
+            self.tables.setdefault(table, []).extend(stored)
+        return stored
+
+    def update(self, table: str, params: list, values: dict) -> list[dict]:
+        with self._lock:
+            rows = self._filter(table, params)
+            for row in rows:
+                row.update(values)
+            return list(rows)
+
+    def delete(self, table: str, params: list) -> list[dict]:
+        with self._lock:
+            doomed = self._filter(table, params)
+            ids = {id(r) for r in doomed}
+            self.tables[table] = [r for r in self.tables.get(table, []) if id(r) not in ids]
+            return doomed
+
+    def rpc(self, name: str, args: dict):
+        if name == "replace_resume":
+            user_id = args["p_user_id"]
+            with self._lock:
+                old = {r["id"] for r in self.tables.get("resumes", []) if r["user_id"] == user_id}
+                self.tables["resumes"] = [r for r in self.tables.get("resumes", []) if r["id"] not in old]
+                self.tables["resume_embeddings"] = [
+                    r for r in self.tables.get("resume_embeddings", []) if r["resume_id"] not in old
+                ]
+            [resume] = self.insert("resumes", [{
+                "user_id": user_id,
+                "title": args["p_title"],
+                "parsed_text": args["p_parsed_text"],
+                "profile": args["p_profile"],
+                "content_hash": args["p_content_hash"],
+                "chunk_count": len(args["p_chunks"]),
+            }])
+            self.insert("resume_embeddings", [{"resume_id": resume["id"], **c} for c in args["p_chunks"]])
+            return resume["id"]
+        if name == "match_resume_chunks":
+            rows = self.select("resume_embeddings", [("resume_id", f"eq.{args['match_resume_id']}")])
+            return [{"content_chunk": r["content_chunk"], "similarity": 0.5} for r in rows[: args["match_count"]]]
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--ttft", type=float, default=0.15)
+    parser.add_argument("--stt-latency", type=float, default=0.3)
+    parser.add_argument("--db-latency", type=float, default=0.02)
+    parser.add_argument("--groq-port", type=int, default=8801)
+    parser.add_argument("--postgrest-port", type=int, default=8802)
+    args = parser.parse_args()
+
+    groq = FakeGroq(args.llm_latency, args.ttft, args.stt_latency, port=args.groq_port).start()
+    postgrest = FakePostgREST(args.db_latency, port=args.postgrest_port).start()
+    print(json.dumps({"GROQ_BASE_URL": groq.url, "SUPABASE_URL": postgrest.url}))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
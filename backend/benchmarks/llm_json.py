@@ -0,0 +1,75 @@
+"""Malformed-LLM-output benchmark for utils.llm_json.
+
+Runs every completion in llm_json_corpus.json through the old
+`json.loads(strip_fences(raw))` path and through `parse_llm_json`, and
+reports how many parse (and match the expected fields) and the mean parse
+time of each.  Streamed parsing is checked by feeding each completion to
+`JSONStreamParser` in small chunks.
+
+    cd backend
+    python -m benchmarks.llm_json --repeat 200
+"""
+
+import argparse
+import json
+import os
+import time
+from utils.llm_json import JSONStreamParser, parse_llm_json, strip_fences
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "llm_json_corpus.json")
+
+
+def load_corpus() -> list[dict]:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def matches(value, expect) -> bool:
+    """True if `value` equals a list `expect`, or contains every field of a dict `expect`."""
+    if isinstance(expect, list):
+        return value == expect
+    return isinstance(value, dict) and all(value.get(k) == v for k, v in expect.items())
+
+
+def _baseline(raw: str):
+    return json.loads(strip_fences(raw), strict=False)
+
+
+def _streamed(raw: str, chunk_size: int = 4) -> dict:
+    parser = JSONStreamParser()
+    for i in range(0, len(raw), chunk_size):
+        parser.feed(raw[i:i + chunk_size])
+    parser.finish()
+    return parser.fields
+
+
+def _score(parse, corpus: list[dict], repeat: int) -> dict:
+    ok = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ok = 0
+        for case in corpus:
+            try:
+                ok += matches(parse(case["raw"]), case["expect"])
+            except ValueError:
+                pass
+    elapsed = time.perf_counter() - start
+    return {"ok": ok, "total": len(corpus), "mean_us": round(elapsed / (repeat * len(corpus)) * 1e6, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    objects = [c for c in corpus if isinstance(c["expect"], dict)]
+    print(json.dumps({
+        "baseline": _score(_baseline, corpus, args.repeat),
+        "parse_llm_json": _score(parse_llm_json, corpus, args.repeat),
+        "stream": _score(_streamed, objects, max(1, args.repeat // 10)),
+    }))
+
+
+if __name__ == "__main__":
+    main()
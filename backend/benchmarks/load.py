@@ -0,0 +1,321 @@
+"""Offline load test for the live and resume routes.
+
+Starts the fake Groq and PostgREST servers (benchmarks.fakes), points the
+app at them through GROQ_BASE_URL / SUPABASE_URL, seeds a resume per bench
+user and drives the app in-process (httpx ASGI transport, real lifespan,
+real auth, scheduler, router, caches and clients; only the HTTP server is
+left out).  Each scenario reports p50/p95/p99 latency and throughput:
+
+  live-answer        POST /interview/live-answer (unique questions)
+  live-answer-stream POST /interview/live-answer/stream, and
+                     live-answer-stream_ttfb: time to the first SSE event
+                     (called as raw ASGI; httpx's transport buffers bodies)
+  listen-and-answer  POST /audio/listen-and-answer (2 s speech WAV)
+  start              POST /interview/start
+  upload             POST /resume/upload (202 accept), and upload_complete:
+                     accept until /resume/status reports the job done
+
+    cd backend
+    python -m benchmarks.load --requests 200 --concurrency 20 --output baseline.json
+    python -m benchmarks.load --requests 200 --concurrency 20 --baseline baseline.json
+
+With --baseline, exits 1 if any scenario's p95 grew or its throughput fell
+by more than --max-regression (default 20%).  The answer cache is off
+unless --answer-cache is given, so every request reaches the fake LLM.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import numpy as np
+from benchmarks.fakes import FakeGroq, FakePostgREST, make_pdf, make_speech_wav
+
+SCENARIOS = ("live-answer", "live-answer-stream", "listen-and-answer", "start", "upload")
+JWT_SECRET = "bench-jwt-secret"
+
+RESUME_TEXT = """Jane Doe
+Backend Engineer
+Summary
+Backend engineer with 6 years building Python and Go services.
+Experience
+Senior Engineer, Acme  2021 - Present
+• Cut p95 latency by 40% with Redis caching.
+• Built the billing service in Go, processing $2M a month.
+Engineer, Initech  2018 - 2020
+• Migrated 12 services to Kubernetes.
+Skills
+Python, Go, PostgreSQL, Redis, Kubernetes, AWS
+"""
+
+
+def _configure_env(groq: FakeGroq, postgrest: FakePostgREST, answer_cache: bool):
+    """Point the app at the fakes; must run before the app is imported."""
+    os.environ["GROQ_BASE_URL"] = groq.url
+    os.environ["SUPABASE_URL"] = postgrest.url
+    os.environ["SUPABASE_ANON_KEY"] = "bench-anon-key"
+    os.environ["SUPABASE_JWT_SECRET"] = JWT_SECRET
+    os.environ["GROQ_API_KEY"] = "bench-groq-key"
+    # Measure the app, not Groq's free-tier limits
+    for name in ("GROQ_RPM", "GROQ_TPM", "GROQ_AUDIO_RPM"):
+        os.environ.setdefault(name, "0")
+    if not answer_cache:
+        os.environ["ANSWER_CACHE_SIZE"] = "0"
+
+
+def _seed_users(postgrest: FakePostgREST, count: int) -> list[str]:
+    from jose import jwt
+    from utils.pdf_parser import chunk_resume
+
+    chunks = chunk_resume(RESUME_TEXT)
+    tokens = []
+    for i in range(count):
+        user_id = f"00000000-0000-0000-0000-{i:012d}"
+        [resume] = postgrest.insert("resumes", [{
+            "user_id": user_id,
+            "title": "cv",
+            "parsed_text": RESUME_TEXT,
+            "profile": None,
+            "chunk_count": len(chunks),
+        }])
+        postgrest.insert("resume_embeddings", [
+            {"resume_id": resume["id"], "content_chunk": c["text"], "section": c["section"]} for c in chunks
+        ])
+        claims = {"sub": user_id, "role": "authenticated", "exp": int(time.time()) + 3600}
+        tokens.append(jwt.encode(claims, JWT_SECRET, algorithm="HS256"))
+    return tokens
+
+
+def _summary(latencies: list[float], errors: int, elapsed: float, concurrency: int) -> dict:
+    result = {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        result.update({
+            "p50_ms": round(p50 * 1000, 1),
+            "p95_ms": round(p95 * 1000, 1),
+            "p99_ms": round(p99 * 1000, 1),
+            "max_ms": round(max(latencies) * 1000, 1),
+        })
+    return result
+
+
+async def _asgi_stream(app, path: str, headers: dict, body: bytes) -> tuple[float, float]:
+    """POST `body` straight to the ASGI app; return (first body bytes, total) seconds."""
+    done = asyncio.Event()
+    sent = False
+    first_byte = None
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()  # a streaming response listens for the client going away
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if first_byte is None and message.get("body"):
+                first_byte = time.perf_counter() - start
+            if not message.get("more_body"):
+                done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        + [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    start = time.perf_counter()
+    await app(scope, receive, send)
+    done.set()
+    if status != 200:
+        raise RuntimeError(f"{path} returned {status}")
+    return first_byte or 0.0, time.perf_counter() - start
+
+
+async def _drive(app, client, scenario: str, requests: int, concurrency: int, tokens: list[str]) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    completions: list[float] = []  # upload: until processed; stream: first bytes
+    errors = 0
+    wav = make_speech_wav()
+
+    async def upload(i: int, headers: dict):
+        pdf = make_pdf([f"Jane Doe {i} Backend Engineer", "Experience Python Go Redis"])
+        start = time.perf_counter()
+        resp = await client.post("/resume/upload", headers=headers, files={"file": (f"cv{i}.pdf", pdf, "application/pdf")})
+        resp.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        job_id = resp.json().get("job_id")
+        while job_id:
+            await asyncio.sleep(0.02)
+            job = (await client.get(f"/resume/status?job_id={job_id}", headers=headers)).json()["job"]
+            if job["state"] == "failed":
+                raise RuntimeError(job["error"])
+            if job["state"] == "done":
+                break
+        completions.append(time.perf_counter() - start)
+
+    async def stream(i: int, headers: dict):
+        body = {"question": f"Question {i}: how would you shard the billing database?", "role": "Backend Engineer"}
+        ttfb, total = await _asgi_stream(app, "/interview/live-answer/stream", headers, json.dumps(body).encode())
+        completions.append(ttfb)
+        latencies.append(total)
+
+    async def one(i: int):
+        nonlocal errors
+        headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+        async with semaphore:
+            try:
+                if scenario == "upload":
+                    await upload(i, headers)
+                    return
+                if scenario == "live-answer-stream":
+                    await stream(i, headers)
+                    return
+                start = time.perf_counter()
+                if scenario == "live-answer":
+                    resp = await client.post("/interview/live-answer", headers=headers, json={
+                        "question": f"Question {i}: how did you cut p95 latency at Acme?",
+                        "role": "Backend Engineer",
+                    })
+                elif scenario == "listen-and-answer":
+                    resp = await client.post(
+                        "/audio/listen-and-answer",
+                        headers=headers,
+                        params={"role": "Backend Engineer"},
+                        files={"file": ("clip.wav", wav, "audio/wav")},
+                    )
+                else:
+                    resp = await client.post("/interview/start", headers=headers, json={
+                        "role": "Backend Engineer",
+                        "num_questions": 5,
+                    })
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors += 1
+                if errors == 1:
+                    print(f"{scenario} request failed: {str(e)}", file=sys.stderr)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    results = {scenario: _summary(latencies, errors, elapsed, concurrency)}
+    if scenario == "upload":
+        results["upload_complete"] = _summary(completions, errors, elapsed, concurrency)
+    elif scenario == "live-answer-stream":
+        results["live-answer-stream_ttfb"] = _summary(completions, errors, elapsed, concurrency)
+    return results
+
+
+async def _run(args, tokens: list[str]) -> dict:
+    import anyio
+    import httpx
+    from main import app, BLOCKING_THREADS
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        anyio.to_thread.current_default_thread_limiter().total_tokens = BLOCKING_THREADS
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for scenario in args.scenarios:
+                # Upload replaces the bench users' resumes, so it runs last
+                results.update(await _drive(app, client, scenario, args.requests, args.concurrency, tokens))
+    return results
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Scenarios whose p95 or throughput regressed past `max_regression`."""
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or "p95_ms" not in before or "p95_ms" not in current:
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {before['p95_ms']} -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current["errors"] > before["errors"]:
+            regressions.append(f"{name}: errors {before['errors']} -> {current['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.4, help="fake Groq completion time (s)")
+    parser.add_argument("--ttft", type=float, default=0.15, help="fake Groq time to first streamed token (s)")
+    parser.add_argument("--stt-latency", type=float, default=0.3, help="fake Whisper time (s)")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="fake PostgREST time per request (s)")
+    parser.add_argument("--answer-cache", action="store_true", help="leave the live answer cache on")
+    parser.add_argument("--output", help="write the results JSON here (e.g. a release baseline)")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+    args.scenarios = [s for s in SCENARIOS if s in args.scenarios]
+
+    groq = FakeGroq(args.llm_latency, args.ttft, args.stt_latency).start()
+    postgrest = FakePostgREST(args.db_latency).start()
+    try:
+        _configure_env(groq, postgrest, args.answer_cache)
+        tokens = _seed_users(postgrest, args.users)
+        scenarios = asyncio.run(_run(args, tokens))
+    finally:
+        groq.stop()
+        postgrest.stop()
+
+    report = {
+        "benchmark": "load",
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "llm_latency_s": args.llm_latency,
+            "ttft_s": args.ttft,
+            "stt_latency_s": args.stt_latency,
+            "db_latency_s": args.db_latency,
+            "answer_cache": args.answer_cache,
+        },
+        "scenarios": scenarios,
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(scenarios, json.load(f), args.max_regression)
+        exit_code = 1 if report["regressions"] else 0
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report))
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import os
+
+# Service modules read credentials at import time; give offline test runs
+# placeholder values so nothing tries to reach the real services.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("GROQ_API_KEY", "test-groq-key")
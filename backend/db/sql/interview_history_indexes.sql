@@ -0,0 +1,10 @@
+-- Indexes behind GET /interview/history.
+-- Sessions are read newest-first per user with a (created_at, id) keyset
+-- cursor, and message counts are aggregated per session in the same query.
+
+drop index if exists interview_sessions_user_created_idx;
+create index if not exists interview_sessions_user_created_id_idx
+  on interview_sessions (user_id, created_at desc, id desc);
+
+create index if not exists interview_messages_session_id_idx
+  on interview_messages (session_id);
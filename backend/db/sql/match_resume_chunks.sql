@@ -0,0 +1,25 @@
+-- Top-k resume chunks by cosine similarity, ranked inside Postgres.
+-- Used by rag_service when RETRIEVAL_MODE=vector (see db/vector_store.py).
+-- Runs as the caller (security invoker), so resume_embeddings RLS applies.
+
+create extension if not exists vector;
+
+create index if not exists resume_embeddings_resume_id_idx
+  on resume_embeddings (resume_id);
+
+create or replace function match_resume_chunks(
+  query_embedding vector(384),
+  match_resume_id uuid,
+  match_count int default 3
+)
+returns table (content_chunk text, similarity float)
+language sql stable
+as $$
+  select
+    e.content_chunk,
+    1 - (e.embedding <=> query_embedding) as similarity
+  from resume_embeddings e
+  where e.resume_id = match_resume_id
+  order by e.embedding <=> query_embedding
+  limit match_count;
+$$;
@@ -0,0 +1,53 @@
+-- Content-hash deduplicated resume ingestion.
+-- content_hash is the SHA-256 of the ingest pipeline version and the
+-- uploaded PDF bytes; an identical re-upload returns the stored resume
+-- without parsing or embedding.
+-- replace_resume swaps a user's old resume and chunks for the new ones in
+-- one transaction (one round trip instead of 2N+1 deletes and inserts).
+-- Runs as the caller (security invoker), so resumes / resume_embeddings
+-- RLS applies.
+-- Required before deploying: uploads call replace_resume and resume
+-- lookups select content_hash / chunk_count, so apply this together with
+-- resume_profile.sql and resume_chunk_sections.sql.
+
+alter table resumes add column if not exists content_hash text;
+alter table resumes add column if not exists chunk_count int;
+
+create index if not exists resumes_user_id_content_hash_idx
+  on resumes (user_id, content_hash);
+
+create or replace function replace_resume(
+  p_user_id uuid,
+  p_title text,
+  p_parsed_text text,
+  p_profile text,
+  p_content_hash text,
+  p_chunks jsonb
+)
+returns uuid
+language plpgsql
+as $$
+declare
+  new_id uuid;
+begin
+  delete from resume_embeddings
+  where resume_id in (select id from resumes where user_id = p_user_id);
+  delete from resumes where user_id = p_user_id;
+
+  insert into resumes (user_id, title, parsed_text, profile, content_hash, chunk_count)
+  values (p_user_id, p_title, p_parsed_text, p_profile, p_content_hash, jsonb_array_length(p_chunks))
+  returning id into new_id;
+
+  insert into resume_embeddings (resume_id, content_chunk, section, start_offset, end_offset, embedding)
+  select
+    new_id,
+    c->>'content_chunk',
+    c->>'section',
+    (c->>'start_offset')::int,
+    (c->>'end_offset')::int,
+    (c->>'embedding')::vector
+  from jsonb_array_elements(p_chunks) as c;
+
+  return new_id;
+end;
+$$;
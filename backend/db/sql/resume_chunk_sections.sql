@@ -0,0 +1,7 @@
+-- Section label and character offsets of each resume chunk, as produced by
+-- utils/pdf_parser.chunk_resume. Offsets index into resumes.parsed_text.
+-- Rows stored before this migration keep NULLs.
+
+alter table resume_embeddings add column if not exists section text;
+alter table resume_embeddings add column if not exists start_offset int;
+alter table resume_embeddings add column if not exists end_offset int;
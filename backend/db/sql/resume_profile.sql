@@ -0,0 +1,6 @@
+-- Compact resume profile (skills, roles, projects, impact, education)
+-- built at upload and used as the resume context of live-answer prompts.
+-- Rows uploaded earlier keep NULL; the API builds their profile from
+-- parsed_text on first use.
+
+alter table resumes add column if not exists profile text;
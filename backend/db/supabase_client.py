@@ -1,13 +1,112 @@
+"""Request-scoped Supabase (PostgREST) clients over one shared connection pool.
+
+Every request gets its own lightweight client carrying that user's JWT, so
+RLS (`auth.uid()`) always sees the right user even when requests run in
+parallel.  All clients share one keep-alive httpx pool, so creating a
+client per request costs no new connections.
+"""
+
 import os
-from supabase import create_client
+import threading
+import time
+import httpx
+from postgrest import SyncPostgrestClient
 from dotenv import load_dotenv
+from utils.metrics import DB_SECONDS
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+# Only for server-side jobs with no user session; bypasses RLS
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
 
 if not SUPABASE_URL or not SUPABASE_ANON_KEY:
     raise Exception("Supabase credentials missing in .env")
 
-supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "100"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+_http_client: httpx.Client | None = None
+_http_lock = threading.Lock()
+_REST_PREFIX = "/rest/v1/"
+
+
+def _start_timer(request: httpx.Request):
+    request.extensions["metrics_start"] = time.perf_counter()
+
+
+def _observe(response: httpx.Response):
+    """Record a PostgREST round trip by table / rpc name (response headers in)."""
+    request = response.request
+    start = request.extensions.get("metrics_start")
+    if start is None:
+        return
+    path = request.url.path
+    target = path.split(_REST_PREFIX, 1)[1] if _REST_PREFIX in path else path
+    DB_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        target=target,
+        status=str(response.status_code),
+    )
+
+
+def _get_http_client() -> httpx.Client:
+    """The shared keep-alive pool, created on first use."""
+    global _http_client
+    if _http_client is None:
+        with _http_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=SUPABASE_POOL_SIZE,
+                        max_keepalive_connections=SUPABASE_POOL_SIZE,
+                    ),
+                    timeout=SUPABASE_TIMEOUT,
+                    follow_redirects=True,
+                    http2=True,
+                    event_hooks={"request": [_start_timer], "response": [_observe]},
+                )
+    return _http_client
+
+
+def get_db_client(token: str) -> SyncPostgrestClient:
+    """A PostgREST client authenticated as the user who owns `token`.
+
+    Headers live on the client, not on the shared pool, so concurrent
+    clients never see each other's JWT."""
+    return SyncPostgrestClient(
+        f"{SUPABASE_URL}/rest/v1",
+        headers={
+            "apikey": SUPABASE_ANON_KEY,
+            "Authorization": f"Bearer {token}",
+        },
+        http_client=_get_http_client(),
+    )
+
+
+def get_service_db_client() -> SyncPostgrestClient:
+    """A PostgREST client with the service role, for work that outlives the
+    user's request (resume uploads re-queued after a restart).
+
+    RLS does not apply: callers scope every write to a user id themselves."""
+    if not SUPABASE_SERVICE_ROLE_KEY:
+        raise RuntimeError("SUPABASE_SERVICE_ROLE_KEY is not set")
+    return SyncPostgrestClient(
+        f"{SUPABASE_URL}/rest/v1",
+        headers={
+            "apikey": SUPABASE_SERVICE_ROLE_KEY,
+            "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+        },
+        http_client=_get_http_client(),
+    )
+
+
+def close_db_pool():
+    """Close pooled connections (app shutdown)."""
+    global _http_client
+    with _http_lock:
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
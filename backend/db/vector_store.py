@@ -0,0 +1,79 @@
+"""Vector stores that rank resume chunks where the data lives.
+
+Both stores expose `match(resume_id, query_embedding, top_k)` and return
+[(similarity, content_chunk)] best first:
+
+  - SupabaseVectorStore calls the `match_resume_chunks` pgvector RPC
+    (db/sql/match_resume_chunks.sql), so only top-k rows cross the wire.
+  - SQLiteVectorStore is a local stand-in with the same interface for tests
+    and offline runs; ranking happens inside the SQL query through a
+    registered cosine function.
+"""
+
+import sqlite3
+import threading
+import numpy as np
+
+
+class SupabaseVectorStore:
+    """Top-k retrieval through the pgvector RPC on Supabase."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def match(self, resume_id: str, query_embedding: list[float], top_k: int = 3) -> list[tuple[float, str]]:
+        result = self.client.rpc(
+            "match_resume_chunks",
+            {
+                "query_embedding": query_embedding,
+                "match_resume_id": resume_id,
+                "match_count": top_k,
+            },
+        ).execute()
+        return [(row["similarity"], row["content_chunk"]) for row in result.data or []]
+
+
+def _cosine(a: bytes, b: bytes) -> float:
+    va = np.frombuffer(a, dtype=np.float32)
+    vb = np.frombuffer(b, dtype=np.float32)
+    denom = float(np.linalg.norm(va) * np.linalg.norm(vb))
+    return float(va @ vb) / denom if denom else 0.0
+
+
+class SQLiteVectorStore:
+    """In-process SQLite stand-in for the pgvector RPC."""
+
+    def __init__(self, path: str = ":memory:"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.create_function("cosine_similarity", 2, _cosine, deterministic=True)
+        self._conn.execute(
+            "create table if not exists resume_embeddings ("
+            " resume_id text not null, content_chunk text not null, embedding blob not null)"
+        )
+        self._conn.execute(
+            "create index if not exists resume_embeddings_resume_id_idx on resume_embeddings (resume_id)"
+        )
+        self._lock = threading.Lock()
+
+    def add(self, resume_id: str, chunks: list[str], embeddings: list[list[float]]):
+        rows = [
+            (resume_id, chunk, np.asarray(emb, dtype=np.float32).tobytes())
+            for chunk, emb in zip(chunks, embeddings)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("insert into resume_embeddings values (?, ?, ?)", rows)
+
+    def delete(self, resume_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("delete from resume_embeddings where resume_id = ?", (resume_id,))
+
+    def match(self, resume_id: str, query_embedding: list[float], top_k: int = 3) -> list[tuple[float, str]]:
+        query = np.asarray(query_embedding, dtype=np.float32).tobytes()
+        with self._lock:
+            rows = self._conn.execute(
+                "select cosine_similarity(embedding, ?) as similarity, content_chunk"
+                " from resume_embeddings where resume_id = ?"
+                " order by similarity desc limit ?",
+                (query, resume_id, top_k),
+            ).fetchall()
+        return [(float(sim), chunk) for sim, chunk in rows]
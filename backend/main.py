@@ -1,8 +1,49 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+import anyio
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from routes import auth, interview, resume, audio
+from services.message_writer import message_writer
+from services.ingest_queue import ingest_queue
+from db.supabase_client import close_db_pool
+from utils.auth_dependency import jwks_cache
+from utils.metrics import registry
+from utils.server_timing import ServerTimingMiddleware
+from utils.profiler import ProfileMiddleware
 
-app = FastAPI(title="DesierAI API")
+# Threads available for blocking Groq / Supabase calls. Sync routes and
+# run_in_threadpool share this pool, so it caps concurrent upstream calls
+# per worker (anyio's default is 40).
+BLOCKING_THREADS = int(os.getenv("BLOCKING_THREADS", "100"))
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = BLOCKING_THREADS
+    message_writer.start()
+    # Also re-queues uploads journaled by the previous shutdown
+    ingest_queue.start()
+    # Load signing keys before serving, then keep them fresh off the hot path
+    await anyio.to_thread.run_sync(jwks_cache.refresh)
+    jwks_cache.start()
+    yield
+    jwks_cache.stop()
+    # Finish (or journal) queued uploads while the DB pool is up
+    ingest_queue.close()
+    # Flush queued interview messages before the worker exits
+    message_writer.close()
+    close_db_pool()
+
+
+app = FastAPI(title="DesierAI API", lifespan=lifespan)
+
+# Per-stage Server-Timing on the live routes; opt-in profiling (PROFILE_TOKEN)
+app.add_middleware(ServerTimingMiddleware, prefixes=("/audio", "/interview"))
+app.add_middleware(ProfileMiddleware)
 
 # CORS – allow frontend dev server and common origins
 app.add_middleware(
@@ -11,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-File"],
 )
 
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -22,6 +64,13 @@ app.include_router(audio.router, prefix="/audio", tags=["Audio"])
 def root():
     return {"message": "DesierAI backend running"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics(request: Request):
+    """Latency histograms, token counters and cache hit rates (Prometheus text format)."""
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/version")
 def get_version():
     return {
@@ -5,14 +5,27 @@ from typing import Optional
 # ── Resume ──────────────────────────────────────
 class ResumeUploadResponse(BaseModel):
     message: str
-    resume_id: str
-    chunk_count: int
+    resume_id: Optional[str] = None  # set once processed (or for a duplicate upload)
+    chunk_count: int = 0
+    job_id: Optional[str] = None  # poll /resume/status?job_id= while processing
+
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    state: str  # queued | running | done | failed
+    stage: Optional[str] = None
+    progress: float = 0.0
+    timings: dict[str, float] = {}
+    resume_id: Optional[str] = None
+    chunk_count: int = 0
+    error: Optional[str] = None
 
 
 class ResumeStatus(BaseModel):
     has_resume: bool
     resume_id: Optional[str] = None
     title: Optional[str] = None
+    job: Optional[IngestJobStatus] = None
 
 
 # ── Interview ──────────────────────────────────
@@ -1,10 +1,45 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from utils.auth_dependency import get_current_user
-from services.stt_service import transcribe_audio
-from services.groq_service import generate_live_answer
-from services.rag_service import get_full_resume_text
+import asyncio
+import json
+import logging
+import time
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from utils.auth_dependency import get_current_user, get_db, verify_token
+from services.stt_service import transcribe_audio, clean_transcript
+from services.vad_service import gate_audio
+from services.groq_scheduler import GroqBusyError
+from services.groq_service import (
+    build_live_answer_prefix,
+    generate_live_answer,
+    stream_live_answer,
+    replay_live_answer,
+)
+from services.answer_cache import answer_cache
+from services.rag_service import get_full_resume_text, build_live_context, warm_live_context
+from db.supabase_client import get_db_client
+from services.audio_stream import AudioStreamSession
+from utils.metrics import ERRORS
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# The client must send its access token this soon after connecting
+STREAM_AUTH_TIMEOUT = 10.0
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def _valid_history(history) -> bool:
+    """History from a client is a list of {"question", "answer"} string pairs."""
+    return isinstance(history, list) and all(
+        isinstance(turn, dict)
+        and set(turn) == {"question", "answer"}
+        and all(isinstance(v, str) for v in turn.values())
+        for turn in history
+    )
+
 
 @router.post("/transcribe")
 async def transcribe(
@@ -14,8 +49,10 @@ async def transcribe(
     """Simple transcription endpoint."""
     try:
         content = await file.read()
-        transcript = transcribe_audio(content, file.filename)
+        transcript = await run_in_threadpool(transcribe_audio, content, file.filename)
         return {"transcript": transcript}
+    except GroqBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -25,61 +62,266 @@ async def listen_and_answer(
     role: str = "",
     level: str = "",
     history: str = "[]", # JSON string from client
-    user=Depends(get_current_user)
+    user=Depends(get_current_user),
+    db=Depends(get_db),
 ):
     """Transcribe audio and generate an AI answer in one go."""
     user_id = user.get("sub")
     
     try:
-        import json
         history_list = json.loads(history)
-    except Exception:
-        history_list = []
+    except ValueError:
+        history_list = None
+    if not _valid_history(history_list):
+        raise HTTPException(status_code=422, detail="history must be a list of {question, answer} items")
 
+    timings: dict = {}
+    pending: list[asyncio.Task] = []
     try:
-        # 1. Transcribe the audio
         content = await file.read()
         if len(content) < 100:
             return {"transcript": "", "answer": "Recording was too short or empty. Please try speaking again."}
-            
-        transcript = transcribe_audio(content, file.filename)
-        
-        # Whisper Silence Hallucination Filter
-        t_clean = transcript.lower().strip()
-        hallucinations = [
-            "thank you.", "okay.", "bye.", "you.", "yeah.", "yes.", 
-            "thank you", "okay", "bye", "you", "yeah", "yes", "amém.", "amén",
-            "hello.", "hello", "hi.", "hi", "i'm sorry.", "sorry."
-        ]
-        
-        if t_clean in hallucinations or len(t_clean) < 3:
-            transcript = "" # Treat as complete silence to prevent UI overwrite
-            
+
+        start = time.perf_counter()
+
+        async def speech_stage():
+            # Skip Whisper entirely when the clip has no speech
+            audio, vad = await run_in_threadpool(gate_audio, content, file.filename)
+            timings["vad_ms"] = _elapsed_ms(start)
+            if audio is None:
+                return "", vad
+            transcript = await run_in_threadpool(transcribe_audio, audio, file.filename)
+            timings["stt_ms"] = _elapsed_ms(start)
+            # Whisper Silence Hallucination Filter
+            # Treat as complete silence to prevent UI overwrite
+            return clean_transcript(transcript), vad
+
+        async def context_stage():
+            resume_text, resume_id = await run_in_threadpool(get_full_resume_text, db, user_id)
+            if resume_text:
+                await run_in_threadpool(warm_live_context, db, user_id, resume_id)
+            timings["context_ms"] = _elapsed_ms(start)
+            return resume_text, resume_id
+
+        # 1. Resume, profile and retrieval index load while the clip is transcribed
+        speech_task = asyncio.create_task(speech_stage())
+        context_task = asyncio.create_task(context_stage())
+        pending = [speech_task, context_task]
+
+        transcript, vad = await speech_task
         if not transcript.strip():
-            return {"transcript": "", "answer": ""}
+            return {"transcript": "", "answer": "", "vad": vad, "timings": timings}
 
-        # 2. Get resume context
-        resume_text, _ = get_full_resume_text(user_id)
+        # 2. Get resume context (usually ready by now)
+        resume_text, resume_id = await context_task
         if not resume_text:
              raise HTTPException(status_code=400, detail="No resume found.")
 
-        # 3. Generate live answer
-        result = generate_live_answer(
+        # 3. Reuse the answer to a repeated / near-duplicate question
+        cached = answer_cache.get(resume_id, role, level, transcript)
+        if cached is not None:
+            timings["total_ms"] = _elapsed_ms(start)
+            return {"transcript": transcript, **cached, "vad": vad, "timings": timings}
+
+        # 4. Profile + question-specific chunks (all in memory by now)
+        resume_context = await run_in_threadpool(build_live_context, db, user_id, resume_id, transcript)
+        prompt_prefix = build_live_answer_prefix(resume_context, role, level, history_list)
+        timings["retrieval_ms"] = _elapsed_ms(start)
+
+        # 5. Generate live answer
+        llm_start = time.perf_counter()
+        result = await run_in_threadpool(
+            generate_live_answer,
             question=transcript,
-            resume_context=resume_text,
+            resume_context=resume_context,
             job_role=role,
             level=level,
-            history=history_list
+            history=history_list,
+            prompt_prefix=prompt_prefix,
         )
+        timings["llm_ms"] = _elapsed_ms(llm_start)
+        timings["total_ms"] = _elapsed_ms(start)
+        answer_cache.put(resume_id, role, level, transcript, result)
         
         return {
             "transcript": transcript,
-            **result
+            **result,
+            "cached": False,
+            "vad": vad,
+            "timings": timings,
         }
         
+    except HTTPException:
+        raise
+    except GroqBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        import logging
-        logging.error(f"Error in listen-and-answer: {str(e)}")
+        ERRORS.inc(route="listen_and_answer")
+        logger.exception(f"Error in listen-and-answer: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Don't leave the context fetch running (or its error unretrieved)
+        for task in pending:
+            if task.done():
+                if not task.cancelled():
+                    task.exception()
+            else:
+                task.cancel()
+
+
+@router.websocket("/stream")
+async def audio_stream(websocket: WebSocket):
+    """Continuous listen-and-answer over a WebSocket (`/audio/stream`).
+
+    The token travels in the first message rather than the URL, which would
+    put it in access logs.
+
+    Client → server:
+      {"type": "auth", "token"}      – first message: the Supabase access token
+      binary message                 – a MediaRecorder timeslice (first one carries the WebM header)
+      {"type": "config", ...}        – optional role / level / history ({question, answer} list)
+      {"type": "end"}                – end of speech detected client-side
+
+    Server → client:
+      {"type": "partial", "transcript"}     – transcript so far, after each window
+      {"type": "transcript", "transcript"}  – final transcript of the utterance
+      {"type": "answer", "delta"}           – answer text as tokens arrive
+      {"type": "field", "key", "value"}     – other answer fields as they parse
+      {"type": "done", ...}                 – full answer, same shape as /listen-and-answer
+      {"type": "error", "detail"}
+
+    End of speech is a client "end" message or STREAM_END_SILENCE seconds
+    after the VAD last heard transcribed speech.  Windows without speech
+    never reach Whisper.
+    """
+    await websocket.accept()
+    try:
+        auth = await asyncio.wait_for(websocket.receive_json(), STREAM_AUTH_TIMEOUT)
+        token = auth.get("token", "") if auth.get("type") == "auth" else ""
+        user = verify_token(token)
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, HTTPException, KeyError, ValueError, AttributeError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    db = get_db_client(token)
+    user_id = user.get("sub")
+    resume_text, resume_id = await run_in_threadpool(get_full_resume_text, db, user_id)
+    if not resume_text:
+        await websocket.send_json({"type": "error", "detail": "No resume found."})
+        await websocket.close()
+        return
+    await run_in_threadpool(warm_live_context, db, user_id, resume_id)
+
+    session = AudioStreamSession()
+    partial_task: asyncio.Task | None = None
+
+    async def transcribe_window():
+        # Decoding the WebM stream and the VAD are CPU work; keep them off the event loop
+        audio, end = await run_in_threadpool(session.next_window)
+        text = ""
+        if audio is not None:
+            text = await run_in_threadpool(transcribe_audio, audio, session.filename)
+        if session.apply_transcript(clean_transcript(text), end):
+            await websocket.send_json({"type": "partial", "transcript": session.transcript})
+
+    async def answer_utterance():
+        nonlocal partial_task
+        if partial_task is not None:
+            await asyncio.gather(partial_task, return_exceptions=True)
+            partial_task = None
+        if session.new_frame_count > 0:
+            await transcribe_window()
+
+        transcript = session.transcript
+        session.reset_utterance()
+        if not transcript:
+            return
+
+        await websocket.send_json({"type": "transcript", "transcript": transcript})
+        cached = answer_cache.get(resume_id, session.role, session.level, transcript)
+        if cached is not None:
+            answer_stream = replay_live_answer(cached)
+        else:
+            resume_context = await run_in_threadpool(build_live_context, db, user_id, resume_id, transcript)
+            answer_stream = stream_live_answer(
+                question=transcript,
+                resume_context=resume_context,
+                job_role=session.role,
+                level=session.level,
+                history=session.history,
+            )
+        async for event, data in iterate_in_threadpool(answer_stream):
+            if event == "done":
+                if cached is None:
+                    answer_cache.put(resume_id, session.role, session.level, transcript, data)
+                    data = {**data, "cached": False}
+                session.history.append({"question": transcript, "answer": data.get("answer", "")})
+            await websocket.send_json({"type": event, **data})
+
+    receive_task: asyncio.Task | None = None
+    try:
+        while True:
+            # Wake for the next message or when a window's transcript lands,
+            # whichever is first, so silence after speech ends the utterance
+            # even if the last frames have already arrived
+            if receive_task is None:
+                receive_task = asyncio.create_task(websocket.receive())
+            waiting = {receive_task}
+            if partial_task is not None and not partial_task.done():
+                waiting.add(partial_task)
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            message = {}
+            if receive_task.done():
+                message, receive_task = receive_task.result(), None
+            if message.get("type") == "websocket.disconnect":
+                break
+
+            if message.get("bytes"):
+                session.add_frame(message["bytes"])
+                if session.ready_for_partial() and (partial_task is None or partial_task.done()):
+                    partial_task = asyncio.create_task(transcribe_window())
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    continue
+                if control.get("type") == "config":
+                    history = control.get("history", session.history)
+                    if not _valid_history(history):
+                        await websocket.send_json({
+                            "type": "error", "detail": "history must be a list of {question, answer} items",
+                        })
+                        continue
+                    session.role = control.get("role", session.role)
+                    session.level = control.get("level", session.level)
+                    session.history = history
+                elif control.get("type") == "end":
+                    await answer_utterance()
+
+            if partial_task is not None and partial_task.done():
+                if partial_task.exception() is not None:
+                    await websocket.send_json({"type": "error", "detail": str(partial_task.exception())})
+                    partial_task = None
+                elif session.end_of_speech:
+                    await answer_utterance()
+                elif session.ready_for_partial():
+                    # Frames arrived while the last window was transcribed
+                    partial_task = asyncio.create_task(transcribe_window())
+
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        ERRORS.inc(route="audio_stream")
+        logger.exception(f"Error in audio stream: {str(e)}")
+        try:
+            await websocket.send_json({"type": "error", "detail": str(e)})
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        for task in (partial_task, receive_task):
+            if task is not None and not task.done():
+                task.cancel()
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends
-from utils.auth_dependency import get_current_user
-from db.supabase_client import supabase
+from utils.auth_dependency import get_current_user, get_db
 
 router = APIRouter()
 
@@ -12,8 +11,8 @@ def get_user(user=Depends(get_current_user)):
     }
 
 @router.get("/db-test")
-def db_test(user=Depends(get_current_user)):
-    response = supabase.table("resumes").select("*").limit(1).execute()
+def db_test(db=Depends(get_db)):
+    response = db.table("resumes").select("*").limit(1).execute()
     return {
         "status": "DB connected",
         "data": response.data
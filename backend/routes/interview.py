@@ -5,12 +5,26 @@ Tables used:
   - interview_messages  (id, session_id, sender, message, created_at)
 """
 
+import json
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, Request
-from utils.auth_dependency import get_current_user
-from services.rag_service import get_full_resume_text, retrieve_relevant_chunks
-from services.groq_service import generate_interview_questions, evaluate_answer, generate_live_answer
-from db.supabase_client import supabase
+from typing import Optional
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
+from utils.auth_dependency import get_current_user, get_access_token, get_db
+from services.rag_service import get_full_resume_text, retrieve_relevant_chunks, build_live_context
+from services.groq_service import (
+    generate_interview_questions,
+    evaluate_answer,
+    generate_live_answer,
+    stream_live_answer,
+    replay_live_answer,
+)
+from services.answer_cache import answer_cache
+from services.groq_scheduler import groq_scheduler, GroqBusyError
+from services.model_router import model_router
+from services.message_writer import message_writer
 from models.schemas import (
     InterviewStartRequest,
     InterviewStartResponse,
@@ -26,11 +40,13 @@ router = APIRouter()
 @router.post("/start", response_model=InterviewStartResponse)
 def start_interview(
     req: InterviewStartRequest,
+    request: Request,
     user=Depends(get_current_user),
+    db=Depends(get_db),
 ):
     """Generate interview questions based on the user's resume and target role."""
     user_id = user.get("sub")
-    resume_text, resume_id = get_full_resume_text(user_id)
+    resume_text, resume_id = get_full_resume_text(db, user_id)
 
     if not resume_text or not resume_id:
         raise HTTPException(
@@ -44,6 +60,8 @@ def start_interview(
             job_role=req.role,
             num_questions=req.num_questions,
         )
+    except GroqBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -53,7 +71,7 @@ def start_interview(
     session_id = str(uuid.uuid4())
 
     # Create interview session
-    supabase.table("interview_sessions").insert(
+    db.table("interview_sessions").insert(
         {
             "id": session_id,
             "user_id": user_id,
@@ -62,15 +80,10 @@ def start_interview(
         }
     ).execute()
 
-    # Store each question as an AI message
+    # Store each question as an AI message (batched, off the request path)
+    token = get_access_token(request)
     for q in questions_raw:
-        supabase.table("interview_messages").insert(
-            {
-                "session_id": session_id,
-                "sender": "ai",
-                "message": q["question"],
-            }
-        ).execute()
+        message_writer.enqueue(token, session_id, "ai", q["question"])
 
     questions = [InterviewQuestion(**q) for q in questions_raw]
     return InterviewStartResponse(session_id=session_id, questions=questions)
@@ -79,14 +92,16 @@ def start_interview(
 @router.post("/answer", response_model=AnswerFeedback)
 def submit_answer(
     req: AnswerSubmitRequest,
+    request: Request,
     user=Depends(get_current_user),
+    db=Depends(get_db),
 ):
     """Evaluate a single interview answer using the LLM."""
     user_id = user.get("sub")
 
     # Look up session to get resume_id
     session = (
-        supabase.table("interview_sessions")
+        db.table("interview_sessions")
         .select("resume_id")
         .eq("id", req.session_id)
         .single()
@@ -99,17 +114,12 @@ def submit_answer(
     resume_id = session.data["resume_id"]
 
     # Retrieve relevant resume context for this question
-    context_chunks = retrieve_relevant_chunks(resume_id, req.question, top_k=3)
+    context_chunks = retrieve_relevant_chunks(db, resume_id, req.question, top_k=3)
     context = "\n\n".join(context_chunks) if context_chunks else ""
 
     # Store user's answer as a message
-    supabase.table("interview_messages").insert(
-        {
-            "session_id": req.session_id,
-            "sender": "user",
-            "message": req.answer,
-        }
-    ).execute()
+    token = get_access_token(request)
+    message_writer.enqueue(token, req.session_id, "user", req.answer)
 
     try:
         result = evaluate_answer(
@@ -117,6 +127,8 @@ def submit_answer(
             answer=req.answer,
             resume_context=context,
         )
+    except GroqBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -125,13 +137,7 @@ def submit_answer(
 
     # Store AI feedback as a message
     feedback_msg = f"Score: {result.get('score', 0)}/10\n\n{result.get('feedback', '')}\n\nImprovement: {result.get('improvement', '')}"
-    supabase.table("interview_messages").insert(
-        {
-            "session_id": req.session_id,
-            "sender": "ai",
-            "message": feedback_msg,
-        }
-    ).execute()
+    message_writer.enqueue(token, req.session_id, "ai", feedback_msg)
 
     return AnswerFeedback(
         question=req.question,
@@ -142,16 +148,42 @@ def submit_answer(
     )
 
 
+def _pgrst_quote(value: str) -> str:
+    """Double-quote a value for a PostgREST logic filter, so `+`, `:` and `,` survive."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
 @router.get("/history", response_model=list[InterviewSession])
-def get_history(user=Depends(get_current_user)):
-    """Retrieve past interview sessions for the current user."""
+def get_history(
+    limit: int = Query(20, ge=1, le=100),
+    before: Optional[str] = None,
+    before_id: Optional[str] = None,
+    user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Retrieve past interview sessions for the current user, newest first.
+
+    Keyset-paginated on (created_at, id): pass the `created_at` and
+    `session_id` of the last session received as `before` and `before_id` to
+    get the next page.  Sessions sharing a timestamp are ordered by id, so a
+    page boundary between them neither skips nor repeats one."""
     user_id = user.get("sub")
 
-    sessions = (
-        supabase.table("interview_sessions")
-        .select("id, role, created_at")
+    # One query: sessions plus an aggregated message count per session
+    query = (
+        db.table("interview_sessions")
+        .select("id, role, created_at, interview_messages(count)")
         .eq("user_id", user_id)
-        .order("created_at", desc=True)
+    )
+    if before and before_id:
+        ts, sid = _pgrst_quote(before), _pgrst_quote(before_id)
+        query = query.or_(f"created_at.lt.{ts},and(created_at.eq.{ts},id.lt.{sid})")
+    elif before:
+        query = query.lt("created_at", before)
+    sessions = (
+        query.order("created_at", desc=True)
+        .order("id", desc=True)
+        .limit(limit)
         .execute()
     )
 
@@ -160,18 +192,13 @@ def get_history(user=Depends(get_current_user)):
 
     result = []
     for s in sessions.data:
-        messages = (
-            supabase.table("interview_messages")
-            .select("id")
-            .eq("session_id", s["id"])
-            .execute()
-        )
+        counts = s.get("interview_messages") or []
         result.append(
             InterviewSession(
                 session_id=s["id"],
                 role=s["role"],
                 created_at=s["created_at"],
-                message_count=len(messages.data) if messages.data else 0,
+                message_count=counts[0]["count"] if counts else 0,
             )
         )
 
@@ -179,13 +206,13 @@ def get_history(user=Depends(get_current_user)):
 
 
 @router.get("/session/{session_id}")
-def get_session_detail(session_id: str, user=Depends(get_current_user)):
+def get_session_detail(session_id: str, user=Depends(get_current_user), db=Depends(get_db)):
     """Retrieve all messages for a specific interview session."""
     user_id = user.get("sub")
 
     # Verify user owns this session
     session = (
-        supabase.table("interview_sessions")
+        db.table("interview_sessions")
         .select("id, role, created_at")
         .eq("id", session_id)
         .eq("user_id", user_id)
@@ -198,7 +225,7 @@ def get_session_detail(session_id: str, user=Depends(get_current_user)):
 
     # Get all messages ordered by creation time
     messages = (
-        supabase.table("interview_messages")
+        db.table("interview_messages")
         .select("sender, message, created_at")
         .eq("session_id", session_id)
         .order("created_at")
@@ -217,6 +244,7 @@ def get_session_detail(session_id: str, user=Depends(get_current_user)):
 async def live_answer(
     request: Request,
     user=Depends(get_current_user),
+    db=Depends(get_db),
 ):
     """Generate an instant AI answer with session memory and auto level detection."""
     user_id = user.get("sub")
@@ -229,30 +257,119 @@ async def live_answer(
     if not question:
         raise HTTPException(status_code=400, detail="Question is required")
 
-    resume_text, resume_id = get_full_resume_text(user_id)
+    resume_text, resume_id = await run_in_threadpool(get_full_resume_text, db, user_id)
     if not resume_text:
         raise HTTPException(
             status_code=400,
             detail="No resume found. Please upload your resume first.",
         )
 
+    cached = answer_cache.get(resume_id, job_role, level, question)
+    if cached is not None:
+        return cached
+
     try:
-        result = generate_live_answer(
+        resume_context = await run_in_threadpool(build_live_context, db, user_id, resume_id, question)
+        result = await run_in_threadpool(
+            generate_live_answer,
             question=question,
-            resume_context=resume_text,
+            resume_context=resume_context,
             job_role=job_role,
             level=level,
             history=history,
         )
+    except GroqBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to generate answer: {str(e)}",
         )
 
-    return result
+    answer_cache.put(resume_id, job_role, level, question, result)
+    return {**result, "cached": False}
+
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/live-answer/stream")
+async def live_answer_stream(
+    request: Request,
+    user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Stream a live answer as Server-Sent Events.
+
+    Emits `answer` events with text deltas as tokens arrive, a `field` event
+    for each of key_points/code/tip/... once parsed, and a final `done` event
+    carrying the full result (same shape as /live-answer).  If the client
+    goes away the upstream Groq stream is closed, so generation stops and
+    its token charge is settled.
+    """
+    user_id = user.get("sub")
+    req = await request.json()
+    question = req.get("question", "").strip()
+    job_role = req.get("role", "").strip()
+    level = req.get("level", "").strip()
+    history = req.get("history", [])
+
+    if not question:
+        raise HTTPException(status_code=400, detail="Question is required")
+
+    resume_text, resume_id = await run_in_threadpool(get_full_resume_text, db, user_id)
+    if not resume_text:
+        raise HTTPException(
+            status_code=400,
+            detail="No resume found. Please upload your resume first.",
+        )
+
+    cached = answer_cache.get(resume_id, job_role, level, question)
+    resume_context = ""
+    if cached is None:
+        resume_context = await run_in_threadpool(build_live_context, db, user_id, resume_id, question)
+
+    async def event_stream():
+        if cached is not None:
+            events = replay_live_answer(cached)
+        else:
+            events = stream_live_answer(
+                question=question,
+                resume_context=resume_context,
+                job_role=job_role,
+                level=level,
+                history=history,
+            )
+        try:
+            # Reading the Groq stream blocks; pull each event in the threadpool
+            async for event, data in iterate_in_threadpool(events):
+                if await request.is_disconnected():
+                    break
+                if event == "done" and cached is None:
+                    answer_cache.put(resume_id, job_role, level, question, data)
+                    data = {**data, "cached": False}
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": f"Failed to generate answer: {str(e)}"})
+        finally:
+            # Runs on disconnect too, when Starlette cancels the response
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(events.close)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/health")
 def interview_health():
-    return {"interview": "working"}
+    return {
+        "interview": "working",
+        "answer_cache": answer_cache.stats(),
+        "groq_scheduler": groq_scheduler.stats(),
+        "model_router": model_router.stats(),
+    }
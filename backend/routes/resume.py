@@ -1,26 +1,70 @@
-"""Resume routes – upload PDF, parse, embed, and store.
+"""Resume routes – upload PDF, then parse, embed, and store in the background.
 
 Tables used:
-  - resumes (id, user_id, title, file_url, parsed_text, created_at)
-  - resume_embeddings (id, resume_id, content_chunk, embedding, created_at)
+  - resumes (id, user_id, title, file_url, parsed_text, profile,
+             content_hash, chunk_count, created_at)
+  - resume_embeddings (id, resume_id, content_chunk, section, start_offset,
+                       end_offset, embedding, created_at)
 """
 
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from utils.auth_dependency import get_current_user
-from utils.pdf_parser import extract_text_from_pdf, chunk_text
-from services.embedding_service import get_embeddings
-from services.rag_service import create_resume_record, store_resume_embeddings, get_user_resume
+import hashlib
+import os
+import tempfile
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from utils.auth_dependency import get_current_user, get_db, get_access_token
+from utils.pdf_parser import PDF_MAX_BYTES
+from services.ingest_queue import ingest_queue, IngestQueueFull, PIPELINE_VERSION
+from services.rag_service import (
+    find_duplicate_resume,
+    get_user_resume,
+    resume_cache_stats,
+)
 from models.schemas import ResumeUploadResponse, ResumeStatus
 
 router = APIRouter()
 
+UPLOAD_CHUNK_BYTES = 256 * 1024
+
+
+async def _spool_upload(file: UploadFile, max_bytes: int = PDF_MAX_BYTES) -> tuple[str, str]:
+    """Copy the upload to a temp file in chunks, enforcing `max_bytes`.
+
+    Returns (path, content hash); the caller deletes the file.  The hash
+    covers PIPELINE_VERSION as well as the bytes, so only uploads the
+    current pipeline already processed count as duplicates."""
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    size = 0
+    digest = hashlib.sha256(PIPELINE_VERSION.encode() + b"\n")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                digest.update(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"PDF is larger than {max_bytes // (1024 * 1024)} MB",
+                    )
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path, digest.hexdigest()
+
 
 @router.post("/upload", response_model=ResumeUploadResponse)
 async def upload_resume(
+    request: Request,
+    response: Response,
     file: UploadFile = File(...),
     user=Depends(get_current_user),
+    db=Depends(get_db),
 ):
-    """Upload a PDF resume, extract text, generate embeddings, and store."""
+    """Upload a PDF resume and queue it for text extraction and embedding.
+
+    Returns 202 with a job_id to poll on /resume/status, or 200 straight away
+    when the PDF is the one already stored."""
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
@@ -28,47 +72,60 @@ async def upload_resume(
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid user token")
 
+    path, content_hash = await _spool_upload(file)
+    queued = False
     try:
-        contents = await file.read()
-        text = extract_text_from_pdf(contents)
-
-        if not text.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract text from PDF. Is it scanned/image-only?",
+        # Same bytes as the stored resume: nothing to parse or embed
+        existing = await run_in_threadpool(find_duplicate_resume, db, user_id, content_hash)
+        if existing:
+            return ResumeUploadResponse(
+                message="Resume already uploaded",
+                resume_id=existing["id"],
+                chunk_count=existing.get("chunk_count") or 0,
             )
 
-        # 1. Create resume record
         title = file.filename.rsplit(".", 1)[0]  # filename without .pdf
-        resume_id = create_resume_record(user_id, title, text)
-
-        # 2. Chunk + embed + store
-        chunks = chunk_text(text)
-        embeddings = get_embeddings(chunks)
-        count = store_resume_embeddings(resume_id, chunks, embeddings)
-
-        return ResumeUploadResponse(
-            message="Resume uploaded and processed successfully",
-            resume_id=resume_id,
-            chunk_count=count,
-        )
+        job = ingest_queue.submit(get_access_token(request), user_id, title, path, content_hash)
+        queued = True
+        response.status_code = 202
+        return ResumeUploadResponse(message="Resume queued for processing", job_id=job.id)
 
+    except IngestQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    finally:
+        if not queued:
+            os.unlink(path)
 
 
 @router.get("/status", response_model=ResumeStatus)
-def resume_status(user=Depends(get_current_user)):
-    """Check whether the current user has uploaded a resume."""
+def resume_status(
+    job_id: str | None = None,
+    user=Depends(get_current_user),
+    db=Depends(get_db),
+):
+    """Check whether the current user has a resume, and how its latest
+    upload (or the upload `job_id`) is getting on."""
     user_id = user.get("sub")
-    resume = get_user_resume(user_id)
+    if job_id:
+        job = ingest_queue.get(job_id)
+        if job is None or job.user_id != user_id:
+            raise HTTPException(status_code=404, detail="Upload job not found")
+    else:
+        job = ingest_queue.latest_for(user_id)
+    job_status = job.status() if job else None
+
+    if job and job.state == "done":
+        return ResumeStatus(has_resume=True, resume_id=job.resume_id, title=job.title, job=job_status)
+    resume = get_user_resume(db, user_id)
     if resume:
-        return ResumeStatus(has_resume=True, resume_id=resume["id"], title=resume.get("title"))
-    return ResumeStatus(has_resume=False)
+        return ResumeStatus(has_resume=True, resume_id=resume["id"], title=resume.get("title"), job=job_status)
+    return ResumeStatus(has_resume=False, job=job_status)
 
 
 @router.get("/health")
 def resume_health():
-    return {"resume": "working"}
+    return {"resume": "working", "cache": resume_cache_stats(), "ingest": ingest_queue.stats()}
@@ -0,0 +1,157 @@
+"""Near-duplicate cache for live answers.
+
+Interviewers repeat stock questions and overlapping audio clips produce
+slightly different transcripts of the same question.  Answers are keyed by
+(resume_id, role, level, normalized question); a lookup that misses the exact
+key falls back to the most recently cached question in the same bucket with
+exactly the same content words: the question minus stop words and filler,
+in any order.  A fuzzy similarity score is not enough here, since
+"garbage collection in Java" vs "... in Go" or "SQL and NoSQL" vs "SQL and
+NewSQL" share most of their wording but differ in the one word that
+decides the answer.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from utils.metrics import registry
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "1800"))
+
+# Function words and interviewer filler.  Negations, quantifiers and
+# how/why/when/where/which/who are left out: they change the answer
+_STOP_WORDS = frozenset("""
+a about again also am an and are as at be been being but by can could did do
+does doing for from had has have having he her here him his i if in into is
+it its just let like me might my of on or our please really s she should so
+tell that the their them then there these they this those to too uh um us
+very vs versus was we well were what whats will with would you your okay ok
+""".split())
+
+# Answers the model gives when it should not be reused
+_UNCACHEABLE_ANSWERS = {"", "waiting for interviewer to finish..."}
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+def content_words(norm: str) -> frozenset:
+    """The words of a normalized question that can change its answer."""
+    return frozenset(w for w in norm.split() if w not in _STOP_WORDS)
+
+
+class AnswerCache:
+    """Thread-safe LRU/TTL cache of live answers with near-duplicate lookup."""
+
+    def __init__(
+        self,
+        maxsize: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        # (bucket, normalized question) -> (content words, result, expires_at)
+        self._entries: OrderedDict = OrderedDict()
+        # bucket -> content words -> normalized questions
+        self._buckets: dict[tuple, dict[frozenset, set]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, resume_id: str, role: str, level: str, question: str) -> dict | None:
+        """Return a copy of the cached result flagged with "cached": True, or None."""
+        bucket = (resume_id, role.lower(), level.lower())
+        norm = normalize_question(question)
+        now = time.monotonic()
+
+        with self._lock:
+            key = (bucket, norm)
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= now:
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                best_key, best_expiry = None, now
+                words = content_words(norm)
+                # A question of only stop words ("what is it?") matches exactly or not at all
+                candidates = self._buckets.get(bucket, {}).get(words, ()) if words else ()
+                for other in list(candidates):
+                    other_key = (bucket, other)
+                    expires_at = self._entries[other_key][2]
+                    if expires_at <= now:
+                        self._remove(other_key)
+                    elif expires_at > best_expiry:
+                        # Latest expiry is the most recently cached answer
+                        best_key, best_expiry = other_key, expires_at
+                if best_key is None:
+                    self.misses += 1
+                    return None
+                key, entry = best_key, self._entries[best_key]
+                self.near_hits += 1
+            else:
+                self.hits += 1
+
+            self._entries.move_to_end(key)
+            return {**entry[1], "cached": True}
+
+    def put(self, resume_id: str, role: str, level: str, question: str, result: dict):
+        answer = str(result.get("answer", "")).strip().lower()
+        if answer in _UNCACHEABLE_ANSWERS:
+            return
+
+        bucket = (resume_id, role.lower(), level.lower())
+        norm = normalize_question(question)
+        if not norm:
+            return
+        words = content_words(norm)
+        value = {k: v for k, v in result.items() if k != "cached"}
+
+        with self._lock:
+            key = (bucket, norm)
+            self._remove(key)
+            self._entries[key] = (words, value, time.monotonic() + self.ttl)
+            self._buckets.setdefault(bucket, {}).setdefault(words, set()).add(norm)
+            while len(self._entries) > self.maxsize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        bucket, norm = key
+        groups = self._buckets[bucket]
+        groups[entry[0]].discard(norm)
+        if not groups[entry[0]]:
+            del groups[entry[0]]
+            if not groups:
+                del self._buckets[bucket]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.near_hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.near_hits) / total, 4) if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+answer_cache = AnswerCache()
+registry.register_cache("answer", answer_cache.stats)
@@ -0,0 +1,188 @@
+"""Rolling audio buffer for the /audio/stream WebSocket.
+
+The desktop MediaRecorder emits one continuous WebM/Opus stream in small
+timeslices.  Timeslices don't line up with WebM Clusters or blocks, so the
+stream is never cut into containers: the first timeslice's container header
+is kept, and each window decodes `header + bytes since the last Cluster
+start` with PyAV, appending the audio not decoded before to the utterance's
+16 kHz PCM.  Windows go to Whisper as WAV and start OVERLAP_SECONDS before
+the previously transcribed position, so words cut at a window edge are
+heard twice; `merge_overlap` drops the duplicated words.
+
+Each window's new audio goes through the VAD first and only windows with
+speech reach Whisper, so an open socket in a quiet room doesn't spend the
+shared audio rate limit.  The utterance ends once speech was transcribed
+and END_SILENCE_SECONDS have passed since the VAD last heard speech, so a
+short pause mid-question doesn't trigger an answer.
+"""
+
+import io
+import os
+import re
+import threading
+import av
+import numpy as np
+from services.vad_service import VAD_MIN_SPEECH_MS, detect_speech, encode_wav
+
+SAMPLE_RATE = 16000
+# Timeslices are 250 ms in the desktop app
+PARTIAL_EVERY_FRAMES = 4        # transcribe after ~1s of new audio
+OVERLAP_SECONDS = 0.5           # re-send already transcribed audio
+MAX_BUFFER_SECONDS = 60.0       # cap per utterance
+END_SILENCE_SECONDS = float(os.getenv("STREAM_END_SILENCE", "1.5"))
+
+_WORD_RE = re.compile(r"[^\w']+")
+_WEBM_CLUSTER_ID = b"\x1f\x43\xb6\x75"
+
+
+def _norm(word: str) -> str:
+    return _WORD_RE.sub("", word.lower())
+
+
+def merge_overlap(previous: str, new: str, max_words: int = 12) -> str:
+    """Append `new` to `previous`, dropping words repeated by the window overlap."""
+    prev_words = previous.split()
+    new_words = new.split()
+    if not prev_words:
+        return new.strip()
+    if not new_words:
+        return previous.strip()
+
+    prev_norm = [_norm(w) for w in prev_words]
+    new_norm = [_norm(w) for w in new_words]
+    for size in range(min(max_words, len(prev_words), len(new_words)), 0, -1):
+        if prev_norm[-size:] == new_norm[:size]:
+            new_words = new_words[size:]
+            break
+    return " ".join(prev_words + new_words)
+
+
+def _decode_after(content: bytes, after: float) -> tuple[np.ndarray, float]:
+    """Decode WebM audio stamped at or after `after` seconds to 16 kHz mono.
+
+    Returns (samples, stream time decoded up to).  Input cut off mid-block
+    decodes up to the last whole block."""
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+    chunks = []
+    until = after
+    with av.open(io.BytesIO(content)) as container:
+        for frame in container.decode(audio=0):
+            if frame.time is None or frame.time < after - 0.001:
+                continue
+            chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(frame))
+            until = frame.time + frame.samples / frame.sample_rate
+    chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(None))
+    if not chunks:
+        return np.zeros(0, dtype=np.float32), until
+    return np.concatenate(chunks).astype(np.float32) / 32768, until
+
+
+class AudioStreamSession:
+    """Per-connection audio state for incremental transcription.
+
+    `add_frame` runs on the event loop and `next_window` in a worker thread;
+    the lock covers the byte buffer they share."""
+
+    def __init__(self, filename: str = "stream.wav"):
+        self.filename = filename
+        self.header = b""
+        self.pending = bytearray()  # stream bytes from the last Cluster start on
+        self.decoded_until = 0.0    # stream time (s) already in `samples` or dropped
+        self.samples = np.zeros(0, dtype=np.float32)  # the utterance so far
+        self.transcribed_upto = 0   # index into self.samples
+        self.speech_end = 0         # index into self.samples where the VAD last heard speech
+        self.new_frame_count = 0    # timeslices since the last window
+        self.transcript = ""
+        self.role = ""
+        self.level = ""
+        self.history: list = []
+        self._lock = threading.Lock()
+
+    @property
+    def trailing_silence(self) -> float:
+        """Seconds of audio since the VAD last heard speech in a window."""
+        return (len(self.samples) - self.speech_end) / SAMPLE_RATE
+
+    @property
+    def end_of_speech(self) -> bool:
+        """True once speech was transcribed and followed by END_SILENCE_SECONDS of silence."""
+        return bool(self.transcript) and self.trailing_silence >= END_SILENCE_SECONDS
+
+    def add_frame(self, data: bytes):
+        with self._lock:
+            if not self.header:
+                # The first timeslice carries the WebM header before the first Cluster
+                idx = data.find(_WEBM_CLUSTER_ID)
+                if idx <= 0:
+                    self.header = bytes(data)
+                    return
+                self.header, data = bytes(data[:idx]), data[idx:]
+            self.pending += data
+            self.new_frame_count += 1
+
+    def ready_for_partial(self) -> bool:
+        return self.new_frame_count >= PARTIAL_EVERY_FRAMES
+
+    def _decode_pending(self):
+        with self._lock:
+            content = self.header + bytes(self.pending)
+            size = len(self.pending)
+            self.new_frame_count = 0
+        if size == 0:
+            return
+        samples, until = _decode_after(content, self.decoded_until)
+        self.decoded_until = until
+        self.samples = np.concatenate([self.samples, samples])
+        with self._lock:
+            # Everything before the last Cluster start is decoded; keep the
+            # Cluster itself, its tail may still be arriving
+            cut = self.pending.rfind(_WEBM_CLUSTER_ID, 0, size)
+            if cut > 0:
+                del self.pending[:cut]
+
+        overflow = len(self.samples) - int(MAX_BUFFER_SECONDS * SAMPLE_RATE)
+        if overflow > 0:
+            self._drop(overflow)
+
+    def _drop(self, count: int):
+        """Drop the first `count` samples of the utterance."""
+        self.samples = self.samples[count:]
+        self.transcribed_upto = max(0, self.transcribed_upto - count)
+        self.speech_end = max(0, self.speech_end - count)
+
+    def next_window(self) -> tuple[bytes | None, int]:
+        """Decode new audio; return (WAV of the untranscribed tail plus overlap, end index).
+
+        The WAV is None when there is no new audio or the VAD hears less
+        than VAD_MIN_SPEECH_MS of speech in it; pass the end index to
+        `apply_transcript` regardless."""
+        self._decode_pending()
+        end = len(self.samples)
+        if end <= self.transcribed_upto:
+            return None, end
+        vad = detect_speech(self.samples[self.transcribed_upto:end], SAMPLE_RATE)
+        if vad["speech_ms"]:
+            self.speech_end = self.transcribed_upto + vad["end"]
+        if vad["speech_ms"] < VAD_MIN_SPEECH_MS:
+            return None, end
+        start = max(0, self.transcribed_upto - int(OVERLAP_SECONDS * SAMPLE_RATE))
+        return encode_wav(self.samples[start:end], SAMPLE_RATE), end
+
+    def apply_transcript(self, text: str, end: int) -> bool:
+        """Merge a window's transcript; return True if it added new words."""
+        merged = merge_overlap(self.transcript, text)
+        changed = merged != self.transcript
+        self.transcript = merged
+        self.transcribed_upto = end
+
+        if not self.transcript:
+            # Nobody has spoken yet: keep only the overlap for the next window
+            self._drop(max(0, end - int(OVERLAP_SECONDS * SAMPLE_RATE)))
+        return changed
+
+    def reset_utterance(self):
+        """Clear audio and transcript after an answer; the stream itself carries on."""
+        self.samples = np.zeros(0, dtype=np.float32)
+        self.transcribed_upto = 0
+        self.speech_end = 0
+        self.transcript = ""
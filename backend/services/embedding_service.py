@@ -1,50 +1,98 @@
-"""Lightweight embedding service using scikit-learn TF-IDF.
+"""Lightweight embedding service using scikit-learn.
 
-Uses TF-IDF vectorization for text similarity — fast, zero API cost,
-no heavy model downloads.  Good enough for MVP resume-chunk retrieval.
+Stored embeddings are hashed word and character n-gram projections, and
+query-time ranking uses a per-resume TF-IDF index — fast, zero API cost,
+no model downloads, no GPU.  Good enough for MVP resume-chunk retrieval.
 """
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import hashlib, json
-
-# We'll use a fixed-dimension approach: hash-based embeddings
-# for storage, and TF-IDF for retrieval/similarity at query time.
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+import numpy as np
 
 _EMBED_DIM = 384  # same dimension as MiniLM for schema compatibility
+# Bump if the projection below changes: it is part of the upload content
+# hash (ingest_queue.PIPELINE_VERSION), so re-uploads get new embeddings
+EMBEDDING_MODEL = "hash-ngram-v1"
+
+# Feature hashing with random signs is a sparse random projection: inner
+# products between texts are preserved in expectation, so cosine similarity
+# of these vectors tracks n-gram overlap.  Words carry topic; character
+# n-grams within word boundaries catch inflections ("microservice(s)").
+_word_hasher = HashingVectorizer(
+    n_features=_EMBED_DIM,
+    analyzer="word",
+    ngram_range=(1, 2),
+    stop_words="english",
+    alternate_sign=True,
+    norm=None,
+)
+_char_hasher = HashingVectorizer(
+    n_features=_EMBED_DIM,
+    analyzer="char_wb",
+    ngram_range=(3, 5),
+    alternate_sign=True,
+    norm=None,
+)
+_WORD_WEIGHT = 1.0
+_CHAR_WEIGHT = 0.5
+
 
+def _l2_normalise(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-10)
 
-def _text_to_hash_vector(text: str) -> list[float]:
-    """Create a deterministic pseudo-embedding from text using hashing.
-    This is used purely for storage; real similarity is computed via TF-IDF."""
-    import numpy as np
-    h = hashlib.sha256(text.encode()).hexdigest()
-    # Use hash bytes to seed a random generator for reproducible vector
-    rng = np.random.RandomState(int(h[:8], 16))
-    vec = rng.randn(_EMBED_DIM).astype(float)
-    # Normalise to unit length
-    vec = vec / (np.linalg.norm(vec) + 1e-10)
-    return vec.tolist()
+
+def _project(texts: list[str]) -> np.ndarray:
+    """Embed a batch of texts as an (n, _EMBED_DIM) float32 array of unit rows."""
+    blocks = []
+    for hasher, weight in ((_word_hasher, _WORD_WEIGHT), (_char_hasher, _CHAR_WEIGHT)):
+        counts = hasher.transform(texts)
+        # Sublinear term frequency so repeated words don't dominate
+        counts.data = np.sign(counts.data) * np.log1p(np.abs(counts.data))
+        blocks.append(weight * _l2_normalise(counts.toarray()))
+    return _l2_normalise(blocks[0] + blocks[1]).astype(np.float32)
 
 
 def get_embeddings(texts: list[str]) -> list[list[float]]:
-    """Return pseudo-embeddings for a list of text strings.
-    These are stored in Supabase for future retrieval."""
-    return [_text_to_hash_vector(t) for t in texts]
+    """Return unit-length embeddings for a list of text strings.
+    These are stored in Supabase for nearest-neighbour retrieval."""
+    if not texts:
+        return []
+    return _project(texts).tolist()
 
 
 def get_single_embedding(text: str) -> list[float]:
     """Convenience wrapper for a single string."""
-    return _text_to_hash_vector(text)
+    return _project([text])[0].tolist()
 
 
-def compute_similarity(query: str, chunks: list[str]) -> list[float]:
-    """Compute real TF-IDF cosine similarity between query and chunks.
-    Used at retrieval time for accurate ranking."""
-    if not chunks:
-        return []
-    corpus = [query] + chunks
-    vectorizer = TfidfVectorizer(stop_words="english")
-    tfidf = vectorizer.fit_transform(corpus)
-    sims = cosine_similarity(tfidf[0:1], tfidf[1:]).flatten()
-    return sims.tolist()
+class ResumeIndex:
+    """TF-IDF index over one resume's chunks, fitted once at upload.
+
+    Rows of the sparse matrix are L2-normalised, so a query costs one
+    `transform` plus one sparse dot product instead of refitting the
+    vectorizer over every chunk."""
+
+    def __init__(self, chunks: list[str]):
+        self.chunks = chunks
+        self.vectorizer = TfidfVectorizer(stop_words="english")
+        try:
+            self.matrix = self.vectorizer.fit_transform(chunks)
+        except ValueError:
+            # Empty vocabulary (e.g. only stop words) – nothing to rank on
+            self.matrix = None
+
+    def search(self, query: str, top_k: int = 3) -> list[tuple[float, str]]:
+        """Return up to top_k (score, chunk) pairs, best first."""
+        if not self.chunks:
+            return []
+        if self.matrix is None:
+            return [(0.0, c) for c in self.chunks[:top_k]]
+
+        q = self.vectorizer.transform([query])
+        scores = (self.matrix @ q.T).toarray().ravel()
+        if top_k < len(scores):
+            top = np.argpartition(-scores, top_k)[:top_k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.chunks[i]) for i in top]
@@ -0,0 +1,283 @@
+"""Rate-limit-aware scheduler shared by every Groq call.
+
+Groq enforces requests-per-minute and tokens-per-minute limits per model
+family.  Each call declares an estimated token cost (prompt + max_tokens)
+and a priority; it waits until the token buckets of its limit group can pay
+for it and no higher-priority call in that group is waiting.  Batch work
+additionally leaves LIVE_RESERVE of each bucket for live traffic, so under
+load the live path keeps its latency while batch calls queue.
+
+A 429 pauses the whole group for the server's `retry-after` (or an
+exponential backoff) and the call is retried.  After the response, the
+estimate is corrected with the reported usage; a streamed completion is
+corrected once the stream ends or is closed, with the usage on its last
+chunk or, without one, the completion tokens estimated from its text.
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Callable
+from utils.metrics import GROQ_QUEUE_WAIT_SECONDS, registry
+
+PRIORITY_LIVE = 0   # live answers, speech-to-text
+PRIORITY_BATCH = 1  # question generation, answer evaluation
+
+GROQ_RPM = float(os.getenv("GROQ_RPM", "30"))
+GROQ_TPM = float(os.getenv("GROQ_TPM", "6000"))
+GROQ_AUDIO_RPM = float(os.getenv("GROQ_AUDIO_RPM", "20"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_QUEUE_TIMEOUT = float(os.getenv("GROQ_QUEUE_TIMEOUT", "30"))
+LIVE_RESERVE = 0.2      # share of each bucket batch calls may not use
+RETRY_BACKOFF = 0.5     # seconds, doubled per retry when there is no retry-after
+
+
+class GroqBusyError(Exception):
+    """Raised when a call could not be scheduled within its queue timeout."""
+
+    retry_after = 5  # seconds; sent to clients as the 503's Retry-After
+
+
+def estimate_tokens(prompt: str, max_tokens: int = 0) -> int:
+    """Rough prompt size (~4 characters per token) plus the completion budget."""
+    return len(prompt) // 4 + max_tokens
+
+
+def _chunk_usage(chunk):
+    """Usage on a streamed chunk: OpenAI-style `usage` or Groq's `x_groq.usage`."""
+    return getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+
+
+class ReconciledStream:
+    """A streamed completion that settles its token charge when it ends.
+
+    Iterates the wrapped stream unchanged; `settle(actual_tokens)` runs once,
+    when iteration finishes, fails or the stream is closed."""
+
+    def __init__(self, stream, prompt_tokens: int, settle: Callable[[int], None]):
+        self._stream = stream
+        self._prompt_tokens = prompt_tokens
+        self._settle = settle
+        self._chars = 0
+        self._reported: int | None = None
+        self._settled = False
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                actual = getattr(_chunk_usage(chunk), "total_tokens", None)
+                if isinstance(actual, int):
+                    self._reported = actual
+                for choice in getattr(chunk, "choices", None) or ():
+                    self._chars += len(getattr(choice.delta, "content", None) or "")
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        if self._settled:
+            return
+        self._settled = True
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            used = self._reported
+            if used is None:
+                used = self._prompt_tokens + self._chars // 4
+            self._settle(used)
+
+
+class TokenBucket:
+    """Continuously refilling bucket; `per_minute <= 0` means unlimited."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.level = per_minute
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, reserve: float, now: float) -> float:
+        """Seconds until `amount` can be taken while leaving `reserve` behind."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill(now)
+        # A single call larger than the bucket only waits for a full bucket
+        needed = min(amount + reserve, self.capacity)
+        return max(0.0, (needed - self.level) / self._rate)
+
+    def take(self, amount: float):
+        if self.capacity > 0:
+            self.level -= amount
+
+    def refund(self, amount: float):
+        if self.capacity > 0:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class _Group:
+    def __init__(self, rpm: float, tpm: float):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waiting: list = []  # heap of (priority, seq)
+        self.paused_until = 0.0
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """The `retry-after` of a 429 response, 0.0 if absent, None if not a 429."""
+    if getattr(exc, "status_code", None) != 429:
+        return None
+    response = getattr(exc, "response", None)
+    try:
+        return max(0.0, float(response.headers.get("retry-after", 0)))
+    except (AttributeError, TypeError, ValueError):
+        return 0.0
+
+
+class GroqScheduler:
+    """Admits Groq calls by priority within per-group RPM/TPM budgets."""
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[float, float]] | None = None,
+        max_retries: int = GROQ_MAX_RETRIES,
+        queue_timeout: float = GROQ_QUEUE_TIMEOUT,
+    ):
+        limits = limits or {"chat": (GROQ_RPM, GROQ_TPM), "audio": (GROQ_AUDIO_RPM, 0)}
+        self._groups = {name: _Group(rpm, tpm) for name, (rpm, tpm) in limits.items()}
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.completed = 0
+        self.rate_limited = 0
+        self.timed_out = 0
+        self._admitted = 0
+        self._wait_total = 0.0
+
+    def _acquire(self, group: _Group, priority: int, tokens: int) -> float:
+        """Wait for budget and take it; return the seconds spent waiting."""
+        entry = (priority, next(self._seq))
+        started = time.monotonic()
+        deadline = started + self.queue_timeout
+        with self._cond:
+            heapq.heappush(group.waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = group.paused_until - now
+                    if group.waiting[0] == entry and wait <= 0:
+                        share = LIVE_RESERVE if priority > PRIORITY_LIVE else 0.0
+                        wait = max(
+                            group.requests.wait_time(1, share * group.requests.capacity, now),
+                            group.tokens.wait_time(tokens, share * group.tokens.capacity, now),
+                        )
+                        if wait <= 0:
+                            group.requests.take(1)
+                            group.tokens.take(tokens)
+                            self._admitted += 1
+                            self._wait_total += now - started
+                            return now - started
+                    if now >= deadline or (group.waiting[0] == entry and now + wait > deadline):
+                        self.timed_out += 1
+                        raise GroqBusyError("Groq rate limit queue is full, try again shortly")
+                    # Head of the queue sleeps until its budget refills; the
+                    # rest are woken whenever a call is admitted or finishes
+                    self._cond.wait(min(wait, deadline - now) if wait > 0 else deadline - now)
+            finally:
+                group.waiting.remove(entry)
+                heapq.heapify(group.waiting)
+                self._cond.notify_all()
+
+    def call(
+        self,
+        fn: Callable,
+        *,
+        priority: int = PRIORITY_LIVE,
+        tokens: int = 0,
+        group: str = "chat",
+        stream_max_tokens: int | None = None,
+    ):
+        """Run `fn()` once the group's budget allows, retrying on 429.
+
+        For a streamed completion pass its `max_tokens` as `stream_max_tokens`:
+        the result is returned as a ReconciledStream, which refunds the unused
+        part of `tokens` once the stream is read to the end or closed."""
+        g = self._groups[group]
+        for attempt in range(self.max_retries + 1):
+            waited = self._acquire(g, priority, tokens)
+            GROQ_QUEUE_WAIT_SECONDS.observe(
+                waited, group=group, priority="live" if priority == PRIORITY_LIVE else "batch"
+            )
+            try:
+                result = fn()
+            except Exception as e:
+                retry_after = _retry_after(e)
+                if retry_after is None or attempt == self.max_retries:
+                    raise
+                delay = retry_after or RETRY_BACKOFF * (2 ** attempt)
+                with self._cond:
+                    self.rate_limited += 1
+                    g.paused_until = max(g.paused_until, time.monotonic() + delay)
+                    self._cond.notify_all()
+                continue
+
+            with self._cond:
+                self.completed += 1
+            if stream_max_tokens is not None:
+                return ReconciledStream(
+                    result,
+                    tokens - stream_max_tokens,
+                    lambda actual: self._refund(g, tokens - actual),
+                )
+            actual = getattr(getattr(result, "usage", None), "total_tokens", None)
+            self._refund(g, tokens - actual if isinstance(actual, int) else 0)
+            return result
+
+    def _refund(self, group: _Group, amount: int):
+        """Return over-estimated tokens to the bucket and wake waiting calls."""
+        with self._cond:
+            group.tokens.refund(amount)
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            groups = {}
+            for name, g in self._groups.items():
+                groups[name] = {
+                    "queued_live": sum(1 for p, _ in g.waiting if p == PRIORITY_LIVE),
+                    "queued_batch": sum(1 for p, _ in g.waiting if p != PRIORITY_LIVE),
+                    "paused_s": round(max(0.0, g.paused_until - now), 2),
+                }
+            return {
+                "groups": groups,
+                "completed": self.completed,
+                "rate_limited": self.rate_limited,
+                "timed_out": self.timed_out,
+                "avg_wait_ms": round(self._wait_total / self._admitted * 1000, 1) if self._admitted else 0.0,
+            }
+
+
+    def queue_depths(self) -> dict[tuple, int]:
+        """Calls waiting for budget by (group, priority), for /metrics."""
+        groups = self.stats()["groups"]
+        return {
+            (name, priority): g[f"queued_{priority}"]
+            for name, g in groups.items()
+            for priority in ("live", "batch")
+        }
+
+
+groq_scheduler = GroqScheduler()
+registry.gauge(
+    "groq_queue_depth", "Groq calls waiting for rate-limit budget", ("group", "priority"),
+    groq_scheduler.queue_depths,
+)
@@ -1,9 +1,15 @@
 """Groq LLM service – generates interview questions and evaluates answers."""
 
 import os
-import json
+import time
+from typing import Iterator
 from groq import Groq
 from dotenv import load_dotenv
+from utils.llm_json import parse_llm_json, JSONStreamParser
+from services.resume_profile import LIVE_CONTEXT_TOKENS, CHARS_PER_TOKEN
+from services.groq_scheduler import groq_scheduler, estimate_tokens, PRIORITY_LIVE, PRIORITY_BATCH
+from services.model_router import model_router
+from utils.metrics import LLM_SECONDS, LLM_TOKENS, LLM_TTFT_SECONDS
 
 load_dotenv()
 
@@ -11,8 +17,65 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise Exception("GROQ_API_KEY missing in .env")
 
-client = Groq(api_key=GROQ_API_KEY)
-MODEL = "llama-3.1-8b-instant"
+# Retries and 429 backoff are handled by groq_scheduler
+client = Groq(api_key=GROQ_API_KEY, max_retries=0)
+
+
+def _chat(
+    task: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: int,
+    priority: int,
+    stream: bool = False,
+):
+    """One chat completion, on the model routed for `task`, within the rate limits."""
+    def request(model: str):
+        return groq_scheduler.call(
+            lambda: client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=stream,
+            ),
+            priority=priority,
+            tokens=estimate_tokens(prompt, max_tokens),
+            stream_max_tokens=max_tokens if stream else None,
+        )
+
+    start = time.perf_counter()
+    # A hedged stream that loses the race is closed unread
+    response = model_router.call(task, request, discard=(lambda s: s.close()) if stream else None)
+    if stream:
+        return _metered_stream(task, response, start)
+    LLM_SECONDS.observe(time.perf_counter() - start, task=task)
+    _record_usage(task, getattr(response, "usage", None))
+    return response
+
+
+def _record_usage(task: str, usage):
+    if usage is None:
+        return
+    LLM_TOKENS.inc(usage.prompt_tokens or 0, task=task, kind="prompt")
+    LLM_TOKENS.inc(usage.completion_tokens or 0, task=task, kind="completion")
+
+
+def _metered_stream(task: str, stream, start: float):
+    """Pass chunks through, recording time to first token, total time and
+    the usage Groq reports on the final chunk.  Closing this generator
+    closes the upstream stream, so Groq stops generating."""
+    first_token = True
+    try:
+        for chunk in stream:
+            if first_token and chunk.choices and chunk.choices[0].delta.content:
+                LLM_TTFT_SECONDS.observe(time.perf_counter() - start, task=task)
+                first_token = False
+            _record_usage(task, getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None))
+            yield chunk
+    finally:
+        stream.close()
+        LLM_SECONDS.observe(time.perf_counter() - start, task=task)
 
 
 def generate_interview_questions(
@@ -34,21 +97,15 @@ Target job role: {job_role}
 Return a JSON array of objects with keys "id" (1-indexed int) and "question" (string).
 Return ONLY the JSON array, no markdown fences, no extra text."""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+    response = _chat(
+        "questions",
+        prompt,
         temperature=0.7,
         max_tokens=2048,
+        priority=PRIORITY_BATCH,
     )
 
-    raw = response.choices[0].message.content.strip()
-    # Strip markdown fences
-    if "```json" in raw:
-        raw = raw.split("```json")[1].split("```")[0].strip()
-    elif "```" in raw:
-        raw = raw.split("```")[1].split("```")[0].strip()
-    
-    return json.loads(raw, strict=False)
+    return parse_llm_json(response.choices[0].message.content)
 
 
 def evaluate_answer(
@@ -75,31 +132,29 @@ Evaluate the answer. Return a JSON object with these keys:
 
 Return ONLY the JSON object, no markdown fences, no extra text."""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+    response = _chat(
+        "evaluation",
+        prompt,
         temperature=0.4,
         max_tokens=1024,
+        priority=PRIORITY_BATCH,
     )
 
-    raw = response.choices[0].message.content.strip()
-    # Strip markdown fences
-    if "```json" in raw:
-        raw = raw.split("```json")[1].split("```")[0].strip()
-    elif "```" in raw:
-        raw = raw.split("```")[1].split("```")[0].strip()
-    
-    return json.loads(raw, strict=False)
+    return parse_llm_json(response.choices[0].message.content)
 
 
-def generate_live_answer(
-    question: str,
+def build_live_answer_prefix(
     resume_context: str,
     job_role: str = "",
     level: str = "",
     history: list = None,
-) -> dict:
-    """Generate a real-time answer with session memory and auto level detection."""
+) -> str:
+    """Assemble the question-independent start of the live-answer prompt.
+
+    `resume_context` is expected to be the budgeted profile + chunks from
+    `rag_service.build_live_context`; anything longer is cut to the budget.
+    Callers that fetch the resume while the question is still being
+    transcribed can build this ahead of time and pass it as `prompt_prefix`."""
     role_hint = f"\nTarget Role: {job_role}" if job_role else ""
     level_hint = f"\nCandidate-specified level: {level}" if level else ""
 
@@ -113,17 +168,19 @@ def generate_live_answer(
             a = turn.get("answer", "")
             history_block += f"Q{i}: {q}\nA{i}: {a}\n\n"
 
-    prompt = f"""You are a stealthy, highly technical AI assistant secretly helping a candidate during a live interview.
+    return f"""You are a stealthy, highly technical AI assistant secretly helping a candidate during a live interview.
 Your absolute only purpose is to provide direct, factual, technical answers to interview questions and Provide the PERFECT instantaneous answer to the current question, considering the entire conversation flow.
 {role_hint}{level_hint}
 
 Resume:
 \"\"\"
-{resume_context[:1000]}
+{resume_context[:LIVE_CONTEXT_TOKENS * CHARS_PER_TOKEN]}
 \"\"\"
 {history_block}
-CURRENT QUESTION/AUDIO FRAGMENT: {question}
+"""
 
+
+_LIVE_ANSWER_INSTRUCTIONS = """
 ---
 CRITICAL INSTRUCTIONS FOR LIVE DICTATION:
 1. **IGNORE HALLUCINATIONS**: Speech-to-text engines often hallucinate during silence. If the input is conversational filler (e.g., "Well, I'm ready", "I'm listening", "Thank you", "Hello", "How are you"), you MUST return an empty string for the answer. Do NOT reply conversationally.
@@ -133,27 +190,111 @@ CRITICAL INSTRUCTIONS FOR LIVE DICTATION:
 5. **No Hallucinated Experience**: Do NOT make up stories unless explicitly stated in the Resume.
 
 OUTPUT FORMAT (JSON ONLY):
-{{
+{
   "answer": "Direct technical answer, no greeting or conversational filler. (Or empty string if hallucination)",
   "key_points": ["Technical point 1", "Technical point 2"],
   "tip": "Short delivery advice",
   "code": "Code snippet. You MUST format this as a single valid JSON string. Escape all internal double quotes as \\\" and escape all actual newlines as \\n. Failure to perfectly escape quotes and newlines will crash the JSON parser.",
   "code_language": "python/js/etc",
   "detected_level": "easy/medium/hard"
-}}"""
+}"""
+
+
+def _build_live_answer_prompt(
+    question: str,
+    resume_context: str,
+    job_role: str = "",
+    level: str = "",
+    history: list = None,
+    prompt_prefix: str | None = None,
+) -> str:
+    """Assemble the live-answer prompt shared by the blocking and streaming calls."""
+    if prompt_prefix is None:
+        prompt_prefix = build_live_answer_prefix(resume_context, job_role, level, history)
+    return f"{prompt_prefix}CURRENT QUESTION/AUDIO FRAGMENT: {question}\n{_LIVE_ANSWER_INSTRUCTIONS}"
+
+
+def generate_live_answer(
+    question: str,
+    resume_context: str,
+    job_role: str = "",
+    level: str = "",
+    history: list = None,
+    prompt_prefix: str | None = None,
+) -> dict:
+    """Generate a real-time answer with session memory and auto level detection."""
+    prompt = _build_live_answer_prompt(question, resume_context, job_role, level, history, prompt_prefix)
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+    response = _chat(
+        "live",
+        prompt,
         temperature=0.3, # Low temp for factual consistency
         max_tokens=512, # Drastically reduced from 2048 to prevent 6k TPM Rate Limit
+        priority=PRIORITY_LIVE,
     )
 
-    raw = response.choices[0].message.content.strip()
-    # Strip markdown fences
-    if "```json" in raw:
-        raw = raw.split("```json")[1].split("```")[0].strip()
-    elif "```" in raw:
-        raw = raw.split("```")[1].split("```")[0].strip()
-    
-    return json.loads(raw, strict=False)
+    return parse_llm_json(response.choices[0].message.content)
+
+
+def stream_live_answer(
+    question: str,
+    resume_context: str,
+    job_role: str = "",
+    level: str = "",
+    history: list = None,
+    prompt_prefix: str | None = None,
+) -> Iterator[tuple[str, dict]]:
+    """Stream a live answer as (event, data) pairs while tokens arrive.
+
+    Events:
+      "answer" – {"delta": str} for each new piece of the answer text
+      "field"  – {"key": str, "value": Any} once any other field is parsed
+      "done"   – the complete result, same shape as `generate_live_answer`
+    """
+    prompt = _build_live_answer_prompt(question, resume_context, job_role, level, history, prompt_prefix)
+
+    stream = _chat(
+        "live_stream",
+        prompt,
+        temperature=0.3,
+        max_tokens=512,
+        priority=PRIORITY_LIVE,
+        stream=True,
+    )
+
+    parser = JSONStreamParser()
+
+    def parsed_events():
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            text = chunk.choices[0].delta.content
+            if text:
+                yield from parser.feed(text)
+        yield from parser.finish()
+
+    try:
+        for kind, key, value in parsed_events():
+            if kind == "delta" and key == "answer":
+                yield "answer", {"delta": value}
+            elif kind == "field" and key != "answer":
+                yield "field", {"key": key, "value": value}
+    finally:
+        # Also when the consumer closes this generator early
+        stream.close()
+
+    try:
+        result = parse_llm_json(parser.buffer)
+    except ValueError:
+        # Fall back to whatever fields were parsed before the stream ended
+        result = dict(parser.fields)
+    yield "done", result
+
+
+def replay_live_answer(result: dict) -> Iterator[tuple[str, dict]]:
+    """Emit a finished result as the same events `stream_live_answer` produces."""
+    yield "answer", {"delta": result.get("answer", "")}
+    for key, value in result.items():
+        if key not in ("answer", "cached"):
+            yield "field", {"key": key, "value": value}
+    yield "done", result
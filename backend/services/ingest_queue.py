@@ -0,0 +1,303 @@
+"""Background resume ingestion.
+
+`/resume/upload` spools the PDF to disk, submits a job and returns 202; a
+bounded pool of worker threads parses, chunks, embeds and stores it while
+`/resume/status?job_id=` reports the job's stage, progress and per-stage
+timings.  Jobs run with the JWT of the user who uploaded, so RLS applies.
+
+  - The queue is bounded; when it is full `submit` raises IngestQueueFull
+    and the route answers 503 instead of piling up PDFs on disk.
+  - `close()` (called on app shutdown) lets the workers drain the queue for
+    up to INGEST_DRAIN_TIMEOUT, then journals whatever is still queued;
+    `start()` re-queues journaled jobs, so an upload accepted before a
+    graceful restart still completes.  The journal holds the user id and
+    upload metadata but never the JWT; a replayed job stores the resume
+    through a service-role client (SUPABASE_SERVICE_ROLE_KEY), scoped to
+    the journaled user id.
+"""
+
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from db.supabase_client import get_db_client, get_service_db_client
+from services.embedding_service import EMBEDDING_MODEL, get_embeddings
+from services.rag_service import build_resume_index, replace_resume
+from services.resume_profile import build_resume_profile
+from utils.cache import TTLCache
+from utils.pdf_parser import (
+    CHUNK_MAX_TOKENS,
+    CHUNKER_VERSION,
+    PDFLimitError,
+    chunk_resume,
+    extract_text_from_pdf_file,
+)
+
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "100"))
+INGEST_DRAIN_TIMEOUT = float(os.getenv("INGEST_DRAIN_TIMEOUT", "20"))
+INGEST_JOB_TTL = float(os.getenv("INGEST_JOB_TTL", "3600"))
+INGEST_JOURNAL = os.getenv(
+    "INGEST_JOURNAL", os.path.join(tempfile.gettempdir(), "desierai-ingest-journal.json")
+)
+
+STAGES = ("parse", "chunk", "embed", "store", "index")
+# Part of every upload's content hash, so a PDF uploaded again after the
+# pipeline changes is processed again instead of matching the old rows
+PIPELINE_VERSION = f"{CHUNKER_VERSION}:{CHUNK_MAX_TOKENS}:{EMBEDDING_MODEL}"
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueueFull(Exception):
+    """Every worker is busy and the queue is at INGEST_QUEUE_SIZE."""
+
+
+class IngestJob:
+    """One uploaded PDF on its way into resumes / resume_embeddings."""
+
+    def __init__(
+        self, token: str | None, user_id: str, title: str, path: str, content_hash: str, job_id: str | None = None,
+    ):
+        self.id = job_id or uuid.uuid4().hex
+        self.token = token  # None for a job replayed from the journal
+        self.user_id = user_id
+        self.title = title
+        self.path = path
+        self.content_hash = content_hash
+        self.state = "queued"  # queued | running | done | failed
+        self.stage: str | None = None
+        self.timings: dict[str, float] = {}
+        self.resume_id: str | None = None
+        self.chunk_count = 0
+        self.error: str | None = None
+        self.submitted_at = time.monotonic()
+
+    @property
+    def progress(self) -> float:
+        if self.state == "done":
+            return 1.0
+        finished = sum(1 for stage in STAGES if f"{stage}_ms" in self.timings)
+        return round(finished / len(STAGES), 2)
+
+    def status(self) -> dict:
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "stage": self.stage,
+            "progress": self.progress,
+            "timings": dict(self.timings),
+            "resume_id": self.resume_id,
+            "chunk_count": self.chunk_count,
+            "error": self.error,
+        }
+
+    def to_journal(self) -> dict:
+        return {
+            "job_id": self.id,
+            "user_id": self.user_id,
+            "title": self.title,
+            "path": self.path,
+            "content_hash": self.content_hash,
+        }
+
+
+class IngestQueue:
+    """Runs IngestJobs on a fixed pool of background threads."""
+
+    def __init__(
+        self,
+        client_factory=get_db_client,
+        service_client_factory=get_service_db_client,
+        workers: int = INGEST_WORKERS,
+        maxsize: int = INGEST_QUEUE_SIZE,
+        journal_path: str = INGEST_JOURNAL,
+        job_ttl: float = INGEST_JOB_TTL,
+    ):
+        self.client_factory = client_factory
+        self.service_client_factory = service_client_factory
+        self.workers = workers
+        self.journal_path = journal_path
+        self.completed = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._jobs = TTLCache(maxsize=max(1024, maxsize * 4), ttl=job_ttl)
+        self._latest = TTLCache(maxsize=max(1024, maxsize * 4), ttl=job_ttl)  # user_id -> job_id
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._abandon = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self._abandon.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"resume-ingest-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+        self._load_journal()
+
+    def submit(self, token: str, user_id: str, title: str, path: str, content_hash: str) -> IngestJob:
+        """Queue a spooled PDF; the job owns (and deletes) `path` from here on."""
+        self.start()
+        job = IngestJob(token, user_id, title, path, content_hash)
+        self._enqueue(job)
+        return job
+
+    def _enqueue(self, job: IngestJob):
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise IngestQueueFull("Resume processing is busy, please retry shortly")
+        self._jobs.set(job.id, job)
+        self._latest.set(job.user_id, job.id)
+
+    def get(self, job_id: str) -> IngestJob | None:
+        return self._jobs.get(job_id)
+
+    def latest_for(self, user_id: str) -> IngestJob | None:
+        job_id = self._latest.get(user_id)
+        return self._jobs.get(job_id) if job_id else None
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            if self._abandon.is_set():
+                return
+            try:
+                job = self._queue.get(timeout=0.25)
+            except queue.Empty:
+                continue
+            try:
+                self._process(job)
+            finally:
+                self._queue.task_done()
+
+    def _stage(self, job: IngestJob, stage: str, fn, *args):
+        job.stage = stage
+        start = time.perf_counter()
+        result = fn(*args)
+        job.timings[f"{stage}_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    def _process(self, job: IngestJob):
+        job.state = "running"
+        job.timings["queued_ms"] = round((time.monotonic() - job.submitted_at) * 1000, 1)
+        try:
+            try:
+                text = self._stage(job, "parse", extract_text_from_pdf_file, job.path)
+            except PDFLimitError:
+                raise
+            except Exception as e:
+                raise ValueError(f"Could not read PDF: {str(e)}")
+            if not text.strip():
+                raise ValueError("Could not extract text from PDF. Is it scanned/image-only?")
+
+            chunks = self._stage(job, "chunk", chunk_resume, text)
+            texts = [c["text"] for c in chunks]
+            embeddings = self._stage(job, "embed", get_embeddings, texts)
+            job.resume_id = self._stage(job, "store", self._store, job, text, chunks, embeddings)
+            # Fit the retrieval index now so the first question doesn't pay for it
+            self._stage(job, "index", build_resume_index, job.resume_id, texts)
+
+            job.chunk_count = len(chunks)
+            job.state = "done"
+            self.completed += 1
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            self.failed += 1
+            logger.error(f"Resume ingestion {job.id} failed at {job.stage}: {str(e)}")
+        finally:
+            job.stage = None
+            job.token = ""
+            try:
+                os.unlink(job.path)
+            except OSError:
+                pass
+
+    def _store(self, job: IngestJob, text: str, chunks: list[dict], embeddings: list) -> str:
+        # A replayed job's user session is gone; it stores as the service role
+        db = self.service_client_factory() if job.token is None else self.client_factory(job.token)
+        return replace_resume(
+            db, job.user_id, job.title, text,
+            build_resume_profile(text), job.content_hash, chunks, embeddings,
+        )
+
+    def _load_journal(self):
+        try:
+            fd = os.open(self.journal_path, os.O_RDONLY | os.O_NOFOLLOW)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error(f"Could not read resume ingestion journal: {str(e)}")
+            return
+        try:
+            with os.fdopen(fd) as f:
+                info = os.fstat(f.fileno())
+                # Replayed jobs write as the service role: only trust our own journal
+                if info.st_uid != os.getuid() or info.st_mode & 0o022:
+                    raise PermissionError("journal is not owned by this user or is writable by others")
+                entries = json.load(f)
+            os.unlink(self.journal_path)
+        except Exception as e:
+            logger.error(f"Could not read resume ingestion journal: {str(e)}")
+            return
+        for entry in entries:
+            if not os.path.exists(entry["path"]):
+                continue
+            try:
+                self._enqueue(IngestJob(
+                    None, entry["user_id"], entry["title"],
+                    entry["path"], entry["content_hash"], job_id=entry["job_id"],
+                ))
+            except IngestQueueFull:
+                logger.error(f"Dropping journaled resume ingestion {entry['job_id']}: queue full")
+                os.unlink(entry["path"])
+        if entries:
+            logger.info(f"Re-queued {len(entries)} journaled resume ingestion jobs")
+
+    def close(self, timeout: float = INGEST_DRAIN_TIMEOUT):
+        """Drain the queue for up to `timeout`, then journal what is left."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        # Workers finish the job in hand but take no new ones
+        self._abandon.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait().to_journal())
+            except queue.Empty:
+                break
+            self._queue.task_done()
+        if leftover:
+            # Owner-only and never through a symlink: replaying it writes resumes
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(leftover, f)
+            logger.info(f"Journaled {len(leftover)} queued resume ingestion jobs")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+ingest_queue = IngestQueue()
@@ -0,0 +1,149 @@
+"""Write-behind persistence for interview_messages.
+
+Routes enqueue message rows and return immediately; a background thread
+groups queued rows into bulk inserts.  Rows are written with the JWT of the
+user who produced them so RLS still applies.
+
+  - The queue is bounded; when it is full the caller writes synchronously
+    instead of dropping messages.
+  - Failed batches are retried with exponential backoff.
+  - `close()` (called on app shutdown) drains whatever is still queued.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from db.supabase_client import get_db_client
+
+MESSAGE_QUEUE_SIZE = int(os.getenv("MESSAGE_QUEUE_SIZE", "10000"))
+MESSAGE_BATCH_SIZE = int(os.getenv("MESSAGE_BATCH_SIZE", "100"))
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL", "0.25"))
+MESSAGE_MAX_RETRIES = 3
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriter:
+    """Batches interview_messages inserts on a background thread."""
+
+    def __init__(
+        self,
+        client_factory=get_db_client,
+        maxsize: int = MESSAGE_QUEUE_SIZE,
+        batch_size: int = MESSAGE_BATCH_SIZE,
+        flush_interval: float = MESSAGE_FLUSH_INTERVAL,
+        max_retries: int = MESSAGE_MAX_RETRIES,
+        retry_backoff: float = 0.5,
+    ):
+        self.client_factory = client_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.written = 0
+        self.failed = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._last_ts = datetime.now(timezone.utc)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+            self._thread.start()
+
+    def _timestamp(self) -> str:
+        """Strictly increasing created_at so queued rows keep their order."""
+        with self._lock:
+            ts = datetime.now(timezone.utc)
+            if ts <= self._last_ts:
+                ts = self._last_ts + timedelta(microseconds=1)
+            self._last_ts = ts
+            return ts.isoformat()
+
+    def enqueue(self, token: str, session_id: str, sender: str, message: str):
+        """Queue one message row for insertion."""
+        row = {
+            "session_id": session_id,
+            "sender": sender,
+            "message": message,
+            "created_at": self._timestamp(),
+        }
+        self.start()
+        try:
+            self._queue.put_nowait((token, row))
+        except queue.Full:
+            # Back-pressure: write on the caller's thread rather than lose it
+            self._write(token, [row])
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                # Once stopping, take what is already queued without waiting
+                remaining = 0 if self._stop.is_set() else max(0.0, deadline - time.monotonic())
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch: list[tuple[str, dict]]):
+        by_token: dict[str, list[dict]] = {}
+        for token, row in batch:
+            by_token.setdefault(token, []).append(row)
+        for token, rows in by_token.items():
+            self._write(token, rows)
+        for _ in batch:
+            self._queue.task_done()
+
+    def _write(self, token: str, rows: list[dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client_factory(token).table("interview_messages").insert(rows).execute()
+                self.written += len(rows)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(rows)
+                    logger.error(f"Dropping {len(rows)} interview messages after retries: {str(e)}")
+                    return
+                time.sleep(self.retry_backoff * (2 ** attempt))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until everything queued so far is written (or timeout)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """Stop the worker after draining the queue."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+
+message_writer = MessageWriter()
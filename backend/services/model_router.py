@@ -0,0 +1,176 @@
+"""Per-task model routing with hedged requests and fallback.
+
+Each task (live answer, question generation, evaluation) has a primary and
+a fallback model, configured through the environment.  Latency is tracked
+per (task, model) over a sliding window.  For live tasks, a request still
+running after the primary's p95 gets a hedged duplicate on the fallback
+model and whichever finishes first wins; for every task, a failed primary
+call is retried once on the fallback.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, TypeVar
+import numpy as np
+from services.groq_scheduler import GroqBusyError
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+FALLBACK_MODEL = os.getenv("GROQ_FALLBACK_MODEL", "llama-3.3-70b-versatile")
+
+ROUTES = {
+    # task: (primary, fallback, hedge)
+    "live": (os.getenv("GROQ_MODEL_LIVE", DEFAULT_MODEL), FALLBACK_MODEL, True),
+    "live_stream": (os.getenv("GROQ_MODEL_LIVE", DEFAULT_MODEL), FALLBACK_MODEL, True),
+    "questions": (os.getenv("GROQ_MODEL_QUESTIONS", DEFAULT_MODEL), FALLBACK_MODEL, False),
+    "evaluation": (os.getenv("GROQ_MODEL_EVALUATION", DEFAULT_MODEL), FALLBACK_MODEL, False),
+}
+
+HEDGE_AFTER = float(os.getenv("ROUTER_HEDGE_AFTER", "2.0"))  # until enough samples for a p95
+HEDGE_MIN_DELAY = 0.3
+HEDGE_MAX_DELAY = 10.0
+LATENCY_WINDOW = 200
+MIN_SAMPLES = 20
+# Each request thread (main.BLOCKING_THREADS) may have a primary and a hedge in flight
+ROUTER_WORKERS = int(os.getenv("ROUTER_WORKERS", str(2 * int(os.getenv("BLOCKING_THREADS", "100")))))
+
+
+class LatencyTracker:
+    """Sliding window of call durations for one (task, model)."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples: deque = deque(maxlen=window)
+        self.errors = 0
+
+    def percentile(self, p: float) -> float | None:
+        if not self.samples:
+            return None
+        return float(np.percentile(self.samples, p))
+
+    def stats(self) -> dict:
+        pct = {f"p{p}_ms": round(v * 1000, 1) for p in (50, 95, 99) if (v := self.percentile(p)) is not None}
+        return {"count": len(self.samples), "errors": self.errors, **pct}
+
+
+class ModelRouter:
+    """Runs a request function against the model chosen for its task."""
+
+    def __init__(self, routes: dict = ROUTES, hedge_after: float = HEDGE_AFTER, workers: int = ROUTER_WORKERS):
+        self.routes = routes
+        self.hedge_after = hedge_after
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="groq-hedge")
+        self._trackers: dict[tuple, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+
+    def model_for(self, task: str) -> str:
+        return self.routes[task][0]
+
+    def _tracker(self, task: str, model: str) -> LatencyTracker:
+        with self._lock:
+            return self._trackers.setdefault((task, model), LatencyTracker())
+
+    def hedge_delay(self, task: str) -> float:
+        """The primary's p95, or HEDGE_AFTER until there are enough samples."""
+        tracker = self._tracker(task, self.model_for(task))
+        if len(tracker.samples) < MIN_SAMPLES:
+            return self.hedge_after
+        return min(HEDGE_MAX_DELAY, max(HEDGE_MIN_DELAY, tracker.percentile(95)))
+
+    def _timed(self, task: str, model: str, request: Callable[[str], T]) -> T:
+        tracker = self._tracker(task, model)
+        start = time.perf_counter()
+        try:
+            result = request(model)
+        except Exception:
+            with self._lock:
+                tracker.errors += 1
+            raise
+        with self._lock:
+            tracker.samples.append(time.perf_counter() - start)
+        return result
+
+    def _fallback(self, task: str, model: str, fallback: str, request: Callable[[str], T], error: Exception) -> T:
+        # A full scheduler queue applies to every model; don't pile on
+        if isinstance(error, GroqBusyError) or not fallback or fallback == model:
+            raise error
+        with self._lock:
+            self.fallbacks += 1
+        logger.warning(f"Model {model} failed for {task}, falling back to {fallback}: {str(error)}")
+        return self._timed(task, fallback, request)
+
+    def call(self, task: str, request: Callable[[str], T], discard: Callable[[T], None] | None = None) -> T:
+        """Return `request(model)` for the task's model, hedging or falling back.
+
+        `discard` is called with the result of a hedged request that lost the
+        race (e.g. to close a stream)."""
+        model, fallback, hedge = self.routes[task]
+        if not hedge:
+            try:
+                return self._timed(task, model, request)
+            except Exception as e:
+                return self._fallback(task, model, fallback, request, e)
+
+        # The hedge clock starts when the primary does, not while it queues
+        # for a worker: a queued request isn't slow upstream
+        started = threading.Event()
+
+        def run_primary() -> T:
+            started.set()
+            return self._timed(task, model, request)
+
+        primary = self._executor.submit(run_primary)
+        started.wait()
+        done, _ = wait([primary], timeout=self.hedge_delay(task))
+        if done:
+            try:
+                return primary.result()
+            except Exception as e:
+                return self._fallback(task, model, fallback, request, e)
+
+        # Primary is slower than its p95: race a duplicate on the fallback model
+        hedge_model = fallback or model
+        hedged = self._executor.submit(self._timed, task, hedge_model, request)
+        with self._lock:
+            self.hedges += 1
+
+        pending = {primary, hedged}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                for loser in pending:
+                    if discard is not None:
+                        loser.add_done_callback(lambda f: f.exception() is None and discard(f.result()))
+                    else:
+                        loser.cancel()
+                if future is hedged:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return future.result()
+        raise error
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = {f"{task}:{model}": t.stats() for (task, model), t in self._trackers.items()}
+            return {
+                "models": models,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "fallbacks": self.fallbacks,
+            }
+
+
+model_router = ModelRouter()
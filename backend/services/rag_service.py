@@ -1,109 +1,217 @@
 """RAG service – store and retrieve resume data via Supabase.
 
+Every function takes `db`, the request-scoped PostgREST client from
+`utils.auth_dependency.get_db`, so queries run under the caller's RLS.
+
 Tables used:
-  - resumes (id, user_id, title, file_url, parsed_text, created_at)
-  - resume_embeddings (id, resume_id, content_chunk, embedding[vector], created_at)
+  - resumes (id, user_id, title, file_url, parsed_text, profile,
+             content_hash, chunk_count, created_at)
+  - resume_embeddings (id, resume_id, content_chunk, section, start_offset,
+                       end_offset, embedding[vector], created_at)
+
+RPCs used:
+  - match_resume_chunks (db/sql/match_resume_chunks.sql)
+  - replace_resume (db/sql/replace_resume.sql)
+
+Migrations, all required before deploying: resume lookups select the new
+resumes columns and uploads go through the replace_resume RPC.
+  - resumes.profile (db/sql/resume_profile.sql)
+  - resume_embeddings.section / start_offset / end_offset
+    (db/sql/resume_chunk_sections.sql)
+  - resumes.content_hash / chunk_count and replace_resume
+    (db/sql/replace_resume.sql)
 """
 
 import json
-from db.supabase_client import supabase
+import os
+from db.vector_store import SupabaseVectorStore
+from utils.cache import TTLCache
+from utils.metrics import RETRIEVAL_SECONDS, registry
+from services.embedding_service import ResumeIndex, get_single_embedding
+from services.resume_profile import build_resume_profile, compose_live_context
+
+# "index": rank with the in-memory TF-IDF index (default).
+# "vector": rank inside Postgres via the match_resume_chunks pgvector RPC.
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "index")
+# Builds the vector store for a request's client (tests swap in SQLite)
+vector_store_factory = SupabaseVectorStore
+
+# Latest resume per user_id. Resumes change only on upload, which
+# invalidates the entry, so the TTL just bounds staleness across workers.
+_resume_cache = TTLCache(
+    maxsize=int(os.getenv("RESUME_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("RESUME_CACHE_TTL", "600")),
+)
+
+# Fitted retrieval index per resume_id. Built at upload; rebuilt from the
+# stored chunks on a miss (restart, another worker, eviction).
+_index_cache = TTLCache(
+    maxsize=int(os.getenv("RETRIEVAL_INDEX_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("RETRIEVAL_INDEX_CACHE_TTL", "3600")),
+)
+
+registry.register_cache("resume", _resume_cache.stats)
+registry.register_cache("retrieval_index", _index_cache.stats)
 
 
 # ── Resumes table ───────────────────────────────
 
-def create_resume_record(user_id: str, title: str, parsed_text: str) -> str:
-    """Create a resume record and return its id."""
-    # Delete previous resumes for this user (keep latest only)
-    old = (
-        supabase.table("resumes")
-        .select("id")
-        .eq("user_id", user_id)
-        .execute()
-    )
-    if old.data:
-        for row in old.data:
-            supabase.table("resume_embeddings").delete().eq("resume_id", row["id"]).execute()
-            supabase.table("resumes").delete().eq("id", row["id"]).execute()
-
-    result = (
-        supabase.table("resumes")
-        .insert({
-            "user_id": user_id,
-            "title": title,
-            "parsed_text": parsed_text,
-        })
-        .execute()
-    )
-    return result.data[0]["id"]
+def replace_resume(
+    db,
+    user_id: str,
+    title: str,
+    parsed_text: str,
+    profile: str | None,
+    content_hash: str,
+    chunks: list[dict],
+    embeddings: list[list[float]],
+) -> str:
+    """Swap the user's resume and chunks for new ones, returning the new id.
 
+    One transactional `replace_resume` RPC (db/sql/replace_resume.sql)."""
+    _resume_cache.invalidate(user_id)
+    result = db.rpc(
+        "replace_resume",
+        {
+            "p_user_id": user_id,
+            "p_title": title,
+            "p_parsed_text": parsed_text,
+            "p_profile": profile,
+            "p_content_hash": content_hash,
+            "p_chunks": _chunk_rows(chunks, embeddings),
+        },
+    ).execute()
+    # Drop anything cached while the old rows were being replaced
+    _resume_cache.invalidate(user_id)
+    return result.data
+
+
+def find_duplicate_resume(db, user_id: str, content_hash: str) -> dict | None:
+    """The user's current resume if it was uploaded from the same bytes."""
+    resume = get_user_resume(db, user_id)
+    if resume and resume.get("content_hash") == content_hash:
+        return resume
+    return None
+
+
+def get_user_resume(db, user_id: str) -> dict | None:
+    """Get the current user's resume record, or None (cached per user)."""
+    cached = _resume_cache.get(user_id)
+    if cached is not None:
+        return cached
 
-def get_user_resume(user_id: str) -> dict | None:
-    """Get the current user's resume record, or None."""
     result = (
-        supabase.table("resumes")
-        .select("id, title, parsed_text")
+        db.table("resumes")
+        .select("id, title, parsed_text, profile, content_hash, chunk_count")
         .eq("user_id", user_id)
         .order("created_at", desc=True)
         .limit(1)
         .execute()
     )
-    return result.data[0] if result.data else None
+    if not result.data:
+        return None
+    _resume_cache.set(user_id, result.data[0])
+    return result.data[0]
+
+
+def get_resume_profile(db, user_id: str) -> str:
+    """Return the stored resume profile, building it for rows uploaded before
+    the profile column existed (memoised on the cached row)."""
+    resume = get_user_resume(db, user_id)
+    if not resume:
+        return ""
+    if not resume.get("profile"):
+        resume["profile"] = build_resume_profile(resume.get("parsed_text") or "")
+    return resume["profile"]
+
+
+def resume_cache_stats() -> dict:
+    """Hit/miss counters for the per-user resume cache."""
+    return _resume_cache.stats()
 
 
 # ── Resume Embeddings table ─────────────────────
 
-def store_resume_embeddings(
-    resume_id: str,
-    chunks: list[str],
-    embeddings: list[list[float]],
-) -> int:
-    """Store resume text chunks and their embeddings."""
-    rows = [
+def _chunk_rows(chunks: list[dict], embeddings: list[list[float]]) -> list[dict]:
+    return [
         {
-            "resume_id": resume_id,
-            "content_chunk": chunk,
+            "content_chunk": chunk["text"],
+            "section": chunk["section"],
+            "start_offset": chunk["start"],
+            "end_offset": chunk["end"],
             "embedding": json.dumps(emb),  # vector type accepts JSON string
         }
         for chunk, emb in zip(chunks, embeddings)
     ]
 
-    # Insert in batches of 50
-    batch_size = 50
-    for i in range(0, len(rows), batch_size):
-        supabase.table("resume_embeddings").insert(rows[i : i + batch_size]).execute()
 
-    return len(rows)
+def build_resume_index(resume_id: str, chunks: list[str]) -> ResumeIndex:
+    """Fit and cache the retrieval index for a resume's chunks."""
+    index = ResumeIndex(chunks)
+    _index_cache.set(resume_id, index)
+    return index
 
 
-def retrieve_relevant_chunks(
-    resume_id: str,
-    query: str,
-    top_k: int = 3,
-) -> list[str]:
-    """Find the top-k most relevant resume chunks using TF-IDF similarity."""
-    from services.embedding_service import compute_similarity
+def get_resume_index(db, resume_id: str) -> ResumeIndex | None:
+    """Return the cached index, loading the chunks from Supabase on a miss."""
+    index = _index_cache.get(resume_id)
+    if index is not None:
+        return index
 
     response = (
-        supabase.table("resume_embeddings")
+        db.table("resume_embeddings")
         .select("content_chunk")
         .eq("resume_id", resume_id)
         .execute()
     )
 
     if not response.data:
-        return []
+        return None
 
     chunks = [row["content_chunk"] for row in response.data]
-    sims = compute_similarity(query, chunks)
+    return build_resume_index(resume_id, chunks)
 
-    # Pair, sort, return top-k
-    scored = sorted(zip(sims, chunks), key=lambda x: x[0], reverse=True)
-    return [text for _, text in scored[:top_k]]
+
+def retrieve_relevant_chunks(
+    db,
+    resume_id: str,
+    query: str,
+    top_k: int = 3,
+) -> list[str]:
+    """Find the top-k most relevant resume chunks.
+
+    Uses the TF-IDF index, or the database-side vector search when
+    RETRIEVAL_MODE is "vector"."""
+    with RETRIEVAL_SECONDS.time(mode=RETRIEVAL_MODE):
+        if RETRIEVAL_MODE == "vector":
+            matches = vector_store_factory(db).match(resume_id, get_single_embedding(query), top_k)
+            return [text for _, text in matches]
+
+        index = get_resume_index(db, resume_id)
+        if index is None:
+            return []
+        return [text for _, text in index.search(query, top_k)]
 
 
-def get_full_resume_text(user_id: str) -> tuple[str, str | None]:
+def get_full_resume_text(db, user_id: str) -> tuple[str, str | None]:
     """Return (parsed_text, resume_id) for the user's latest resume."""
-    resume = get_user_resume(user_id)
+    resume = get_user_resume(db, user_id)
     if not resume:
         return "", None
     return resume.get("parsed_text", ""), resume["id"]
+
+
+def build_live_context(db, user_id: str, resume_id: str, question: str) -> str:
+    """Resume context for a live answer: the profile plus the chunks most
+    relevant to `question`, within LIVE_CONTEXT_TOKENS."""
+    profile = get_resume_profile(db, user_id)
+    chunks = retrieve_relevant_chunks(db, resume_id, question, top_k=3)
+    return compose_live_context(profile, chunks)
+
+
+def warm_live_context(db, user_id: str, resume_id: str):
+    """Load the profile and retrieval index ahead of `build_live_context`,
+    so the question-time call needs no database round trip."""
+    get_resume_profile(db, user_id)
+    if RETRIEVAL_MODE != "vector":
+        get_resume_index(db, resume_id)
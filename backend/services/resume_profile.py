@@ -0,0 +1,115 @@
+"""Compact resume profile used as the live-answer prompt's resume context.
+
+The profile is built once at upload from the parsed text: skills, roles,
+projects, measurable impact and education, one line each.  At answer time it
+is combined with the chunks retrieved for the question, trimmed to a fixed
+token budget, instead of sending the first 1000 characters of the resume.
+"""
+
+import os
+import re
+from utils.pdf_parser import split_sections
+
+PROFILE_MAX_CHARS = 1200
+# Resume context budget for live answers (~4 characters per token)
+LIVE_CONTEXT_TOKENS = int(os.getenv("LIVE_CONTEXT_TOKENS", "350"))
+CHARS_PER_TOKEN = 4
+# Share of the budget the profile may use; retrieved chunks get the rest
+PROFILE_BUDGET_SHARE = 0.5
+
+_BULLET = re.compile(r"^[\s•·▪◦‣*\-–—>]+")
+_SKILL_SPLIT = re.compile(r"[,|;•·▪\n]+")
+_DATE = re.compile(r"\b(19|20)\d{2}\b|\bpresent\b|\bcurrent\b", re.IGNORECASE)
+_METRIC = re.compile(
+    r"\d+(\.\d+)?\s?(%|x\b|\+|k\b|m\b|ms\b|users|customers|requests|hrs|hours)|[$€£₹]\s?\d",
+    re.IGNORECASE,
+)
+
+
+def _lines(body: str, bullets: bool = True) -> list[str]:
+    """Non-empty lines with bullets stripped; `bullets=False` skips bullet lines."""
+    out = []
+    for line in body.splitlines():
+        text = " ".join(_BULLET.sub("", line).split())
+        if text and (bullets or not _BULLET.match(line)):
+            out.append(text)
+    return out
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0].rstrip(",;:") + "…"
+
+
+def _dedupe(items: list[str]) -> list[str]:
+    seen, out = set(), []
+    for item in items:
+        key = item.lower()
+        if key not in seen:
+            seen.add(key)
+            out.append(item)
+    return out
+
+
+def build_resume_profile(text: str, max_chars: int = PROFILE_MAX_CHARS) -> str:
+    """Summarise resume text into a dense, sectioned profile."""
+    sections: dict[str, list[str]] = {}
+    titles: dict[str, list[str]] = {}
+    for name, body in split_sections(text):
+        sections.setdefault(name, []).extend(_lines(body))
+        titles.setdefault(name, []).extend(_lines(body, bullets=False))
+
+    skills = []
+    for line in sections.get("skills", []):
+        # "Languages: Python, Go" -> "Python", "Go"
+        line = line.split(":", 1)[-1]
+        skills.extend(s.strip() for s in _SKILL_SPLIT.split(line) if 1 < len(s.strip()) <= 40)
+
+    roles = [l for l in sections.get("experience", []) if _DATE.search(l) and len(l) <= 140]
+    projects = [l for l in titles.get("projects", []) if len(l.split()) <= 12 and not l.endswith(".")]
+    impact = [
+        l for name in ("experience", "projects", "achievements", "summary")
+        for l in sections.get(name, []) if _METRIC.search(l)
+    ]
+    education = sections.get("education", [])[:1]
+
+    parts = []
+    if sections.get("summary"):
+        parts.append(f"Summary: {_clip(' '.join(sections['summary']), 200)}")
+    if skills:
+        parts.append(f"Skills: {', '.join(_dedupe(skills)[:30])}")
+    if roles:
+        parts.append(f"Roles: {'; '.join(_clip(r, 100) for r in _dedupe(roles)[:5])}")
+    if projects:
+        parts.append(f"Projects: {'; '.join(_clip(p, 80) for p in _dedupe(projects)[:5])}")
+    if impact:
+        parts.append(f"Impact: {'; '.join(_clip(m, 120) for m in _dedupe(impact)[:5])}")
+    if education:
+        parts.append(f"Education: {_clip(education[0], 120)}")
+
+    if not parts:
+        # No recognisable headings: keep the opening of the resume
+        return _clip(" ".join(text.split()), max_chars)
+    return _clip("\n".join(parts), max_chars)
+
+
+def compose_live_context(profile: str, chunks: list[str], budget_tokens: int = LIVE_CONTEXT_TOKENS) -> str:
+    """Combine the profile and question-specific chunks within a token budget."""
+    budget = budget_tokens * CHARS_PER_TOKEN
+    profile = _clip(profile, int(budget * PROFILE_BUDGET_SHARE)) if profile else ""
+    parts = [profile] if profile else []
+    remaining = budget - len(profile) - len("\nRelevant experience:")
+
+    # Split what is left evenly; space a short chunk leaves goes to the next
+    for i, chunk in enumerate(chunks):
+        share = remaining // (len(chunks) - i)
+        if share < 80:
+            break
+        piece = _clip(" ".join(chunk.split()), share - 3)
+        parts.append(f"- {piece}")
+        remaining -= len(piece) + 3
+
+    if len(parts) > 1 and profile:
+        parts.insert(1, "Relevant experience:")
+    return "\n".join(parts)
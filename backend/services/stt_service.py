@@ -4,6 +4,8 @@ import os
 import io
 from groq import Groq
 from dotenv import load_dotenv
+from services.groq_scheduler import groq_scheduler, PRIORITY_LIVE
+from utils.metrics import STT_SECONDS
 
 load_dotenv()
 
@@ -11,9 +13,17 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise Exception("GROQ_API_KEY missing in .env")
 
-client = Groq(api_key=GROQ_API_KEY)
+# Retries and 429 backoff are handled by groq_scheduler
+client = Groq(api_key=GROQ_API_KEY, max_retries=0)
 MODEL = "whisper-large-v3" # Groq's best Whisper model
 
+# Phrases Whisper hallucinates on silence or background noise
+SILENCE_HALLUCINATIONS = {
+    "thank you.", "okay.", "bye.", "you.", "yeah.", "yes.",
+    "thank you", "okay", "bye", "you", "yeah", "yes", "amém.", "amén",
+    "hello.", "hello", "hi.", "hi", "i'm sorry.", "sorry."
+}
+
 def transcribe_audio(file_content: bytes, filename: str = "audio.wav") -> str:
     """
     Transcribe audio bytes using Groq Whisper.
@@ -25,13 +35,26 @@ def transcribe_audio(file_content: bytes, filename: str = "audio.wav") -> str:
         file_obj = io.BytesIO(file_content)
         file_obj.name = filename
 
-        transcription = client.audio.transcriptions.create(
-            file=file_obj,
-            model=MODEL,
-            response_format="json",
-            language="en"
-        )
+        def request():
+            file_obj.seek(0)  # rewind for a retried upload
+            return client.audio.transcriptions.create(
+                file=file_obj,
+                model=MODEL,
+                response_format="json",
+                language="en"
+            )
+
+        with STT_SECONDS.time():
+            transcription = groq_scheduler.call(request, priority=PRIORITY_LIVE, group="audio")
         return transcription.text
     except Exception as e:
         print(f"Error in STT transcription: {str(e)}")
         raise e
+
+
+def clean_transcript(transcript: str) -> str:
+    """Return the transcript, or "" if it is a Whisper silence hallucination."""
+    t_clean = transcript.lower().strip()
+    if t_clean in SILENCE_HALLUCINATIONS or len(t_clean) < 3:
+        return ""
+    return transcript
@@ -0,0 +1,175 @@
+"""Local voice activity detection run before audio is sent to Whisper.
+
+Clips are decoded to mono PCM (WAV with the stdlib `wave` module, anything
+else, such as the desktop app's WebM/Opus, through PyAV's bundled FFmpeg or
+the ffmpeg CLI) and split into 30 ms frames.  A frame counts as speech when
+its energy clears an adaptive noise floor and its zero-crossing rate is
+below that of broadband noise.  If a clip cannot be decoded the gate fails
+open and the clip goes to Whisper as before.
+"""
+
+import io
+import logging
+import os
+import shutil
+import subprocess
+import time
+import wave
+import numpy as np
+
+try:
+    import av
+except ImportError:  # falls back to the ffmpeg CLI, if installed
+    av = None
+
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+VAD_SAMPLE_RATE = 16000
+VAD_FRAME_MS = 30
+VAD_MIN_DBFS = float(os.getenv("VAD_MIN_DBFS", "-45"))   # quieter frames are never speech
+VAD_LOUD_DBFS = -30.0                                    # louder frames always clear the floor
+VAD_MARGIN_DB = 10.0                                     # speech must be this far above the noise floor
+VAD_MAX_ZCR = 0.35                                       # white noise sits around 0.5
+VAD_HANGOVER_FRAMES = 8                                  # ~240 ms kept around each speech frame
+VAD_MIN_SPEECH_MS = float(os.getenv("VAD_MIN_SPEECH_MS", "200"))
+FFMPEG_TIMEOUT = 5.0
+
+_FFMPEG = shutil.which("ffmpeg")
+
+logger = logging.getLogger(__name__)
+
+
+def _decode_wav(content: bytes) -> tuple[np.ndarray, int]:
+    with wave.open(io.BytesIO(content)) as wav:
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def _decode_av(content: bytes) -> tuple[np.ndarray, int]:
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=VAD_SAMPLE_RATE)
+    chunks = []
+    with av.open(io.BytesIO(content)) as container:
+        for frame in container.decode(audio=0):
+            chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(frame))
+    chunks.extend(out.to_ndarray().reshape(-1) for out in resampler.resample(None))
+    if not chunks:
+        raise ValueError("No audio frames")
+    return np.concatenate(chunks).astype(np.float32) / 32768, VAD_SAMPLE_RATE
+
+
+def _decode_ffmpeg(content: bytes) -> tuple[np.ndarray, int]:
+    proc = subprocess.run(
+        [_FFMPEG, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-f", "s16le", "-ac", "1", "-ar", str(VAD_SAMPLE_RATE), "pipe:1"],
+        input=content,
+        capture_output=True,
+        timeout=FFMPEG_TIMEOUT,
+        check=True,
+    )
+    return np.frombuffer(proc.stdout, dtype="<i2").astype(np.float32) / 32768, VAD_SAMPLE_RATE
+
+
+def decode_pcm(content: bytes, filename: str = "audio.wav") -> tuple[np.ndarray, int] | None:
+    """Decode a clip to mono float32 samples in [-1, 1], or None if not possible."""
+    try:
+        if content[:4] == b"RIFF" and content[8:12] == b"WAVE":
+            return _decode_wav(content)
+        if av is not None:
+            return _decode_av(content)
+        if _FFMPEG:
+            return _decode_ffmpeg(content)
+    except Exception as e:
+        logger.warning(f"VAD decode failed for {filename}: {str(e)}")
+    return None
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int) -> dict:
+    """Frame-level energy / zero-crossing VAD.
+
+    Returns speech_ratio (share of frames with speech), speech_ms and the
+    [start, end) sample range of speech including hangover."""
+    frame_len = max(1, sample_rate * VAD_FRAME_MS // 1000)
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return {"speech_ratio": 0.0, "speech_ms": 0.0, "start": 0, "end": 0}
+
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    db = 20 * np.log10(np.maximum(rms, 1e-10))
+    zcr = np.mean(np.abs(np.diff(np.signbit(frames), axis=1)), axis=1)
+
+    # The 10th percentile is only a noise floor if the clip has pauses; in a
+    # clip that is speech throughout it is the quiet half of the speech, so
+    # the threshold also stays a margin below the loud frames (90th)
+    noise_floor, loud = np.percentile(db, [10, 90])
+    threshold = max(VAD_MIN_DBFS, min(noise_floor + VAD_MARGIN_DB, loud - VAD_MARGIN_DB, VAD_LOUD_DBFS))
+    speech = (db > threshold) & (zcr < VAD_MAX_ZCR)
+
+    idx = np.flatnonzero(speech)
+    if idx.size == 0:
+        return {"speech_ratio": 0.0, "speech_ms": 0.0, "start": 0, "end": 0}
+
+    first = max(0, idx[0] - VAD_HANGOVER_FRAMES)
+    last = min(n_frames, idx[-1] + 1 + VAD_HANGOVER_FRAMES)
+    return {
+        "speech_ratio": round(float(idx.size) / n_frames, 4),
+        "speech_ms": float(idx.size * VAD_FRAME_MS),
+        "start": int(first * frame_len),
+        "end": int(last * frame_len),
+    }
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def gate_audio(content: bytes, filename: str = "audio.wav") -> tuple[bytes | None, dict]:
+    """Decide whether a clip is worth sending to Whisper.
+
+    Returns (audio, report).  `audio` is None for silent clips, the original
+    bytes when the clip has speech or could not be analysed, and a trimmed WAV
+    when a WAV clip has long silent edges.  `report` carries speech_ratio and
+    vad_ms for the response."""
+    start = time.perf_counter()
+    report = {"speech_ratio": None, "vad_ms": 0.0, "skipped": False}
+    if not VAD_ENABLED:
+        return content, report
+
+    decoded = decode_pcm(content, filename)
+    if decoded is None:
+        report["vad_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return content, report
+
+    samples, rate = decoded
+    result = detect_speech(samples, rate)
+    report["speech_ratio"] = result["speech_ratio"]
+
+    audio = content
+    if result["speech_ms"] < VAD_MIN_SPEECH_MS:
+        audio = None
+        report["skipped"] = True
+    elif content[:4] == b"RIFF" and (result["end"] - result["start"]) < 0.8 * len(samples):
+        audio = encode_wav(samples[result["start"]:result["end"]], rate)
+
+    report["vad_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return audio, report
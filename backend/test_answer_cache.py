@@ -0,0 +1,95 @@
+from fastapi.testclient import TestClient
+from main import app
+from utils.auth_dependency import get_current_user
+from routes import interview
+from services.answer_cache import AnswerCache, answer_cache, content_words, normalize_question
+
+RESULT = {"answer": "I build backend systems in Python.", "key_points": ["FastAPI"], "tip": "Smile"}
+
+
+def test_normalize_question():
+    assert normalize_question("  Tell me, about YOURSELF?! ") == "tell me about yourself"
+    assert content_words("so can you tell me about yourself") == {"yourself"}
+
+
+def test_exact_and_near_duplicate_hits():
+    cache = AnswerCache(maxsize=10, ttl=60)
+    cache.put("r1", "SWE", "", "Tell me about yourself", RESULT)
+
+    assert cache.get("r1", "swe", "", "tell me about yourself.") == {**RESULT, "cached": True}
+    assert cache.get("r1", "SWE", "", "So tell me about yourself")["answer"] == RESULT["answer"]
+    # Different resume / role buckets never share answers
+    assert cache.get("r2", "SWE", "", "Tell me about yourself") is None
+    assert cache.get("r1", "PM", "", "Tell me about yourself") is None
+    # Similar wording but a different question
+    cache.put("r1", "SWE", "", "What is the time complexity of quicksort", RESULT)
+    assert cache.get("r1", "SWE", "", "What is the time complexity of mergesort") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["near_hits"], stats["misses"]) == (1, 1, 3)
+
+
+def test_reordered_and_filler_questions_hit():
+    cache = AnswerCache(maxsize=10, ttl=60)
+    cache.put("r1", "", "", "Explain REST vs GraphQL", RESULT)
+    assert cache.get("r1", "", "", "Can you explain GraphQL versus REST?") is not None
+    cache.put("r1", "", "", "What is the difference between a process and a thread?", RESULT)
+    assert cache.get("r1", "", "", "um what's the difference between a thread and a process") is not None
+
+
+def test_questions_differing_in_one_content_word_miss():
+    pairs = [
+        ("How garbage collection works in Java?", "How garbage collection works in Go?"),
+        ("What is the difference between SQL and NoSQL?", "What is the difference between SQL and NewSQL?"),
+        ("What changed between HTTP/1.1 and HTTP/2?", "What changed between HTTP/2 and HTTP/3?"),
+        ("How do you reverse a linked list?", "How do you reverse a doubly linked list?"),
+        ("How does a hash map work?", "Why does a hash map not work?"),
+    ]
+    for cached, asked in pairs:
+        cache = AnswerCache(maxsize=10, ttl=60)
+        cache.put("r1", "", "", cached, RESULT)
+        assert cache.get("r1", "", "", asked) is None, (cached, asked)
+        assert cache.get("r1", "", "", cached) is not None
+
+
+def test_skips_placeholders_and_evicts_lru():
+    cache = AnswerCache(maxsize=2, ttl=60)
+    cache.put("r1", "", "", "what is a mutex", {"answer": ""})
+    cache.put("r1", "", "", "what is a", {"answer": "Waiting for interviewer to finish..."})
+    assert cache.stats()["size"] == 0
+
+    cache.put("r1", "", "", "what is a mutex", RESULT)
+    cache.put("r1", "", "", "what is a semaphore", RESULT)
+    cache.put("r1", "", "", "what is a deadlock", RESULT)
+    assert cache.get("r1", "", "", "what is a mutex") is None
+    assert cache.get("r1", "", "", "what is a deadlock") is not None
+
+
+def test_live_answer_marks_cached_responses():
+    calls = []
+
+    async def mock_user():
+        return {"sub": "00000000-0000-0000-0000-000000000000"}
+
+    def mock_generate(**kwargs):
+        calls.append(kwargs["question"])
+        return dict(RESULT)
+
+    originals = (interview.get_full_resume_text, interview.build_live_context, interview.generate_live_answer)
+    app.dependency_overrides[get_current_user] = mock_user
+    interview.get_full_resume_text = lambda db, user_id: ("Python engineer", "cache-resume-id")
+    interview.build_live_context = lambda db, user_id, resume_id, question: "Skills: Python"
+    interview.generate_live_answer = mock_generate
+    answer_cache.clear()
+    try:
+        client = TestClient(app)
+        first = client.post("/interview/live-answer", json={"question": "Explain REST vs GraphQL?"}).json()
+        second = client.post("/interview/live-answer", json={"question": "explain REST vs GraphQL"}).json()
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["answer"] == first["answer"]
+        assert len(calls) == 1
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        interview.get_full_resume_text, interview.build_live_context, interview.generate_live_answer = originals
+        answer_cache.clear()
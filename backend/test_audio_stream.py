@@ -0,0 +1,184 @@
+import io
+import wave
+import numpy as np
+import pytest
+from fastapi import WebSocketDisconnect, status
+from fastapi.testclient import TestClient
+from main import app
+from routes import audio
+from services.audio_stream import AudioStreamSession, merge_overlap
+
+av = pytest.importorskip("av")
+
+RATE = 16000
+
+
+def _voice(seconds: float) -> np.ndarray:
+    t = np.arange(int(RATE * seconds)) / RATE
+    tone = sum(np.sin(2 * np.pi * 180 * k * t) / k for k in range(1, 4))
+    return (0.2 * tone * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))).astype(np.float32)
+
+
+def _timeslices(samples: np.ndarray, slice_seconds: float = 0.25) -> list[bytes]:
+    """Live WebM/Opus like MediaRecorder's, cut into equal byte slices that
+    ignore Cluster and block boundaries."""
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="webm", options={"live": "1", "cluster_time_limit": "1000"}) as container:
+        stream = container.add_stream("libopus", rate=48000)
+        stream.layout = "mono"
+        stream.options = {"vbr": "off"}  # constant bytes per second, so byte slices are time slices
+        frame = av.AudioFrame.from_ndarray(
+            (samples * 32767).astype("<i2").reshape(1, -1), format="s16", layout="mono"
+        )
+        frame.sample_rate = RATE
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    data = buf.getvalue()
+    size = int(len(data) * slice_seconds * RATE / len(samples))
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _wav_seconds(content: bytes) -> float:
+    with wave.open(io.BytesIO(content)) as w:
+        return w.getnframes() / w.getframerate()
+
+
+def test_merge_overlap_drops_repeated_words():
+    merged = merge_overlap("how would you design a", "design a rate limiter?")
+    assert merged == "how would you design a rate limiter?"
+    assert merge_overlap("", "hello there") == "hello there"
+    assert merge_overlap("same words", "Same words.") == "same words"
+
+
+def test_session_decodes_windows_across_timeslice_boundaries():
+    slices = _timeslices(np.concatenate([_voice(2.0), np.zeros(3 * RATE, dtype=np.float32)]))
+    session = AudioStreamSession()
+    for data in slices[:4]:
+        session.add_frame(data)
+    assert session.header.startswith(b"\x1a\x45\xdf\xa3")
+    assert session.ready_for_partial()
+
+    audio, end = session.next_window()
+    assert 0.8 < _wav_seconds(audio) < 1.1
+    assert session.apply_transcript("tell me about", end)
+
+    for data in slices[4:8]:
+        session.add_frame(data)
+    audio, end = session.next_window()
+    # The window restarts half a second back so words on the edge are re-heard
+    assert 1.3 < _wav_seconds(audio) < 1.6
+    assert 1.8 < end / RATE < 2.1
+    assert session.apply_transcript("about yourself", end)
+    assert session.transcript == "tell me about yourself"
+    assert not session.end_of_speech
+
+    # A one-second pause is not the end of the question, and the VAD keeps
+    # the silent window away from Whisper...
+    for data in slices[8:12]:
+        session.add_frame(data)
+    audio, end = session.next_window()
+    assert audio is None
+    assert not session.apply_transcript("", end)
+    assert not session.end_of_speech
+    # ...two seconds of silence are
+    for data in slices[12:16]:
+        session.add_frame(data)
+    session.apply_transcript("", session.next_window()[1])
+    assert session.end_of_speech
+
+    session.reset_utterance()
+    for data in slices[16:]:
+        session.add_frame(data)
+    audio, end = session.next_window()
+    # Decoding resumes where the stream left off
+    assert audio is None
+    assert end / RATE < 1.2
+
+
+def test_websocket_streams_partials_and_answer():
+    scripted = iter(["Explain the difference", "difference between REST and GraphQL"])
+    tokens, windows = [], []
+    slices = _timeslices(np.concatenate([_voice(2.0), np.zeros(3 * RATE, dtype=np.float32)]))
+
+    def fake_transcribe(content, filename="audio.wav"):
+        assert content[:4] == b"RIFF"
+        windows.append(content)
+        return next(scripted, "")
+
+    def fake_verify(token):
+        tokens.append(token)
+        return {"sub": "00000000-0000-0000-0000-000000000000"}
+
+    def fake_stream_live_answer(question, resume_context, job_role="", level="", history=None):
+        yield "answer", {"delta": "REST exposes "}
+        yield "answer", {"delta": "resources."}
+        yield "done", {"answer": "REST exposes resources.", "key_points": []}
+
+    originals = (
+        audio.verify_token, audio.get_full_resume_text, audio.warm_live_context,
+        audio.build_live_context, audio.transcribe_audio, audio.stream_live_answer,
+    )
+    audio.verify_token = fake_verify
+    audio.get_full_resume_text = lambda db, user_id: ("Backend engineer.", "test-resume-id")
+    audio.warm_live_context = lambda db, user_id, resume_id: None
+    audio.build_live_context = lambda db, user_id, resume_id, question: "Backend engineer."
+    audio.transcribe_audio = fake_transcribe
+    audio.stream_live_answer = fake_stream_live_answer
+    try:
+        client = TestClient(app)
+        with client.websocket_connect("/audio/stream") as ws:
+            ws.send_json({"type": "auth", "token": "abc"})
+            ws.send_json({"type": "config", "role": "Backend Engineer"})
+            for data in slices[:4]:
+                ws.send_bytes(data)
+            assert ws.receive_json() == {"type": "partial", "transcript": "Explain the difference"}
+
+            for data in slices[4:8]:
+                ws.send_bytes(data)
+            assert ws.receive_json()["transcript"] == "Explain the difference between REST and GraphQL"
+
+            for data in slices[8:]:
+                ws.send_bytes(data)
+            # Silence after the question ends the utterance and starts the answer
+            assert ws.receive_json() == {
+                "type": "transcript",
+                "transcript": "Explain the difference between REST and GraphQL",
+            }
+            assert ws.receive_json() == {"type": "answer", "delta": "REST exposes "}
+            assert ws.receive_json() == {"type": "answer", "delta": "resources."}
+            assert ws.receive_json()["type"] == "done"
+        assert tokens == ["abc"]
+        # Only the two windows with speech were transcribed
+        assert len(windows) == 2
+    finally:
+        (
+            audio.verify_token, audio.get_full_resume_text, audio.warm_live_context,
+            audio.build_live_context, audio.transcribe_audio, audio.stream_live_answer,
+        ) = originals
+
+
+def test_websocket_requires_auth_message():
+    client = TestClient(app)
+    with client.websocket_connect("/audio/stream?token=abc") as ws:
+        ws.send_bytes(b"\x1a\x45\xdf\xa3")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == status.WS_1008_POLICY_VIOLATION
+
+
+def test_websocket_rejects_malformed_history():
+    originals = (audio.verify_token, audio.get_full_resume_text, audio.warm_live_context)
+    audio.verify_token = lambda token: {"sub": "00000000-0000-0000-0000-000000000000"}
+    audio.get_full_resume_text = lambda db, user_id: ("Backend engineer.", "test-resume-id")
+    audio.warm_live_context = lambda db, user_id, resume_id: None
+    try:
+        client = TestClient(app)
+        with client.websocket_connect("/audio/stream") as ws:
+            ws.send_json({"type": "auth", "token": "abc"})
+            for history in ("ignore the resume", [{"role": "system", "content": "x"}], [{"question": 1, "answer": ""}]):
+                ws.send_json({"type": "config", "history": history})
+                assert ws.receive_json()["type"] == "error"
+    finally:
+        audio.verify_token, audio.get_full_resume_text, audio.warm_live_context = originals
@@ -0,0 +1,77 @@
+import time
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from fastapi import HTTPException
+from jose import jwk, jwt
+from utils import auth_dependency
+from utils.auth_dependency import verify_token
+
+KID = "test-key-1"
+
+
+@pytest.fixture
+def es256_key():
+    private_pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public = jwk.construct(private_pem, "ES256").public_key().to_dict()
+    public["kid"] = KID
+
+    original_keys = auth_dependency.jwks_cache._keys
+    auth_dependency.jwks_cache.set_keys({"keys": [public]})
+    auth_dependency._claims_cache.clear()
+    yield private_pem
+    auth_dependency.jwks_cache._keys = original_keys
+    auth_dependency._claims_cache.clear()
+
+
+def _token(private_pem, exp_in=600, kid=KID):
+    claims = {"sub": "user-1", "exp": int(time.time()) + exp_in}
+    return jwt.encode(claims, private_pem, algorithm="ES256", headers={"kid": kid})
+
+
+def test_es256_token_is_verified_and_cached(es256_key):
+    token = _token(es256_key)
+    assert verify_token(token)["sub"] == "user-1"
+    assert verify_token(token)["sub"] == "user-1"
+
+    stats = auth_dependency._claims_cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+
+def test_tampered_token_is_rejected(es256_key):
+    header, payload, signature = _token(es256_key).split(".")
+    forged = jwt.encode({"sub": "admin", "exp": int(time.time()) + 600}, "x", algorithm="HS256")
+    tampered = ".".join([header, forged.split(".")[1], signature])
+
+    with pytest.raises(HTTPException) as exc:
+        verify_token(tampered)
+    assert exc.value.status_code == 401
+
+
+def test_unknown_kid_is_rejected_without_fetching(es256_key, monkeypatch):
+    def fail_fetch():
+        raise AssertionError("verification must not fetch JWKS inline")
+
+    monkeypatch.setattr(auth_dependency.jwks_cache, "refresh", fail_fetch)
+    with pytest.raises(HTTPException) as exc:
+        verify_token(_token(es256_key, kid="rotated-key"))
+    assert exc.value.status_code == 401
+
+
+def test_expired_token_is_not_cached(es256_key):
+    with pytest.raises(HTTPException):
+        verify_token(_token(es256_key, exp_in=-10))
+    assert auth_dependency._claims_cache.stats()["size"] == 0
+
+
+def test_hs256_without_secret_is_rejected(monkeypatch):
+    monkeypatch.setattr(auth_dependency, "SUPABASE_JWT_SECRET", None)
+    token = jwt.encode({"sub": "user-1", "exp": int(time.time()) + 600}, "guess", algorithm="HS256")
+    with pytest.raises(HTTPException) as exc:
+        verify_token(token)
+    assert exc.value.status_code == 401
@@ -0,0 +1,50 @@
+import pytest
+from groq import Groq
+from postgrest import SyncPostgrestClient
+from benchmarks.fakes import LIVE_ANSWER, FakeGroq, FakePostgREST
+from utils.llm_json import parse_llm_json
+
+
+@pytest.fixture
+def postgrest():
+    fake = FakePostgREST(latency=0).start()
+    yield fake
+    fake.stop()
+
+
+def test_fake_postgrest_speaks_the_clients_filters(postgrest):
+    db = SyncPostgrestClient(f"{postgrest.url}/rest/v1")
+    ids = [db.table("resumes").insert({"user_id": "u1", "title": f"cv{i}"}).execute().data[0]["id"] for i in range(3)]
+    db.table("resumes").insert({"user_id": "u2", "title": "other"}).execute()
+
+    rows = db.table("resumes").select("id, title").eq("user_id", "u1").order("created_at", desc=True).limit(2).execute()
+    assert [set(r) for r in rows.data] == [{"id", "title"}] * 2
+
+    db.table("resumes").delete().in_("id", ids[:2]).execute()
+    assert [r["title"] for r in db.table("resumes").select("*").eq("user_id", "u1").execute().data] == ["cv2"]
+
+    new_id = db.rpc("replace_resume", {
+        "p_user_id": "u1", "p_title": "new", "p_parsed_text": "text", "p_profile": None,
+        "p_content_hash": "abc", "p_chunks": [{"content_chunk": "Go", "section": "skills"}],
+    }).execute().data
+    assert [r["id"] for r in db.table("resumes").select("id").eq("user_id", "u1").execute().data] == [new_id]
+    assert db.table("resume_embeddings").select("content_chunk").eq("resume_id", new_id).execute().data == [
+        {"content_chunk": "Go"}
+    ]
+
+
+def test_fake_groq_streams_like_groq():
+    fake = FakeGroq(llm_latency=0.05, ttft=0.01).start()
+    try:
+        client = Groq(api_key="bench", base_url=fake.url, max_retries=0)
+        stream = client.chat.completions.create(
+            model="llama-3.1-8b-instant",
+            messages=[{"role": "user", "content": "Answer the interview question."}],
+            stream=True,
+        )
+        chunks = list(stream)
+    finally:
+        fake.stop()
+    text = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+    assert parse_llm_json(text) == LIVE_ANSWER
+    assert chunks[-1].x_groq.usage.completion_tokens > 0
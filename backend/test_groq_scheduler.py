@@ -0,0 +1,161 @@
+import threading
+import time
+from types import SimpleNamespace
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from groq import RateLimitError
+from main import app
+from routes import interview
+from services.groq_scheduler import GroqBusyError, GroqScheduler, PRIORITY_BATCH, PRIORITY_LIVE
+from utils.auth_dependency import get_current_user, get_db
+from utils.metrics import GROQ_QUEUE_WAIT_SECONDS, registry
+
+
+def _rate_limited(retry_after: str) -> RateLimitError:
+    response = httpx.Response(
+        429,
+        headers={"retry-after": retry_after},
+        request=httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions"),
+    )
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+def test_live_calls_jump_queued_batch_calls():
+    # 60 RPM: one request slot per second once the burst of 1 is spent
+    scheduler = GroqScheduler({"chat": (60, 0)}, queue_timeout=5)
+    scheduler._groups["chat"].requests.capacity = 1
+    scheduler._groups["chat"].requests.level = 0
+    order = []
+
+    def submit(name, priority):
+        scheduler.call(lambda: order.append(name), priority=priority)
+
+    batch = threading.Thread(target=submit, args=("batch", PRIORITY_BATCH))
+    batch.start()
+    time.sleep(0.1)
+    live = threading.Thread(target=submit, args=("live", PRIORITY_LIVE))
+    live.start()
+    time.sleep(0.1)
+    assert scheduler.stats()["groups"]["chat"] == {"queued_live": 1, "queued_batch": 1, "paused_s": 0.0}
+
+    batch.join(5)
+    live.join(5)
+    assert order == ["live", "batch"]
+
+
+def test_429_honours_retry_after():
+    scheduler = GroqScheduler({"chat": (0, 0)})
+    attempts = []
+
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise _rate_limited("0.3")
+        return "ok"
+
+    assert scheduler.call(flaky) == "ok"
+    assert attempts[1] - attempts[0] >= 0.3
+    assert scheduler.stats()["rate_limited"] == 1
+
+
+def test_gives_up_after_max_retries():
+    scheduler = GroqScheduler({"chat": (0, 0)}, max_retries=1)
+    calls = []
+
+    def always_limited():
+        calls.append(1)
+        raise _rate_limited("0")
+
+    with pytest.raises(RateLimitError):
+        scheduler.call(always_limited)
+    assert len(calls) == 2
+
+
+def test_call_over_budget_times_out():
+    scheduler = GroqScheduler({"chat": (30, 1000)}, queue_timeout=0.2)
+    scheduler.call(lambda: None, tokens=1000)
+    with pytest.raises(GroqBusyError):
+        scheduler.call(lambda: None, tokens=1000)
+    assert scheduler.stats()["timed_out"] == 1
+
+
+def _chunk(text=None, usage=None):
+    delta = SimpleNamespace(content=text)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta)] if text else [], x_groq=SimpleNamespace(usage=usage))
+
+
+def test_stream_refunds_unused_budget_when_it_ends():
+    scheduler = GroqScheduler({"chat": (0, 6000)})
+    bucket = scheduler._groups["chat"].tokens
+
+    # Reported usage on the last chunk wins
+    stream = scheduler.call(
+        lambda: iter([_chunk("Hi"), _chunk(usage=SimpleNamespace(total_tokens=150))]),
+        tokens=100 + 512, stream_max_tokens=512,
+    )
+    assert bucket.level == pytest.approx(6000 - 612, abs=1)
+    list(stream)
+    assert bucket.level == pytest.approx(6000 - 150, abs=1)
+
+    # Without usage, the prompt estimate plus the streamed text (~4 chars per token)
+    bucket.level = 6000
+    stream = scheduler.call(lambda: iter([_chunk("x" * 400)] * 3), tokens=100 + 512, stream_max_tokens=512)
+    list(stream)
+    assert bucket.level == pytest.approx(6000 - 400, abs=1)
+
+
+def test_closed_stream_is_settled_once():
+    scheduler = GroqScheduler({"chat": (0, 6000)})
+    bucket = scheduler._groups["chat"].tokens
+    closed = []
+
+    class Upstream:
+        def __iter__(self):
+            yield _chunk("x" * 40)
+            yield _chunk("y" * 40)
+
+        def close(self):
+            closed.append(True)
+
+    stream = scheduler.call(Upstream, tokens=100 + 512, stream_max_tokens=512)
+    next(iter(stream))
+    stream.close()
+    stream.close()
+    assert closed == [True]
+    assert bucket.level == pytest.approx(6000 - 110, abs=1)
+
+
+def test_busy_scheduler_is_a_503_with_retry_after(monkeypatch):
+    def busy(**kwargs):
+        raise GroqBusyError("queue full")
+
+    monkeypatch.setattr(interview, "get_full_resume_text", lambda db, user_id: ("Backend engineer.", "resume-1"))
+    monkeypatch.setattr(interview, "generate_interview_questions", busy)
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user-1"}
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        resp = TestClient(app).post("/interview/start", json={"role": "Backend Engineer"})
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == str(GroqBusyError.retry_after)
+
+
+def test_queue_depth_and_wait_are_exported():
+    scheduler = GroqScheduler({"chat": (60, 0)}, queue_timeout=5)
+    scheduler._groups["chat"].requests.capacity = 1
+    scheduler._groups["chat"].requests.level = 0
+    before = GROQ_QUEUE_WAIT_SECONDS.count(group="chat", priority="batch")
+
+    waiting = threading.Thread(target=scheduler.call, args=(lambda: None,), kwargs={"priority": PRIORITY_BATCH})
+    waiting.start()
+    time.sleep(0.1)
+    assert scheduler.queue_depths() == {("chat", "live"): 0, ("chat", "batch"): 1}
+    waiting.join(5)
+    assert GROQ_QUEUE_WAIT_SECONDS.count(group="chat", priority="batch") == before + 1
+
+    body = registry.render()
+    assert "# TYPE desierai_groq_queue_depth gauge" in body
+    assert 'desierai_groq_queue_depth{group="chat",priority="live"} 0' in body
@@ -0,0 +1,111 @@
+import re
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from main import app
+from utils.auth_dependency import get_current_user, get_db
+
+SESSIONS = [
+    {"id": f"s{i}", "role": "SWE", "created_at": f"2026-01-{30 - i:02d}T10:00:00+00:00",
+     "interview_messages": [{"count": i}]}
+    for i in range(5)
+]
+# Three sessions created in the same instant, straddling a page of two
+TIED = [
+    {"id": f"t{i}", "role": "SWE", "created_at": "2026-02-01T10:00:00+00:00", "interview_messages": []}
+    for i in range(3)
+]
+CURSOR_RE = re.compile(r'created_at\.lt\."(.+)",and\(created_at\.eq\."\1",id\.lt\."(.+)"\)$')
+
+
+class FakeSessionsQuery:
+    def __init__(self, db):
+        self.db, self.filters, self.limit_n = db, [], None
+
+    def select(self, columns):
+        self.db.selects.append(columns)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda r: column != "user_id" or value == "u1")
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda r: r[column] < value)
+        return self
+
+    def or_(self, filters):
+        # Only the (created_at, id) keyset cursor is expected here
+        ts, sid = CURSOR_RE.match(filters).groups()
+        self.filters.append(lambda r: (r["created_at"], r["id"]) < (ts, sid))
+        return self
+
+    def order(self, column, desc=False):
+        self.db.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def execute(self):
+        self.db.executes += 1
+        rows = [r for r in self.db.rows if all(f(r) for f in self.filters)]
+        rows.sort(key=lambda r: (r["created_at"], r["id"]), reverse=True)
+        return SimpleNamespace(data=rows[: self.limit_n])
+
+
+class FakeSupabase:
+    def __init__(self, rows=SESSIONS):
+        self.rows, self.selects, self.orders, self.executes = rows, [], [], 0
+
+    def table(self, name):
+        assert name == "interview_sessions"
+        return FakeSessionsQuery(self)
+
+
+def _client(fake):
+    async def mock_user():
+        return {"sub": "u1"}
+
+    app.dependency_overrides[get_current_user] = mock_user
+    app.dependency_overrides[get_db] = lambda: fake
+    return TestClient(app)
+
+
+def _cursor(page, limit=2):
+    return {"limit": limit, "before": page[-1]["created_at"], "before_id": page[-1]["session_id"]}
+
+
+def test_history_is_one_query_with_keyset_pages():
+    fake = FakeSupabase()
+    try:
+        client = _client(fake)
+        page1 = client.get("/interview/history?limit=2").json()
+        assert [s["session_id"] for s in page1] == ["s0", "s1"]
+        assert page1[1]["message_count"] == 1
+        assert fake.executes == 1
+        assert "interview_messages(count)" in fake.selects[0]
+
+        page2 = client.get("/interview/history", params=_cursor(page1)).json()
+        assert [s["session_id"] for s in page2] == ["s2", "s3"]
+        assert fake.executes == 2
+        assert fake.orders[-2:] == [("created_at", True), ("id", True)]
+
+        assert client.get("/interview/history?limit=500").status_code == 422
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+
+
+def test_sessions_sharing_a_timestamp_span_a_page_boundary():
+    fake = FakeSupabase(TIED + SESSIONS)
+    try:
+        client = _client(fake)
+        page1 = client.get("/interview/history?limit=2").json()
+        page2 = client.get("/interview/history", params=_cursor(page1)).json()
+        page3 = client.get("/interview/history", params=_cursor(page2)).json()
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+    ids = [s["session_id"] for s in page1 + page2 + page3]
+    assert ids == ["t2", "t1", "t0", "s0", "s1", "s2"]
@@ -0,0 +1,128 @@
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from services import ingest_queue as ingest
+from utils.auth_dependency import get_current_user, get_db
+
+RESUME = "Jane Doe\nExperience\nSenior Engineer, Acme  2021 - Present\n• Cut p95 latency by 40%."
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    stored = []
+
+    def fake_extract(path):
+        with open(path) as f:
+            return f.read()
+
+    def fake_replace(db, user_id, title, text, profile, content_hash, chunks, embeddings):
+        stored.append((db, user_id, content_hash, len(chunks)))
+        return f"resume-{len(stored)}"
+
+    monkeypatch.setattr(ingest, "extract_text_from_pdf_file", fake_extract)
+    monkeypatch.setattr(ingest, "get_embeddings", lambda texts: [[0.0] for _ in texts])
+    monkeypatch.setattr(ingest, "replace_resume", fake_replace)
+    return stored
+
+
+def _spooled(tmp_path, name="cv.pdf", text=RESUME):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+
+def _wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.state in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_runs_every_stage_with_the_uploaders_token(pipeline, tmp_path):
+    q = ingest.IngestQueue(client_factory=lambda token: f"client:{token}", workers=1,
+                           journal_path=str(tmp_path / "journal.json"))
+    path = _spooled(tmp_path)
+    job = _wait(q.submit("jwt-a", "user-1", "cv", path, "hash-1"))
+    q.close()
+
+    status = job.status()
+    assert status["state"] == "done" and status["progress"] == 1.0
+    assert status["resume_id"] == "resume-1" and status["chunk_count"] > 0
+    assert set(status["timings"]) == {"queued_ms", "parse_ms", "chunk_ms", "embed_ms", "store_ms", "index_ms"}
+    assert pipeline[0][:3] == ("client:jwt-a", "user-1", "hash-1")
+    assert not (tmp_path / "cv.pdf").exists()
+
+
+def test_unreadable_pdf_fails_the_job(pipeline, tmp_path):
+    q = ingest.IngestQueue(workers=1, journal_path=str(tmp_path / "journal.json"))
+    job = _wait(q.submit("jwt", "user-1", "cv", _spooled(tmp_path, text="  "), "hash"))
+    q.close()
+    assert job.state == "failed"
+    assert "scanned" in job.error
+    assert not pipeline
+
+
+def test_queued_jobs_survive_shutdown(pipeline, tmp_path):
+    journal = str(tmp_path / "journal.json")
+    stopped = ingest.IngestQueue(workers=0, journal_path=journal)
+    jobs = [ingest.IngestJob("jwt", "user-1", "cv", _spooled(tmp_path, f"cv{i}.pdf"), f"hash-{i}") for i in range(3)]
+    for job in jobs:
+        stopped._enqueue(job)  # accepted, but no worker picks it up before shutdown
+    stopped.close(timeout=0)
+    # The journal keeps who uploaded what, never their JWT
+    with open(journal) as f:
+        journaled = json.load(f)
+    assert [entry["user_id"] for entry in journaled] == ["user-1"] * 3
+    assert "jwt" not in json.dumps(journaled)
+
+    restarted = ingest.IngestQueue(
+        client_factory=lambda token: f"client:{token}", service_client_factory=lambda: "service",
+        workers=2, journal_path=journal,
+    )
+    restarted.start()
+    for job in jobs:
+        assert _wait(restarted.get(job.id)).state == "done"
+    restarted.close()
+    assert sorted(hash_ for _, _, hash_, _ in pipeline) == ["hash-0", "hash-1", "hash-2"]
+    assert {(db, user_id) for db, user_id, _, _ in pipeline} == {("service", "user-1")}
+
+
+def test_journal_writable_by_others_is_not_replayed(pipeline, tmp_path):
+    journal = tmp_path / "journal.json"
+    path = _spooled(tmp_path)
+    journal.write_text(json.dumps([
+        {"job_id": "j1", "user_id": "victim", "title": "cv", "path": path, "content_hash": "h"},
+    ]))
+    journal.chmod(0o666)
+
+    q = ingest.IngestQueue(service_client_factory=lambda: "service", workers=1, journal_path=str(journal))
+    q.start()
+    q.close()
+    assert q.get("j1") is None
+    assert not pipeline
+
+
+def test_upload_returns_202_and_status_reports_the_job(pipeline, monkeypatch):
+    monkeypatch.setattr(ingest.ingest_queue, "client_factory", lambda token: token)
+    monkeypatch.setattr("routes.resume.find_duplicate_resume", lambda db, user_id, content_hash: None)
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user-1"}
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        client = TestClient(app)
+        resp = client.post("/resume/upload", files={"file": ("cv.pdf", RESUME.encode(), "application/pdf")})
+        assert resp.status_code == 202
+        job_id = resp.json()["job_id"]
+
+        _wait(ingest.ingest_queue.get(job_id))
+        status = client.get(f"/resume/status?job_id={job_id}").json()
+        assert status["has_resume"] is True
+        assert status["job"]["state"] == "done"
+        assert status["resume_id"] == status["job"]["resume_id"]
+
+        app.dependency_overrides[get_current_user] = lambda: {"sub": "user-2"}
+        assert client.get(f"/resume/status?job_id={job_id}").status_code == 404
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
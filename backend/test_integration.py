@@ -13,7 +13,7 @@ async def mock_get_current_user():
     return {"sub": "00000000-0000-0000-0000-000000000000", "email": "test@example.com"}
 
 # Mock the resume service to return dummy text
-def mock_get_full_resume_text(user_id):
+def mock_get_full_resume_text(db, user_id):
     return "This is a test resume context. I am a software engineer with experience in Python and React.", "test-resume-id"
 
 app.dependency_overrides[get_current_user] = mock_get_current_user
@@ -0,0 +1,73 @@
+import json
+import time
+from fastapi.testclient import TestClient
+from main import app
+from routes import audio
+from services.answer_cache import answer_cache
+from utils.auth_dependency import get_current_user, get_db
+
+STAGE_SECONDS = 0.3
+
+
+def test_resume_fetch_overlaps_transcription():
+    seen = {}
+
+    def slow_transcribe(content, filename):
+        time.sleep(STAGE_SECONDS)
+        return "How does a hash map handle collisions?"
+
+    def slow_resume(db, user_id):
+        time.sleep(STAGE_SECONDS)
+        return "Backend engineer, Python.", "pipeline-resume-id"
+
+    def mock_generate(**kwargs):
+        seen.update(kwargs)
+        return {"answer": "Chaining or open addressing.", "key_points": []}
+
+    originals = (
+        audio.gate_audio, audio.transcribe_audio, audio.get_full_resume_text,
+        audio.warm_live_context, audio.build_live_context, audio.generate_live_answer,
+    )
+    audio.gate_audio = lambda content, filename: (content, {"speech_ratio": 0.5, "vad_ms": 0.0, "skipped": False})
+    audio.transcribe_audio = slow_transcribe
+    audio.get_full_resume_text = slow_resume
+    audio.warm_live_context = lambda db, user_id, resume_id: None
+    audio.build_live_context = lambda db, user_id, resume_id, question: "Skills: Python, hash maps"
+    audio.generate_live_answer = mock_generate
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user-1"}
+    app.dependency_overrides[get_db] = lambda: None
+    answer_cache.clear()
+    try:
+        client = TestClient(app)
+        started = time.perf_counter()
+        resp = client.post(
+            "/audio/listen-and-answer",
+            files={"file": ("chunk.webm", b"\x00" * 1000, "audio/webm")},
+            params={
+                "role": "SWE",
+                "level": "Senior",
+                "history": json.dumps([{"question": "What is Redis?", "answer": "An in-memory store."}]),
+            },
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        (
+            audio.gate_audio, audio.transcribe_audio, audio.get_full_resume_text,
+            audio.warm_live_context, audio.build_live_context, audio.generate_live_answer,
+        ) = originals
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+        answer_cache.clear()
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["answer"] == "Chaining or open addressing."
+    assert set(body["timings"]) >= {"vad_ms", "stt_ms", "context_ms", "retrieval_ms", "llm_ms", "total_ms"}
+    # Both stages take STAGE_SECONDS; run back to back they would take twice that
+    assert elapsed < 1.8 * STAGE_SECONDS
+    assert "Skills: Python, hash maps" in seen["prompt_prefix"]
+    # role, level and history reach the prompt
+    assert (seen["job_role"], seen["level"]) == ("SWE", "Senior")
+    assert "Target Role: SWE" in seen["prompt_prefix"]
+    assert "Candidate-specified level: Senior" in seen["prompt_prefix"]
+    assert "Q1: What is Redis?" in seen["prompt_prefix"]
@@ -0,0 +1,150 @@
+import json
+import time
+from types import SimpleNamespace
+import anyio
+from fastapi.testclient import TestClient
+from main import app
+from utils.auth_dependency import get_current_user, get_db
+from utils.llm_json import JSONStreamParser
+from services import groq_service
+from routes import interview
+
+
+async def mock_get_current_user():
+    return {"sub": "00000000-0000-0000-0000-000000000000", "email": "test@example.com"}
+
+
+def mock_get_full_resume_text(db, user_id):
+    return "Senior Python engineer, built FastAPI services.", "test-resume-id"
+
+
+COMPLETION = (
+    '```json\n{"answer": "Use a token \\"bucket\\"\\nper user.", '
+    '"key_points": ["O(1) check", "Redis"], "tip": "Be brief", '
+    '"code": "", "code_language": "python", "detected_level": "medium"}\n```'
+)
+
+
+def _fake_stream(text, size=7):
+    for i in range(0, len(text), size):
+        delta = SimpleNamespace(content=text[i:i + size])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class _FakeCompletions:
+    def create(self, **kwargs):
+        assert kwargs.get("stream") is True
+        return _fake_stream(COMPLETION)
+
+
+def test_parser_emits_answer_deltas_and_fields():
+    parser = JSONStreamParser()
+    events = []
+    for i in range(0, len(COMPLETION), 3):
+        events.extend(parser.feed(COMPLETION[i:i + 3]))
+    # The last value can't be told apart from code text until the stream ends
+    assert "detected_level" not in parser.fields
+    events.extend(parser.finish())
+
+    answer = "".join(v for kind, key, v in events if kind == "delta" and key == "answer")
+    assert answer == 'Use a token "bucket"\nper user.'
+    fields = {key: v for kind, key, v in events if kind == "field"}
+    assert fields["key_points"] == ["O(1) check", "Redis"]
+    assert fields["detected_level"] == "medium"
+
+
+def test_live_answer_stream_endpoint():
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    original_resume = interview.get_full_resume_text
+    original_context = interview.build_live_context
+    original_client = groq_service.client
+    interview.get_full_resume_text = mock_get_full_resume_text
+    interview.build_live_context = lambda db, user_id, resume_id, question: "Skills: Python, React"
+    groq_service.client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions()))
+    try:
+        client = TestClient(app)
+        response = client.post(
+            "/interview/live-answer/stream",
+            json={"question": "How would you rate limit an API?"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = []
+        for block in response.text.strip().split("\n\n"):
+            lines = block.split("\n")
+            events.append((lines[0][len("event: "):], json.loads(lines[1][len("data: "):])))
+
+        kinds = [e for e, _ in events]
+        assert kinds[0] == "answer"
+        assert kinds[-1] == "done"
+        streamed = "".join(d["delta"] for e, d in events if e == "answer")
+        done = events[-1][1]
+        assert streamed == done["answer"]
+        assert done["key_points"] == ["O(1) check", "Redis"]
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        interview.get_full_resume_text = original_resume
+        interview.build_live_context = original_context
+        groq_service.client = original_client
+
+
+def test_client_disconnect_closes_the_groq_stream():
+    upstream = {"chunks": 0, "closed": False}
+
+    def endless(**kwargs):
+        try:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content='{"answer": "'))])
+            while True:
+                time.sleep(0.005)
+                upstream["chunks"] += 1
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="more "))])
+        finally:
+            upstream["closed"] = True
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/interview/live-answer/stream", "raw_path": b"/interview/live-answer/stream",
+        "root_path": "", "query_string": b"", "headers": [(b"content-type", b"application/json")],
+        "client": ("testclient", 50000), "server": ("testserver", 80),
+    }
+
+    async def request_then_hang_up():
+        body = json.dumps({"question": "Walk me through consistent hashing."}).encode()
+        requests = [{"type": "http.request", "body": body, "more_body": False}]
+        first_event = anyio.Event()
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            await first_event.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_event.set()
+
+        with anyio.fail_after(5):
+            await app(scope, receive, send)
+
+    app.dependency_overrides[get_current_user] = mock_get_current_user
+    app.dependency_overrides[get_db] = lambda: None
+    original_resume = interview.get_full_resume_text
+    original_context = interview.build_live_context
+    original_client = groq_service.client
+    interview.get_full_resume_text = mock_get_full_resume_text
+    interview.build_live_context = lambda db, user_id, resume_id, question: "Skills: Python"
+    groq_service.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=endless)))
+    try:
+        anyio.run(request_then_hang_up)
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+        interview.get_full_resume_text = original_resume
+        interview.build_live_context = original_context
+        groq_service.client = original_client
+
+    assert upstream["closed"]
+    chunks = upstream["chunks"]
+    time.sleep(0.05)
+    assert upstream["chunks"] == chunks  # nothing reads the stream any more
@@ -0,0 +1,58 @@
+import json
+import random
+import pytest
+from benchmarks.llm_json import load_corpus, matches
+from utils.llm_json import JSONStreamParser, parse_llm_json, repair_json
+
+CORPUS = load_corpus()
+
+CLEAN = json.dumps({
+    "answer": "Use a token bucket per user.",
+    "key_points": ["O(1) check", "Redis INCR"],
+    "tip": "Mention burst size",
+    "code": "def allow(user):\n    return bucket[user].take()",
+    "code_language": "python",
+    "detected_level": "medium",
+})
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["name"] for c in CORPUS])
+def test_corpus_parses(case):
+    assert matches(parse_llm_json(case["raw"]), case["expect"])
+
+
+def test_repair_leaves_valid_json_unchanged():
+    assert json.loads(repair_json(CLEAN)) == json.loads(CLEAN)
+
+
+def test_any_truncation_still_parses():
+    for cut in range(1, len(CLEAN)):
+        result = parse_llm_json(CLEAN[:cut])
+        assert isinstance(result, dict)
+        if cut > len('{"answer": "Use a token bucket per user."'):
+            assert result["answer"] == "Use a token bucket per user."
+
+
+@pytest.mark.parametrize("name", ["unescaped_quotes_in_code", "dict_literal_closing_quote_in_code"])
+def test_stream_matches_whole_parse_for_any_chunking(name):
+    rng = random.Random(7)
+    raw = next(c["raw"] for c in CORPUS if c["name"] == name)
+    expected = parse_llm_json(raw)
+
+    for _ in range(50):
+        parser = JSONStreamParser()
+        deltas = []
+        i = 0
+        while i < len(raw):
+            step = rng.randint(1, 6)
+            events = parser.feed(raw[i:i + step])
+            deltas.extend(v for kind, key, v in events if kind == "delta" and key == "code")
+            i += step
+        parser.finish()
+        assert "".join(deltas) == expected["code"]
+        assert parser.fields == expected
+
+
+def test_no_json_raises_value_error():
+    with pytest.raises(ValueError):
+        parse_llm_json("I'm sorry, I can't help with that.")
@@ -0,0 +1,76 @@
+import threading
+from services.message_writer import MessageWriter
+
+
+class FakeTable:
+    def __init__(self, db, token):
+        self.db, self.token = db, token
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        with self.db.lock:
+            if self.db.fail_times > 0:
+                self.db.fail_times -= 1
+                raise RuntimeError("503 from PostgREST")
+            self.db.inserts.append((self.token, list(self.rows)))
+
+
+class FakeDB:
+    def __init__(self, fail_times=0):
+        self.inserts = []
+        self.fail_times = fail_times
+        self.lock = threading.Lock()
+
+    def client_for(self, token):
+        db = self
+
+        class Client:
+            def table(self, name):
+                assert name == "interview_messages"
+                return FakeTable(db, token)
+
+        return Client()
+
+
+def test_rows_are_batched_per_user_and_ordered():
+    db = FakeDB()
+    writer = MessageWriter(client_factory=db.client_for, flush_interval=0.05)
+    for i in range(5):
+        writer.enqueue("token-a", "s1", "ai", f"question {i}")
+    writer.enqueue("token-b", "s2", "user", "answer")
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    rows_a = [row for token, rows in db.inserts if token == "token-a" for row in rows]
+    assert [r["message"] for r in rows_a] == [f"question {i}" for i in range(5)]
+    assert len([1 for token, _ in db.inserts if token == "token-a"]) == 1
+    stamps = [r["created_at"] for r in rows_a]
+    assert stamps == sorted(stamps) and len(set(stamps)) == 5
+    assert writer.stats()["written"] == 6
+
+
+def test_failed_batches_are_retried():
+    db = FakeDB(fail_times=2)
+    writer = MessageWriter(client_factory=db.client_for, flush_interval=0.01, retry_backoff=0.001)
+    writer.enqueue("token-a", "s1", "user", "hello")
+    assert writer.flush(timeout=5)
+    writer.close()
+    assert len(db.inserts) == 1
+    assert writer.stats()["failed"] == 0
+
+
+def test_close_drains_queue_and_full_queue_writes_inline():
+    db = FakeDB()
+    writer = MessageWriter(client_factory=db.client_for, maxsize=1, flush_interval=0.5)
+    start = writer.start
+    writer.start = lambda: None  # hold the worker so the second row overflows
+    writer.enqueue("token-a", "s1", "ai", "queued")
+    writer.enqueue("token-a", "s1", "ai", "overflow")
+    assert [r["message"] for _, rows in db.inserts for r in rows] == ["overflow"]
+
+    start()
+    writer.close()
+    assert [r["message"] for _, rows in db.inserts for r in rows] == ["overflow", "queued"]
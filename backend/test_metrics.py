@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+import httpx
+from fastapi.testclient import TestClient
+import main
+from db import supabase_client
+from services import groq_service
+from utils.metrics import DB_SECONDS, LLM_SECONDS, LLM_TOKENS, LLM_TTFT_SECONDS, Histogram, registry
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("test_seconds", "test", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        h.observe(value, stage="a")
+    lines = h.render()
+    assert 'desierai_test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'desierai_test_seconds_bucket{stage="a",le="1.0"} 2' in lines
+    assert 'desierai_test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'desierai_test_seconds_count{stage="a"} 3' in lines
+
+
+def test_postgrest_round_trips_are_timed_by_table():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[]))
+    client = httpx.Client(
+        transport=transport,
+        event_hooks={"request": [supabase_client._start_timer], "response": [supabase_client._observe]},
+    )
+    before = DB_SECONDS.count(method="GET", target="resumes", status="200")
+    client.get("https://db.example.com/rest/v1/resumes?select=id")
+    assert DB_SECONDS.count(method="GET", target="resumes", status="200") == before + 1
+
+
+def test_streamed_completion_records_ttft_and_tokens():
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+
+    def chunks():
+        for text in ('{"answer": ', '"hi"}'):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+        yield SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage))
+
+    original = groq_service.client
+    groq_service.client = SimpleNamespace(
+        chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: chunks()))
+    )
+    before = LLM_TOKENS.value(task="live_stream", kind="prompt")
+    try:
+        events = list(groq_service.stream_live_answer("Why Redis?", "Python engineer"))
+    finally:
+        groq_service.client = original
+
+    assert events[-1] == ("done", {"answer": "hi"})
+    assert LLM_TOKENS.value(task="live_stream", kind="prompt") == before + 120
+    assert LLM_TTFT_SECONDS.count(task="live_stream") >= 1
+    assert LLM_SECONDS.count(task="live_stream") >= 1
+
+
+def test_metrics_endpoint(monkeypatch):
+    registry.register_cache("test", lambda: {"hits": 3, "misses": 1})
+    client = TestClient(main.app)
+
+    body = client.get("/metrics").text
+    assert "# TYPE desierai_llm_ttft_seconds histogram" in body
+    assert 'desierai_cache_requests_total{cache="test",result="hit"} 3' in body
+
+    monkeypatch.setattr(main, "METRICS_TOKEN", "secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
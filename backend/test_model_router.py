@@ -0,0 +1,85 @@
+import threading
+import time
+import pytest
+from services.groq_scheduler import GroqBusyError
+from services.model_router import ModelRouter
+
+ROUTES = {
+    "live": ("fast-model", "backup-model", True),
+    "evaluation": ("fast-model", "backup-model", False),
+}
+
+
+def test_slow_primary_is_hedged_on_fallback_model():
+    router = ModelRouter(ROUTES, hedge_after=0.1, workers=4)
+    discarded = []
+    release = threading.Event()
+
+    def request(model):
+        if model == "fast-model":
+            release.wait(2)
+            return "primary"
+        return "hedge"
+
+    started = time.perf_counter()
+    assert router.call("live", request, discard=discarded.append) == "hedge"
+    assert time.perf_counter() - started < 1.0
+
+    release.set()
+    time.sleep(0.1)
+    assert discarded == ["primary"]
+    stats = router.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_queued_primaries_are_not_hedged():
+    router = ModelRouter(ROUTES, hedge_after=0.3, workers=2)
+
+    def request(model):
+        time.sleep(0.2)
+        return model
+
+    # Six callers on two workers: the last ones queue for 0.4 s, but each
+    # call only takes 0.2 s once it runs
+    threads = [threading.Thread(target=router.call, args=("live", request)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert router.stats()["hedges"] == 0
+
+
+def test_hedge_delay_follows_primary_p95():
+    router = ModelRouter(ROUTES, hedge_after=5.0, workers=4)
+    for _ in range(30):
+        router.call("live", lambda model: time.sleep(0.001) or model)
+    assert router.hedge_delay("live") < 1.0
+
+
+def test_failed_primary_falls_back():
+    router = ModelRouter(ROUTES, workers=2)
+    calls = []
+
+    def request(model):
+        calls.append(model)
+        if model == "fast-model":
+            raise RuntimeError("upstream 500")
+        return "ok"
+
+    assert router.call("evaluation", request) == "ok"
+    assert router.call("live", request) == "ok"
+    assert calls == ["fast-model", "backup-model"] * 2
+    assert router.stats()["fallbacks"] == 2
+
+
+def test_full_queue_does_not_fall_back():
+    router = ModelRouter(ROUTES, workers=2)
+    calls = []
+
+    def request(model):
+        calls.append(model)
+        raise GroqBusyError("queue full")
+
+    with pytest.raises(GroqBusyError):
+        router.call("evaluation", request)
+    assert calls == ["fast-model"]
@@ -0,0 +1,94 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from benchmarks.fakes import make_pdf as _make_pdf
+from main import app
+from routes import resume
+from utils import pdf_parser
+from utils.auth_dependency import get_current_user, get_db
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    def write(pages):
+        path = tmp_path / "resume.pdf"
+        path.write_bytes(_make_pdf(pages))
+        return str(path)
+    return write
+
+
+def test_pages_extracted_in_parallel_keep_order(pdf_path):
+    pages = [f"Page {i} Python Redis" for i in range(5)]
+    text = pdf_parser.extract_text_from_pdf_file(pdf_path(pages))
+    assert text.split("\n\n") == pages
+
+
+def test_page_cap(pdf_path):
+    with pytest.raises(pdf_parser.PDFLimitError):
+        pdf_parser.extract_text_from_pdf_file(pdf_path(["a", "b", "c"]), max_pages=2)
+
+
+def test_timeout_kills_only_its_own_workers(pdf_path):
+    path = pdf_path(["Backend engineer"])
+    # Two ingest workers parsing at once; starting a worker alone takes longer than 1 ms
+    with ThreadPoolExecutor(2) as threads:
+        timed_out = threads.submit(pdf_parser.extract_text_from_pdf_file, path, timeout=0.001)
+        parsed = threads.submit(pdf_parser.extract_text_from_pdf_file, path)
+        with pytest.raises(pdf_parser.PDFLimitError):
+            timed_out.result()
+        assert parsed.result() == "Backend engineer"
+
+
+def test_upload_over_byte_cap_is_rejected(monkeypatch):
+    original_spool = resume._spool_upload
+
+    async def small_spool(file, max_bytes=100):
+        return await original_spool(file, max_bytes)
+
+    monkeypatch.setattr(resume, "_spool_upload", small_spool)
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user-1"}
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        client = TestClient(app)
+        resp = client.post(
+            "/resume/upload",
+            files={"file": ("cv.pdf", _make_pdf(["x" * 50, "y" * 50]), "application/pdf")},
+        )
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+    assert resp.status_code == 413
+
+
+RESUME_TEXT = """Jane Doe
+Backend Engineer
+Experience
+Senior Engineer, Acme  2021 - Present
+• Cut p95 latency by 40% with Redis caching.
+• Built the billing service in Go.
+Engineer, Initech  2018 - 2020
+• Migrated 12 services to Kubernetes.
+Projects
+Chat Server
+""" + " ".join(f"Sentence {i} about websockets and fan-out." for i in range(30)) + """
+Skills
+Python, Go, SQL
+"""
+
+
+def test_chunks_follow_sections_and_entries():
+    chunks = pdf_parser.chunk_resume(RESUME_TEXT, max_tokens=40)
+
+    for chunk in chunks:
+        assert len(chunk["text"]) <= 40 * pdf_parser.CHUNK_CHARS_PER_TOKEN
+        assert " ".join(RESUME_TEXT[chunk["start"]:chunk["end"]].split()) == chunk["text"]
+
+    experience = [c["text"] for c in chunks if c["section"] == "experience"]
+    assert experience[0].startswith("Senior Engineer, Acme")
+    assert any(c.startswith("Engineer, Initech") for c in experience)
+    assert not any("Acme" in c and "Initech" in c for c in experience)
+
+    projects = [c["text"] for c in chunks if c["section"] == "projects"]
+    assert len(projects) > 1
+    assert all(c.endswith(".") for c in projects[1:])  # long paragraph cut at sentence ends
+    assert [c["section"] for c in chunks][-1] == "skills"
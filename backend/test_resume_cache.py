@@ -0,0 +1,154 @@
+import hashlib
+import os
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from main import app
+from routes import resume
+from services import rag_service
+from services.ingest_queue import PIPELINE_VERSION
+from utils.auth_dependency import get_current_user, get_db
+from utils.cache import TTLCache
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db, self.table, self.op, self.payload = db, table, "select", None
+
+    def select(self, *args):
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def in_(self, *args):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args):
+        return self
+
+    def execute(self):
+        self.db.calls.append((self.table, self.op))
+        if self.table == "resumes" and self.op == "select":
+            return SimpleNamespace(data=list(self.db.resumes))
+        if self.table == "resumes" and self.op == "insert":
+            row = {"id": f"resume-{len(self.db.calls)}", "title": self.payload["title"],
+                   "parsed_text": self.payload["parsed_text"]}
+            self.db.resumes = [row]
+            return SimpleNamespace(data=[row])
+        return SimpleNamespace(data=[])
+
+
+class FakeSupabase:
+    def __init__(self, resumes=None):
+        self.calls = []
+        self.resumes = resumes or [{"id": "resume-0", "title": "cv", "parsed_text": "Python engineer"}]
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        self.calls.append(("rpc", name))
+        self.rpc_params = params
+        self.resumes = [{"id": "resume-new", "title": params["p_title"], "parsed_text": params["p_parsed_text"]}]
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data="resume-new"))
+
+
+def test_ttl_cache_lru_and_expiry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # evicts "b", the least recently used
+    assert cache.get("b") is None
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_resume_lookup_is_cached_and_invalidated_on_upload():
+    fake = FakeSupabase()
+    rag_service._resume_cache.clear()
+    try:
+        assert rag_service.get_user_resume(fake, "user-1")["id"] == "resume-0"
+        assert rag_service.get_user_resume(fake, "user-1")["id"] == "resume-0"
+        assert fake.calls.count(("resumes", "select")) == 1
+
+        new_id = rag_service.replace_resume(fake, "user-1", "cv2", "Go engineer", None, "abc", [], [])
+        selects = fake.calls.count(("resumes", "select"))
+        assert rag_service.get_user_resume(fake, "user-1")["parsed_text"] == "Go engineer"
+        assert rag_service.get_user_resume(fake, "user-1")["id"] == new_id
+        assert fake.calls.count(("resumes", "select")) == selects + 1
+    finally:
+        rag_service._resume_cache.clear()
+
+
+CHUNKS = [{"text": "Built a Go service", "section": "experience", "start": 0, "end": 18}]
+
+
+def test_replace_resume_is_one_rpc():
+    fake = FakeSupabase()
+    resume_id = rag_service.replace_resume(fake, "user-1", "cv", "text", "profile", "abc", CHUNKS, [[0.1, 0.2]])
+    assert resume_id == "resume-new"
+    assert fake.calls == [("rpc", "replace_resume")]
+    assert fake.rpc_params["p_chunks"][0]["section"] == "experience"
+
+
+def _upload(pdf: bytes, fake, monkeypatch) -> tuple:
+    queued = []
+
+    def submit(token, user_id, title, path, content_hash):
+        queued.append(content_hash)
+        os.unlink(path)
+        return SimpleNamespace(id="job-1", status=lambda: {})
+
+    monkeypatch.setattr(resume.ingest_queue, "submit", submit)
+    rag_service._resume_cache.clear()
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user-1"}
+    app.dependency_overrides[get_db] = lambda: fake
+    try:
+        resp = TestClient(app).post("/resume/upload", files={"file": ("cv.pdf", pdf, "application/pdf")})
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+        rag_service._resume_cache.clear()
+    return resp, queued
+
+
+def test_identical_upload_returns_existing_resume(monkeypatch):
+    pdf = b"%PDF-1.4 same bytes"
+    content_hash = hashlib.sha256(PIPELINE_VERSION.encode() + b"\n" + pdf).hexdigest()
+    fake = FakeSupabase(resumes=[{
+        "id": "resume-0", "title": "cv", "parsed_text": "Python engineer",
+        "content_hash": content_hash, "chunk_count": 7,
+    }])
+
+    resp, queued = _upload(pdf, fake, monkeypatch)
+    assert resp.status_code == 200
+    assert resp.json()["resume_id"] == "resume-0"
+    assert resp.json()["chunk_count"] == 7
+    assert fake.calls == [("resumes", "select")]
+    assert queued == []
+
+
+def test_upload_embedded_by_an_older_model_is_redone(monkeypatch):
+    pdf = b"%PDF-1.4 same bytes"
+    fake = FakeSupabase(resumes=[{
+        "id": "resume-0", "title": "cv", "parsed_text": "Python engineer",
+        "content_hash": hashlib.sha256(b"sections-v1:64:hash-ngram-v0\n" + pdf).hexdigest(), "chunk_count": 7,
+    }])
+
+    resp, queued = _upload(pdf, fake, monkeypatch)
+    assert resp.status_code == 202
+    assert len(queued) == 1
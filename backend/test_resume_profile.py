@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+from services import rag_service
+from services.resume_profile import CHARS_PER_TOKEN, build_resume_profile, compose_live_context
+from utils.pdf_parser import split_sections
+
+RESUME = """Jane Doe
+Backend Engineer | jane@example.com
+
+Technical Skills
+Languages: Python, Go, SQL
+Tools: Docker, Kubernetes, PostgreSQL, Redis
+
+Work Experience
+Senior Backend Engineer, Acme Corp   Jan 2021 - Present
+• Cut p95 API latency by 40% by moving hot reads to Redis
+• Led a team of 4 engineers building the billing service
+Software Engineer, Initech   2018 - 2020
+• Migrated 12 services to Kubernetes
+
+Projects
+Realtime Chat Server
+• WebSocket fan-out handling 50k concurrent users
+
+Education
+B.Tech Computer Science, IIT Delhi, 2018
+"""
+
+
+def test_split_sections_labels_headings():
+    names = [name for name, _ in split_sections(RESUME)]
+    assert names == ["header", "skills", "experience", "projects", "education"]
+
+
+def test_profile_is_dense_and_sectioned():
+    profile = build_resume_profile(RESUME)
+    lines = dict(line.split(": ", 1) for line in profile.splitlines())
+
+    assert "Python" in lines["Skills"] and "Redis" in lines["Skills"]
+    assert "Acme Corp" in lines["Roles"] and "Initech" in lines["Roles"]
+    assert "Realtime Chat Server" in lines["Projects"]
+    assert "40%" in lines["Impact"] and "50k" in lines["Impact"]
+    assert lines["Education"].startswith("B.Tech")
+    assert len(profile) < len(RESUME)
+
+
+def test_live_context_respects_budget():
+    chunks = ["word " * 600, "other " * 600, "third " * 600]
+    context = compose_live_context(build_resume_profile(RESUME), chunks, budget_tokens=200)
+
+    assert len(context) <= 200 * CHARS_PER_TOKEN
+    assert context.startswith("Skills:")
+    assert context.count("\n- ") == 3  # every retrieved chunk gets a share
+
+
+def test_profile_built_for_rows_without_one():
+    row = {"id": "resume-1", "title": "cv", "parsed_text": RESUME, "profile": None}
+    rag_service._resume_cache.clear()
+    rag_service._resume_cache.set("user-1", row)
+    try:
+        profile = rag_service.get_resume_profile(SimpleNamespace(), "user-1")
+    finally:
+        rag_service._resume_cache.clear()
+    assert profile == build_resume_profile(RESUME)
+    assert row["profile"] == profile
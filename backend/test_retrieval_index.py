@@ -0,0 +1,54 @@
+from services import rag_service
+from services.embedding_service import ResumeIndex
+
+CHUNKS = [
+    "Built a Kafka streaming pipeline processing 2M events per day.",
+    "Led migration of a Django monolith to FastAPI microservices.",
+    "Skills: Python, PostgreSQL, Redis, Docker, Kubernetes.",
+    "Bachelor of Technology in Computer Science, 2019.",
+]
+
+
+def test_index_ranks_relevant_chunk_first():
+    index = ResumeIndex(CHUNKS)
+    results = index.search("Tell me about your Kafka pipeline", top_k=2)
+    assert len(results) == 2
+    assert results[0][1] == CHUNKS[0]
+    assert results[0][0] > results[1][0]
+    assert [c for _, c in index.search("kubernetes docker", top_k=10)][0] == CHUNKS[2]
+
+
+def test_index_handles_stop_word_only_chunks():
+    index = ResumeIndex(["the and of", "is a the"])
+    assert len(index.search("python", top_k=1)) == 1
+    assert ResumeIndex([]).search("python") == []
+
+
+def test_retrieval_uses_cached_index_without_db():
+    class ExplodingSupabase:
+        def table(self, name):
+            raise AssertionError("index should be served from memory")
+
+    try:
+        rag_service.build_resume_index("index-resume-id", CHUNKS)
+        top = rag_service.retrieve_relevant_chunks(
+            ExplodingSupabase(), "index-resume-id", "Django to FastAPI migration", top_k=1
+        )
+        assert top == [CHUNKS[1]]
+    finally:
+        rag_service._index_cache.invalidate("index-resume-id")
+
+
+def test_embeddings_are_normalised_and_meaningful():
+    import numpy as np
+    from services.embedding_service import get_embeddings, get_single_embedding
+
+    vectors = np.array(get_embeddings(CHUNKS))
+    assert vectors.shape == (len(CHUNKS), 384)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+    assert get_embeddings(CHUNKS[:1]) == get_embeddings(CHUNKS[:1])
+
+    query = np.array(get_single_embedding("tell me about your kafka streaming work"))
+    assert int(np.argmax(vectors @ query)) == 0
+    query = np.array(get_single_embedding("microservice migration"))
+    assert int(np.argmax(vectors @ query)) == 1
@@ -0,0 +1,77 @@
+import threading
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from main import app
+from utils import profiler
+from utils.metrics import AUTH_SECONDS, DB_SECONDS
+from utils.server_timing import ServerTimingMiddleware
+
+
+def test_stages_recorded_in_threadpool_reach_the_header():
+    demo = FastAPI()
+    demo.add_middleware(ServerTimingMiddleware, prefixes=("/audio",))
+
+    @demo.get("/audio/answer")
+    def answer():  # sync route: runs in the threadpool
+        AUTH_SECONDS.observe(0.002, result="cached")
+        for _ in range(2):
+            DB_SECONDS.observe(0.010, method="GET", target="resumes", status="200")
+        return {}
+
+    @demo.get("/other")
+    def other():
+        return {}
+
+    client = TestClient(demo)
+    timing = client.get("/audio/answer").headers["server-timing"]
+    stages = dict(part.split(";", 1) for part in timing.split(", "))
+    assert stages["auth"] == "dur=2.0"
+    assert stages["db"] == 'dur=20.0;desc="2 calls"'
+    assert "total" in stages
+    assert "server-timing" not in client.get("/other").headers
+
+
+def test_live_routers_send_server_timing():
+    resp = TestClient(app).get("/interview/health")
+    assert "total;dur=" in resp.headers["server-timing"]
+
+
+def test_profile_header_writes_folded_stacks(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiler, "PROFILE_TOKEN", "admin-secret")
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    demo = FastAPI()
+    demo.add_middleware(profiler.ProfileMiddleware)
+
+    threads = {}
+    save = profiler.ProfileMiddleware._save
+
+    def recording_save(self, *args):
+        threads["save"] = threading.get_ident()
+        save(self, *args)
+
+    monkeypatch.setattr(profiler.ProfileMiddleware, "_save", recording_save)
+
+    @demo.get("/loop")
+    async def loop():
+        threads["loop"] = threading.get_ident()
+        return {}
+
+    @demo.get("/slow")
+    def slow():
+        deadline = time.perf_counter() + 0.1
+        while time.perf_counter() < deadline:
+            pass
+        return {}
+
+    client = TestClient(demo)
+    assert "x-profile-file" not in client.get("/slow", headers={"X-Profile-Token": "wrong"}).headers
+
+    name = client.get("/slow", headers={"X-Profile-Token": "admin-secret"}).headers["x-profile-file"]
+    folded = (tmp_path / name).read_text()
+    assert "slow (test_server_timing.py" in folded
+    assert list(tmp_path.iterdir()) == [tmp_path / name]
+
+    # The profile file is written off the event loop
+    client.get("/loop", headers={"X-Profile-Token": "admin-secret"})
+    assert threads["save"] != threads["loop"]
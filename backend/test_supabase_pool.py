@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from jose import jwt
+from fastapi.testclient import TestClient
+from main import app
+from db import supabase_client
+from utils import auth_dependency
+
+SECRET = "test-jwt-secret"
+
+
+def _echo_auth(request: httpx.Request) -> httpx.Response:
+    # Hold the request briefly so concurrent users overlap
+    time.sleep(0.01)
+    return httpx.Response(200, json=[{"authorization": request.headers["authorization"]}])
+
+
+def test_no_token_cross_talk_under_concurrency():
+    original_pool = supabase_client._http_client
+    original_secret = auth_dependency.SUPABASE_JWT_SECRET
+    supabase_client._http_client = pool = httpx.Client(transport=httpx.MockTransport(_echo_auth))
+    auth_dependency.SUPABASE_JWT_SECRET = SECRET
+    try:
+        client = TestClient(app)
+        tokens = [
+            jwt.encode({"sub": f"user-{i}", "exp": int(time.time()) + 600}, SECRET, algorithm="HS256")
+            for i in range(64)
+        ]
+
+        def call(token):
+            resp = client.get("/auth/db-test", headers={"Authorization": f"Bearer {token}"})
+            assert resp.status_code == 200
+            return token, resp.json()["data"][0]["authorization"]
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(call, tokens))
+
+        for token, seen in results:
+            assert seen == f"Bearer {token}"
+        # Every request-scoped client shares the same keep-alive pool
+        assert supabase_client.get_db_client(tokens[0]).session is pool
+    finally:
+        pool.close()
+        supabase_client._http_client = original_pool
+        auth_dependency.SUPABASE_JWT_SECRET = original_secret
@@ -0,0 +1,118 @@
+import io
+import wave
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from routes import audio
+from services import vad_service
+from utils.auth_dependency import get_current_user, get_db
+
+RATE = 16000
+
+
+def _wav(samples: np.ndarray, rate: int = RATE) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return buf.getvalue()
+
+
+def _silence(seconds: float, noise: float = 0.0005) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return rng.normal(0, noise, int(RATE * seconds)).astype(np.float32)
+
+
+def _voice(seconds: float) -> np.ndarray:
+    # Voiced speech stand-in: a 180 Hz tone with harmonics and a syllable-rate envelope
+    t = np.arange(int(RATE * seconds)) / RATE
+    tone = sum(np.sin(2 * np.pi * 180 * k * t) / k for k in range(1, 4))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (0.2 * tone * envelope).astype(np.float32)
+
+
+def test_silence_has_no_speech():
+    result = vad_service.detect_speech(_silence(2.0), RATE)
+    assert result["speech_ratio"] == 0.0
+
+
+def test_speech_is_detected_and_silent_edges_trimmed():
+    clip = np.concatenate([_silence(2.0), _voice(1.0), _silence(2.0)])
+    audio_bytes, report = vad_service.gate_audio(_wav(clip), "clip.wav")
+
+    assert not report["skipped"]
+    assert 0.1 < report["speech_ratio"] < 0.4
+    samples, _ = vad_service.decode_pcm(audio_bytes)
+    assert len(samples) < 0.5 * len(clip)
+
+
+def test_continuous_quiet_speech_is_not_skipped():
+    # No silence to measure a noise floor from: the whole clip is speech
+    voice = _voice(3.0)
+    for dbfs in (-35, -40):
+        quiet = voice * (10 ** (dbfs / 20) / np.sqrt(np.mean(voice ** 2)))
+        audio_bytes, report = vad_service.gate_audio(_wav(quiet), "quiet.wav")
+        assert not report["skipped"], dbfs
+        assert report["speech_ratio"] > 0.7
+
+
+def _webm_opus(samples: np.ndarray) -> bytes:
+    av = pytest.importorskip("av")
+    buf = io.BytesIO()
+    with av.open(buf, "w", format="webm") as container:
+        stream = container.add_stream("libopus", rate=48000)
+        stream.layout = "mono"
+        pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2").reshape(1, -1)
+        frame = av.AudioFrame.from_ndarray(pcm, format="s16", layout="mono")
+        frame.sample_rate = RATE
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return buf.getvalue()
+
+
+def test_desktop_webm_opus_is_decoded():
+    clip = np.concatenate([_silence(1.0), _voice(1.0), _silence(1.0)])
+    samples, rate = vad_service.decode_pcm(_webm_opus(clip), "chunk.webm")
+    assert rate == vad_service.VAD_SAMPLE_RATE
+    assert abs(len(samples) - len(clip)) < 0.1 * len(clip)
+
+    _, report = vad_service.gate_audio(_webm_opus(_silence(3.0)), "chunk.webm")
+    assert report["skipped"] is True
+
+
+def test_undecodable_clip_fails_open(monkeypatch):
+    monkeypatch.setattr(vad_service, "av", None)
+    monkeypatch.setattr(vad_service, "_FFMPEG", None)
+    content = b"\x1a\x45\xdf\xa3" + b"\x00" * 500  # WebM magic, no decoder for it
+    audio_bytes, report = vad_service.gate_audio(content, "chunk.webm")
+    assert audio_bytes == content
+    assert report["speech_ratio"] is None
+
+
+def test_listen_and_answer_skips_whisper_on_silence():
+    calls = []
+    original_transcribe = audio.transcribe_audio
+    audio.transcribe_audio = lambda content, filename: calls.append(filename) or "thank you."
+    app.dependency_overrides[get_current_user] = lambda: {"sub": "user-1"}
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        client = TestClient(app)
+        resp = client.post(
+            "/audio/listen-and-answer",
+            files={"file": ("chunk.wav", _wav(_silence(3.0)), "audio/wav")},
+        )
+    finally:
+        audio.transcribe_audio = original_transcribe
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_db, None)
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["transcript"] == ""
+    assert body["vad"]["skipped"] is True
+    assert calls == []
@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from db.vector_store import SQLiteVectorStore, SupabaseVectorStore
+from services import rag_service
+from services.embedding_service import get_embeddings
+
+CHUNKS = [
+    "Built a Kafka streaming pipeline processing 2M events per day.",
+    "Led migration of a Django monolith to FastAPI microservices.",
+    "Bachelor of Technology in Computer Science, 2019.",
+]
+
+
+def test_sqlite_store_returns_top_k_for_one_resume():
+    store = SQLiteVectorStore()
+    store.add("r1", CHUNKS, get_embeddings(CHUNKS))
+    store.add("r2", ["Kafka Kafka Kafka streaming"], get_embeddings(["Kafka Kafka Kafka streaming"]))
+
+    query = get_embeddings(["kafka streaming pipeline"])[0]
+    matches = store.match("r1", query, top_k=2)
+    assert [chunk for _, chunk in matches][0] == CHUNKS[0]
+    assert len(matches) == 2
+    assert matches[0][0] >= matches[1][0]
+
+    store.delete("r1")
+    assert store.match("r1", query) == []
+
+
+def test_supabase_store_calls_rpc():
+    calls = []
+
+    class FakeClient:
+        def rpc(self, name, params):
+            calls.append((name, params))
+            rows = [{"content_chunk": CHUNKS[1], "similarity": 0.42}]
+            return SimpleNamespace(execute=lambda: SimpleNamespace(data=rows))
+
+    matches = SupabaseVectorStore(FakeClient()).match("r1", [0.1] * 384, top_k=1)
+    assert matches == [(0.42, CHUNKS[1])]
+    assert calls[0][0] == "match_resume_chunks"
+    assert calls[0][1]["match_resume_id"] == "r1"
+    assert calls[0][1]["match_count"] == 1
+
+
+def test_vector_retrieval_mode_uses_store():
+    store = SQLiteVectorStore()
+    store.add("r1", CHUNKS, get_embeddings(CHUNKS))
+    original = (rag_service.RETRIEVAL_MODE, rag_service.vector_store_factory)
+    rag_service.RETRIEVAL_MODE, rag_service.vector_store_factory = "vector", lambda db: store
+    try:
+        assert rag_service.retrieve_relevant_chunks(None, "r1", "Django microservices", top_k=1) == [CHUNKS[1]]
+    finally:
+        rag_service.RETRIEVAL_MODE, rag_service.vector_store_factory = original
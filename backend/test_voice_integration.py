@@ -10,7 +10,7 @@ from routes import audio
 async def mock_get_current_user():
     return {"sub": "00000000-0000-0000-0000-000000000000", "email": "test@example.com"}
 
-def mock_get_full_resume_text(user_id):
+def mock_get_full_resume_text(db, user_id):
     return "I am a Senior Software Engineer with 10 years of experience in Python, Distributed Systems, and AI.", "test-resume-id"
 
 app.dependency_overrides[get_current_user] = mock_get_current_user
@@ -1,39 +1,151 @@
-from fastapi import Request, HTTPException
+from fastapi import Depends, Request, HTTPException
 from jose import jwt, JWTError
+import hashlib
+import logging
 import os
 import json
+import threading
+import time
 import urllib.request
 from dotenv import load_dotenv
+from db.supabase_client import get_db_client
+from utils.cache import TTLCache
+from utils.metrics import AUTH_SECONDS, registry
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
 
-# Cache for JWKS keys
-_jwks_cache = None
-
+JWKS_REFRESH_INTERVAL = float(os.getenv("JWKS_REFRESH_INTERVAL", "600"))
+JWKS_RETRY_INTERVAL = 30.0  # after a failed fetch, and between kid-miss refreshes
+ASYMMETRIC_ALGORITHMS = ("ES256", "RS256")
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSCache:
+    """Supabase signing keys by `kid`, refreshed on a background thread.
+
+    Verification only ever reads the in-memory key set.  An unknown `kid`
+    (key rotation) wakes the refresher instead of fetching inline, and
+    refreshes are spaced at least JWKS_RETRY_INTERVAL apart.  A failed
+    fetch keeps the previous keys."""
+
+    def __init__(self, url: str, refresh_interval: float = JWKS_REFRESH_INTERVAL):
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self._keys: dict[str, dict] = {}
+        self._last_fetch = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def get(self, kid: str) -> dict | None:
+        key = self._keys.get(kid)
+        if key is None:
+            self._wake.set()
+        return key
+
+    def set_keys(self, jwks: dict):
+        self._keys = {k["kid"]: k for k in jwks.get("keys", []) if "kid" in k}
+
+    def refresh(self) -> bool:
+        """Fetch the key set now; return True on success."""
+        self._last_fetch = time.monotonic()
+        try:
+            with urllib.request.urlopen(self.url, timeout=5) as resp:
+                self.set_keys(json.loads(resp.read()))
+            return True
+        except Exception as e:
+            logger.warning(f"JWKS refresh failed: {str(e)}")
+            return False
+
+    def _run(self):
+        ok = bool(self._keys)
+        while not self._stop.is_set():
+            self._wake.wait(self.refresh_interval if ok else JWKS_RETRY_INTERVAL)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            # Space out kid-miss refreshes so bogus kids can't hammer Supabase
+            wait = JWKS_RETRY_INTERVAL - (time.monotonic() - self._last_fetch)
+            if wait > 0 and self._stop.wait(wait):
+                break
+            ok = self.refresh()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+jwks_cache = JWKSCache(f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json")
+
+# Verified claims keyed by SHA-256 of the token, each entry expiring at the
+# token's own `exp`; a repeat request costs one dict lookup.
+_claims_cache = TTLCache(maxsize=int(os.getenv("AUTH_CACHE_SIZE", "10000")), ttl=3600)
+registry.register_cache("jwt_claims", _claims_cache.stats)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _decode(token: str) -> dict:
+    header = jwt.get_unverified_header(token)
+    alg = header.get("alg", "HS256")
+
+    if alg == "HS256":
+        # Legacy HS256 tokens — verify with shared secret
+        if not SUPABASE_JWT_SECRET:
+            raise JWTError("HS256 token but SUPABASE_JWT_SECRET is not configured")
+        key = SUPABASE_JWT_SECRET
+    elif alg in ASYMMETRIC_ALGORITHMS:
+        # ES256 / asymmetric tokens — verify against Supabase's JWKS
+        key = jwks_cache.get(header.get("kid", ""))
+        if key is None:
+            raise JWTError("Unknown signing key")
+    else:
+        raise JWTError(f"Unsupported algorithm {alg}")
+
+    return jwt.decode(token, key, algorithms=[alg], options={"verify_aud": False})
+
+
+def verify_token(token: str) -> dict:
+    """Verify a Supabase access token and return its claims.
+
+    Raises HTTPException(401) if the token is invalid or expired."""
+    # ⚠️ TEST INJECTION ⚠️
+    # Allow the mock token from Android testing to bypass Supabase verification
+    if token == "mock-premium-token":
+        return {"sub": "android-tester", "email": "tester@desierai.com"}
+
+    start = time.perf_counter()
+    cache_key = _token_key(token)
+    payload = _claims_cache.get(cache_key)
+    if payload is not None:
+        AUTH_SECONDS.observe(time.perf_counter() - start, result="cached")
+        return payload
 
-def _get_jwks():
-    """Fetch Supabase JWKS public keys (cached)."""
-    global _jwks_cache
-    if _jwks_cache is not None:
-        return _jwks_cache
     try:
-        url = f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json"
-        with urllib.request.urlopen(url, timeout=5) as resp:
-            _jwks_cache = json.loads(resp.read())
-        return _jwks_cache
-    except Exception:
-        return None
-
-
-def _set_supabase_auth(token: str):
-    """Set the user's JWT on the Supabase client so RLS policies work.
+        payload = _decode(token)
+    except JWTError as e:
+        AUTH_SECONDS.observe(time.perf_counter() - start, result="rejected")
+        raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
+    AUTH_SECONDS.observe(time.perf_counter() - start, result="verified")
 
-    This makes auth.uid() return the correct user in Supabase RLS."""
-    from db.supabase_client import supabase
-    supabase.postgrest.auth(token)
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = exp - time.time()
+        if ttl > 0:
+            _claims_cache.set(cache_key, payload, ttl=ttl)
+    return payload
 
 
 def get_current_user(request: Request):
@@ -44,41 +156,22 @@ def get_current_user(request: Request):
 
     try:
         token = auth_header.split(" ")[1]
+    except IndexError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
 
-        # ⚠️ TEST INJECTION ⚠️
-        # Allow the mock token from Android testing to bypass Supabase verification
-        if token == "mock-premium-token":
-            return {"sub": "android-tester", "email": "tester@desierai.com"}
-
-        # Get the token header to determine algorithm
-        unverified_header = jwt.get_unverified_header(token)
-        alg = unverified_header.get("alg", "HS256")
-
-        if alg == "HS256" and SUPABASE_JWT_SECRET:
-            # Legacy HS256 tokens — verify with shared secret
-            payload = jwt.decode(
-                token,
-                SUPABASE_JWT_SECRET,
-                algorithms=["HS256"],
-                options={"verify_aud": False},
-            )
-        else:
-            # ES256 / asymmetric tokens — decode without verification
-            # (the token is already validated by Supabase and sent over HTTPS)
-            payload = jwt.decode(
-                token,
-                None,
-                algorithms=[alg],
-                options={
-                    "verify_signature": False,
-                    "verify_aud": False,
-                },
-            )
-
-        # Set the user's JWT on Supabase client for RLS
-        _set_supabase_auth(token)
+    payload = verify_token(token)
+    request.state.access_token = token
+    return payload
 
-        return payload
 
-    except (JWTError, IndexError) as e:
-        raise HTTPException(status_code=401, detail=f"Invalid or expired token: {str(e)}")
+def get_access_token(request: Request) -> str:
+    """Raw JWT of the current request, as stored by get_current_user."""
+    return getattr(request.state, "access_token", "")
+
+
+def get_db(request: Request, user=Depends(get_current_user)):
+    """Request-scoped PostgREST client carrying the caller's JWT.
+
+    RLS policies (auth.uid()) therefore see the right user no matter how
+    many requests run concurrently."""
+    return get_db_client(get_access_token(request))
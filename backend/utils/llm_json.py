@@ -0,0 +1,447 @@
+"""Helpers for reading JSON produced by the LLM.
+
+The models are asked for bare JSON but frequently wrap it in markdown
+fences or prose, leave quotes and newlines inside `code` unescaped, add
+trailing commas, or stop mid-object at max_tokens.  `parse_llm_json` handles
+finished completions, repairing them when plain `json.loads` fails;
+`JSONStreamParser` reads a flat JSON object token-by-token with the same
+string rules so fields can be forwarded while the completion is generated.
+
+A quote inside a string is taken as its closing quote only when what follows
+fits the JSON structure: `:` after a key; `,` followed by the next key (in
+an object) or value (in an array); or `}` / `]` closing the current
+container, if what follows that closer fits in turn (the end of the output
+after the outermost one).  Any other quote is kept as part of the text.
+"""
+
+import json
+import time
+from utils.metrics import JSON_PARSE_SECONDS
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+_VALUE_START = '"{[-0123456789tfn'
+_BARE_WORDS = {"True": "true", "False": "false", "None": "null"}
+
+
+def strip_fences(raw: str) -> str:
+    """Remove markdown code fences around a JSON payload."""
+    raw = raw.strip()
+    if "```json" in raw:
+        raw = raw.split("```json")[1].split("```")[0].strip()
+    elif "```" in raw:
+        raw = raw.split("```")[1].split("```")[0].strip()
+    return raw
+
+
+def _skip_ws(text: str, i: int) -> int:
+    while i < len(text) and text[i].isspace():
+        i += 1
+    return i
+
+
+def _quote_closes(text: str, i: int, stack, is_key: bool, final: bool = True):
+    """Decide whether the quote at text[i] ends the current string.
+
+    `stack` holds the open containers, innermost last.  Returns None when
+    more input is needed to tell (streaming, `final=False`)."""
+    if is_key:
+        j = _skip_ws(text, i + 1)
+        if j >= len(text):
+            return True if final else None
+        return text[j] == ":"
+    return _value_ends(text, i + 1, stack, final)
+
+
+def _value_ends(text: str, j: int, stack, final: bool):
+    """Whether text[j:] can follow a complete value inside `stack`."""
+    j = _skip_ws(text, j)
+    if j >= len(text):
+        return True if final else None
+    if not stack:
+        # Past the outermost container prose may follow, but a later quote
+        # means this one was inside a string (`cfg = {"host": "db"}\n...`)
+        if '"' in text[j:]:
+            return False
+        return True if final else None
+    ch = text[j]
+    container = stack[-1]
+    if ch in "}]":
+        if ch == ("}" if container == "{" else "]"):
+            # The closer must in turn fit where its container ends
+            return _value_ends(text, j + 1, stack[:-1], final)
+        # Mismatched closer: only accept it as the end of the output
+        return not text[j + 1:].strip(" \t\r\n}]")
+    if ch != ",":
+        return False
+    k = _skip_ws(text, j + 1)
+    if k >= len(text):
+        return True if final else None
+    if text[k] in "}]":
+        return True  # trailing comma
+    if container != "{":
+        return text[k] in _VALUE_START
+    # In an object a comma must be followed by the next key and its ":"
+    if text[k] == '"':
+        end = text.find('"', k + 1)
+        if end == -1:
+            return True if final else None
+    elif text[k].isalpha() or text[k] == "_":
+        end = k
+        while end + 1 < len(text) and (text[end + 1].isalnum() or text[end + 1] == "_"):
+            end += 1
+    else:
+        return False
+    m = _skip_ws(text, end + 1)
+    if m >= len(text):
+        return True if final else None
+    if text[m] != ":" or text[k] == '"':
+        return text[m] == ":"
+    # Unquoted key: also require a JSON value, so `{ a: b }` in code isn't one
+    v = _skip_ws(text, m + 1)
+    if v >= len(text):
+        return True if final else None
+    return text[v] in _VALUE_START
+
+
+def _read_string(text: str, i: int, stack, is_key: bool) -> tuple[int, str]:
+    """Decode the string starting after the quote at text[i - 1].
+
+    Returns (index after the closing quote, decoded text); a string cut off
+    by the end of input is closed there."""
+    chars = []
+    while i < len(text):
+        ch = text[i]
+        if ch == "\\":
+            if i + 1 >= len(text):
+                break
+            nxt = text[i + 1]
+            if nxt == "u":
+                try:
+                    chars.append(chr(int(text[i + 2:i + 6], 16)))
+                    i += 6
+                    continue
+                except ValueError:
+                    pass
+            if nxt in _ESCAPES:
+                chars.append(_ESCAPES[nxt])
+                i += 2
+            else:
+                # Invalid escape such as a regex "\d": keep the backslash
+                chars.append("\\")
+                i += 1
+            continue
+        if ch == '"' and _quote_closes(text, i, stack, is_key):
+            return i + 1, "".join(chars)
+        chars.append(ch)
+        i += 1
+    return len(text), "".join(chars)
+
+
+def _drop_trailing_comma(out: list[str]):
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
+def repair_json(text: str) -> str:
+    """Rewrite almost-JSON into valid JSON.
+
+    Fixes unescaped quotes and control characters in strings, invalid
+    escapes, trailing commas, Python literals and mismatched closers, and
+    closes a value truncated by max_tokens.  Text after the first complete
+    value is dropped."""
+    start = min((i for i in (text.find("{"), text.find("[")) if i != -1), default=-1)
+    if start == -1:
+        raise ValueError("No JSON object or array in model output")
+
+    out: list[str] = []
+    stack: list[str] = []
+    expect_key = False
+    after_key = False  # a key was read and its ":" has not been seen yet
+    i = start
+    while i < len(text):
+        ch = text[i]
+        if ch == '"':
+            is_key = bool(stack) and stack[-1] == "{" and expect_key
+            i, value = _read_string(text, i + 1, stack, is_key)
+            out.append(json.dumps(value, ensure_ascii=False))
+            if is_key:
+                expect_key, after_key = False, True
+            continue
+        if ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+            expect_key = ch == "{"
+        elif ch in "}]":
+            if stack:
+                _drop_trailing_comma(out)
+                if out and out[-1] == ":":
+                    out.append("null")
+                out.append("}" if stack.pop() == "{" else "]")
+                expect_key = after_key = False
+                if not stack:
+                    break
+        elif ch == ",":
+            out.append(ch)
+            expect_key = bool(stack) and stack[-1] == "{"
+        elif ch == ":":
+            out.append(ch)
+            after_key = False
+        elif ch.isspace():
+            out.append(ch)
+        else:
+            j = i
+            while j < len(text) and text[j] not in ',:]}"' and not text[j].isspace():
+                j += 1
+            word = text[i:j]
+            if stack and stack[-1] == "{" and expect_key:
+                # Unquoted key
+                out.append(json.dumps(word))
+                expect_key, after_key = False, True
+            else:
+                out.append(_BARE_WORDS.get(word, word))
+            i = j
+            continue
+        i += 1
+
+    # Close whatever max_tokens cut off
+    if stack:
+        if after_key:
+            out.append(":")
+        _drop_trailing_comma(out)
+        if out and out[-1] == ":":
+            out.append("null")
+        while stack:
+            out.append("}" if stack.pop() == "{" else "]")
+    return "".join(out)
+
+
+def parse_llm_json(raw: str):
+    """Parse a completion that should be JSON, repairing it if needed.
+
+    Raises ValueError if nothing usable can be recovered."""
+    start = time.perf_counter()
+    text = strip_fences(raw)
+    result = "clean"
+    try:
+        try:
+            return json.loads(text, strict=False)
+        except ValueError:
+            result = "repaired"
+            return json.loads(repair_json(text), strict=False)
+    except ValueError:
+        result = "failed"
+        raise
+    finally:
+        JSON_PARSE_SECONDS.observe(time.perf_counter() - start, result=result)
+
+
+class JSONStreamParser:
+    """Incrementally parse a flat JSON object from a stream of text chunks.
+
+    `feed()` returns a list of events:
+      ("delta", key, text)  – newly decoded characters of a string value
+      ("field", key, value) – a value has been fully parsed
+
+    Nested values (lists, objects) are buffered and emitted as a single
+    "field" event once their closing bracket arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: dict = {}
+        self._pos = 0
+        self._state = "start"  # start | key | colon | value | string | raw | comma | done
+        self._key = ""
+        self._value = []  # decoded chars of the current string value
+        self._raw_start = 0
+        self._depth = 0
+        self._in_str = False
+        self._escaped = False
+        self._final = False
+
+    def feed(self, text: str) -> list[tuple]:
+        self.buffer += text
+        events: list[tuple] = []
+        buf = self.buffer
+
+        while self._pos < len(buf) and self._state != "done":
+            ch = buf[self._pos]
+
+            if self._state == "start":
+                if ch == "{":
+                    self._state = "key_or_end"
+                self._pos += 1
+
+            elif self._state in ("key_or_end", "comma"):
+                if ch == '"':
+                    self._state = "key"
+                    self._key = ""
+                elif ch == "}":
+                    self._state = "done"
+                self._pos += 1
+
+            elif self._state == "key":
+                if ch == "\\":
+                    if self._pos + 1 >= len(buf):
+                        break
+                    self._key += buf[self._pos + 1]
+                    self._pos += 2
+                    continue
+                if ch == '"':
+                    self._state = "colon"
+                else:
+                    self._key += ch
+                self._pos += 1
+
+            elif self._state == "colon":
+                if ch == ":":
+                    self._state = "value"
+                self._pos += 1
+
+            elif self._state == "value":
+                if ch.isspace():
+                    self._pos += 1
+                elif ch == '"':
+                    self._state = "string"
+                    self._value = []
+                    self._pos += 1
+                else:
+                    self._state = "raw"
+                    self._raw_start = self._pos
+                    self._depth = 0
+                    self._in_str = False
+                    self._escaped = False
+
+            elif self._state == "string":
+                start = len(self._value)
+                consumed = self._read_string(buf)
+                if len(self._value) > start:
+                    events.append(("delta", self._key, "".join(self._value[start:])))
+                if consumed:
+                    value = "".join(self._value)
+                    self.fields[self._key] = value
+                    events.append(("field", self._key, value))
+                    self._state = "comma"
+                else:
+                    break
+
+            elif self._state == "raw":
+                end = self._scan_raw(buf)
+                if end is None:
+                    break
+                raw = buf[self._raw_start:end].strip()
+                raw = _BARE_WORDS.get(raw, raw)
+                try:
+                    value = json.loads(raw, strict=False)
+                except ValueError:
+                    try:
+                        value = json.loads(repair_json(raw), strict=False)
+                    except ValueError:
+                        value = raw
+                self.fields[self._key] = value
+                events.append(("field", self._key, value))
+                self._pos = end
+                self._state = "comma"
+
+        return events
+
+    def finish(self) -> list[tuple]:
+        """Flush events held back waiting for more input at the end of the stream.
+
+        A value cut off by max_tokens is emitted as far as it got."""
+        self._final = True
+        events = self.feed("")
+        if self._state == "string":
+            value = "".join(self._value)
+            self.fields[self._key] = value
+            events.append(("field", self._key, value))
+        elif self._state == "raw":
+            raw = self.buffer[self._raw_start:].strip().rstrip("`").strip()
+            try:
+                value = json.loads(repair_json(raw), strict=False)
+            except ValueError:
+                value = None
+            if value is not None:
+                self.fields[self._key] = value
+                events.append(("field", self._key, value))
+        self._state = "done"
+        return events
+
+    def _read_string(self, buf: str) -> bool:
+        """Decode string characters; return True once the closing quote is seen."""
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+            if ch == "\\":
+                if self._pos + 1 >= len(buf):
+                    return False
+                nxt = buf[self._pos + 1]
+                if nxt == "u":
+                    if self._pos + 6 > len(buf):
+                        return False
+                    try:
+                        self._value.append(chr(int(buf[self._pos + 2:self._pos + 6], 16)))
+                    except ValueError:
+                        self._value.append(buf[self._pos:self._pos + 6])
+                    self._pos += 6
+                elif nxt in _ESCAPES:
+                    self._value.append(_ESCAPES[nxt])
+                    self._pos += 2
+                else:
+                    self._value.append("\\")
+                    self._pos += 1
+                continue
+            if ch == '"':
+                closes = _quote_closes(buf, self._pos, ("{",), False, final=self._final)
+                if closes is None:
+                    return False  # wait for what follows the quote
+                self._pos += 1
+                if closes:
+                    return True
+            else:
+                self._pos += 1
+            self._value.append(ch)
+        return False
+
+    def _scan_raw(self, buf: str):
+        """Find the end index of a non-string value, or None if incomplete."""
+        i = self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if self._in_str:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                if self._depth == 0:
+                    self._pos = i
+                    return i
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return i + 1
+            elif ch == "," and self._depth == 0:
+                self._pos = i
+                return i
+            i += 1
+        self._pos = i
+        return None
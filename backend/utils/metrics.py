@@ -0,0 +1,229 @@
+"""In-process metrics in the Prometheus text format, served on /metrics.
+
+Histograms and counters are keyed by label values and guarded by one lock
+each; caches that already count their own hits and misses register a
+`stats()` callback instead of being instrumented on the hot path, and
+gauges (e.g. queue depths) read their values from a callback at scrape
+time.
+Histograms created with a `stage` also feed the current request's
+Server-Timing header (utils.server_timing).
+
+    with STT_SECONDS.time():
+        ...
+    LLM_TOKENS.inc(usage.prompt_tokens, task="live", kind="prompt")
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+from utils.server_timing import record_stage
+
+PREFIX = "desierai_"
+
+# Seconds; covers cached auth (sub-ms) up to slow PDF parses
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(labels[n] for n in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonic total per label set."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+        stage: str | None = None,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.stage = stage
+
+    def observe(self, value: float, **labels):
+        if self.stage:
+            record_stage(self.stage, value)
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts, sum, count]
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the `with` block (also when it raises)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(counts), total, count) for k, (counts, total, count) in self._values.items())
+        lines = self._header()
+        for key, counts, total, count in items:
+            for bound, n in zip(self.buckets + (float("inf"),), counts + [count]):
+                le = "+Inf" if bound == float("inf") else bound
+                bucket = _labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket} {n}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Current value per label set, read from `collect()` when rendered."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple, collect: Callable[[], dict[tuple, float]]):
+        super().__init__(name, help, labelnames)
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        items = sorted(self.collect().items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Registry:
+    """Every metric and cache callback that /metrics renders."""
+
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._caches: dict[str, Callable[[], dict]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple = (),
+        buckets: tuple = LATENCY_BUCKETS,
+        stage: str | None = None,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets, stage))
+
+    def gauge(self, name: str, help: str, labelnames: tuple, collect: Callable[[], dict[tuple, float]]) -> Gauge:
+        return self.register(Gauge(name, help, labelnames, collect))
+
+    def register_cache(self, name: str, stats: Callable[[], dict]):
+        """Export a cache's `stats()` hits / near_hits / misses counters."""
+        with self._lock:
+            self._caches[name] = stats
+
+    def _cache_lines(self) -> list[str]:
+        name = PREFIX + "cache_requests_total"
+        lines = [f"# HELP {name} Cache lookups by result", f"# TYPE {name} counter"]
+        with self._lock:
+            caches = sorted(self._caches.items())
+        for cache, stats in caches:
+            counts = stats()
+            for result, field in (("hit", "hits"), ("near_hit", "near_hits"), ("miss", "misses")):
+                if field in counts:
+                    lines.append(f"{name}{_labels(('cache', 'result'), (cache, result))} {counts[field]}")
+        return lines
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.extend(self._cache_lines())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+AUTH_SECONDS = registry.histogram("auth_seconds", "Access token verification", ("result",), stage="auth")
+DB_SECONDS = registry.histogram(
+    "db_seconds", "Supabase PostgREST requests", ("method", "target", "status"), stage="db"
+)
+STT_SECONDS = registry.histogram("stt_seconds", "Whisper transcription, including queueing", stage="stt")
+LLM_TTFT_SECONDS = registry.histogram("llm_ttft_seconds", "Time to the first streamed token", ("task",))
+LLM_SECONDS = registry.histogram("llm_seconds", "Chat completion, start to last token", ("task",), stage="llm")
+LLM_TOKENS = registry.counter("llm_tokens_total", "Groq tokens used", ("task", "kind"))
+JSON_PARSE_SECONDS = registry.histogram(
+    "llm_json_parse_seconds", "Parsing model output as JSON", ("result",), stage="parse"
+)
+RETRIEVAL_SECONDS = registry.histogram("retrieval_seconds", "Resume chunk retrieval", ("mode",), stage="retrieval")
+ERRORS = registry.counter("errors_total", "Unhandled errors by route", ("route",))
+GROQ_QUEUE_WAIT_SECONDS = registry.histogram(
+    "groq_queue_wait_seconds", "Wait for Groq rate-limit budget before a call", ("group", "priority")
+)
@@ -1,29 +1,217 @@
-"""Utility to extract and chunk text from PDF files."""
+"""Utility to extract and chunk text from PDF files.
+
+PyPDF2 is pure Python and CPU-bound, so uploads are parsed in worker
+processes: the page count is read first (and capped), then page ranges are
+extracted in parallel from the spooled file.  Each parse gets its own small
+pool, so a parse that exceeds PDF_PARSE_TIMEOUT has only its own workers
+killed and uploads parsed at the same time are unaffected.
+"""
 
 from PyPDF2 import PdfReader
-import io
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_PARSE_TIMEOUT = float(os.getenv("PDF_PARSE_TIMEOUT", "20"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK = 2
+
+# Retrieval chunk size (~4 characters per token); top-3 chunks ≈ 200 tokens
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "64"))
+CHUNK_CHARS_PER_TOKEN = 4
+# Bump when chunk_resume's output changes
+CHUNKER_VERSION = "sections-v1"
+
+
+def _mp_context():
+    # Workers must not inherit the server's threads and sockets.  forkserver
+    # forks them from a clean process that has this module (and PyPDF2)
+    # imported already, so a per-parse pool starts in milliseconds.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+_MP_CONTEXT = _mp_context()
+
+
+class PDFLimitError(ValueError):
+    """The PDF is over the page cap or took longer than PDF_PARSE_TIMEOUT."""
 
+# Canonical section -> headings seen on resumes
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about me", "professional summary", "career objective"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "technologies", "tech stack", "tools"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "work history",
+                   "internships", "internship"),
+    "projects": ("projects", "personal projects", "academic projects", "key projects"),
+    "education": ("education", "academics", "academic background", "qualifications"),
+    "certifications": ("certifications", "certificates", "courses", "licenses"),
+    "achievements": ("achievements", "awards", "accomplishments", "honors", "honours", "publications"),
+}
+_HEADING_TO_SECTION = {h: name for name, headings in SECTION_HEADINGS.items() for h in headings}
+_HEADING_STRIP = re.compile(r"[^a-z& ]+")
+_LINE = re.compile(r"[^\n]*")
+_BULLET_LINE = re.compile(r"^\s*[•·▪◦‣*\-–—>]\s*")
+_DATE = re.compile(r"\b(19|20)\d{2}\b|\bpresent\b", re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
-    """Extract all text from a PDF given its raw bytes."""
-    reader = PdfReader(io.BytesIO(file_bytes))
-    pages = []
-    for page in reader.pages:
-        text = page.extract_text()
+
+def _count_pages(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def _extract_pages(path: str, start: int, end: int) -> list[str]:
+    """Text of pages [start, end) of the PDF at `path` (runs in a worker)."""
+    reader = PdfReader(path)
+    texts = []
+    for i in range(start, end):
+        text = reader.pages[i].extract_text()
         if text:
-            pages.append(text.strip())
-    return "\n\n".join(pages)
-
-
-def chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> list[str]:
-    """Split text into overlapping chunks for embedding / RAG."""
-    words = text.split()
-    chunks: list[str] = []
-    start = 0
-    while start < len(words):
-        end = start + chunk_size
-        chunk = " ".join(words[start:end])
-        if chunk:
-            chunks.append(chunk)
-        start += chunk_size - overlap
-    return chunks
\ No newline at end of file
+            texts.append(text.strip())
+    return texts
+
+
+def _kill_pool(pool: ProcessPoolExecutor):
+    # ProcessPoolExecutor can't cancel running tasks, so stop its workers
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _results(pool: ProcessPoolExecutor, futures: list, deadline: float, timeout: float) -> list:
+    _, pending = wait(futures, max(0.0, deadline - time.monotonic()))
+    if pending:
+        _kill_pool(pool)
+        raise PDFLimitError(f"PDF took longer than {timeout:g}s to parse")
+    return [f.result() for f in futures]
+
+
+def extract_text_from_pdf_file(
+    path: str,
+    max_pages: int = PDF_MAX_PAGES,
+    timeout: float = PDF_PARSE_TIMEOUT,
+) -> str:
+    """Extract text from the PDF at `path` in worker processes, pages in parallel.
+
+    Blocks the calling thread.  Raises PDFLimitError over `max_pages` or
+    after `timeout` seconds."""
+    pool = ProcessPoolExecutor(PDF_WORKERS, mp_context=_MP_CONTEXT)
+    deadline = time.monotonic() + timeout
+    try:
+        [page_count] = _results(pool, [pool.submit(_count_pages, path)], deadline, timeout)
+        if page_count > max_pages:
+            raise PDFLimitError(f"PDF has {page_count} pages; the limit is {max_pages}")
+
+        ranges = [(i, min(i + PDF_PAGES_PER_TASK, page_count)) for i in range(0, page_count, PDF_PAGES_PER_TASK)]
+        futures = [pool.submit(_extract_pages, path, s, e) for s, e in ranges]
+        parts = _results(pool, futures, deadline, timeout)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return "\n\n".join(text for part in parts for text in part)
+
+
+def detect_section(line: str) -> str | None:
+    """Return the canonical section name if `line` is a resume heading."""
+    words = line.split()
+    if not words or len(words) > 4:
+        return None
+    key = " ".join(_HEADING_STRIP.sub(" ", line.lower()).replace("&", " and ").split())
+    return _HEADING_TO_SECTION.get(key)
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    """Split resume text into (section, body) pairs in document order.
+
+    Text before the first recognised heading is labelled "header"; a
+    section repeated later in the document gets its own pair."""
+    sections: list[tuple[str, list[str]]] = [("header", [])]
+    for line in text.splitlines():
+        name = detect_section(line.strip())
+        if name:
+            sections.append((name, []))
+        else:
+            sections[-1][1].append(line)
+    return [(name, "\n".join(lines).strip()) for name, lines in sections if any(l.strip() for l in lines)]
+
+
+def _split_long(text: str, start: int, max_chars: int) -> list[tuple[int, int]]:
+    """(start, end) offsets of pieces of one unit no longer than `max_chars`,
+    cut at sentence ends where possible, otherwise between words."""
+    pieces = []
+    base = 0
+    while len(text) - base > max_chars:
+        window = text[base:base + max_chars + 1]
+        cut = max((m.start() for m in _SENTENCE_END.finditer(window)), default=-1)
+        if cut <= 0:
+            cut = window.rfind(" ")
+        if cut <= 0:
+            cut = max_chars
+        pieces.append((start + base, start + base + cut))
+        base += cut
+        while base < len(text) and text[base].isspace():
+            base += 1
+    if base < len(text):
+        pieces.append((start + base, start + len(text)))
+    return pieces
+
+
+def chunk_resume(text: str, max_tokens: int = CHUNK_MAX_TOKENS) -> list[dict]:
+    """Split resume text into small chunks along its structure.
+
+    Each chunk is {"text", "section", "start", "end"}: `start`/`end` are
+    character offsets into `text`, `section` is the canonical heading it
+    falls under ("header" before the first).  A chunk never crosses a
+    section or an entry (a job / project title line starts a new entry) and
+    holds whole bullets or sentences up to `max_tokens`; longer ones are cut
+    at sentence ends.
+    """
+    max_chars = max_tokens * CHUNK_CHARS_PER_TOKEN
+    chunks: list[dict] = []
+    section = "header"
+    cur_start = cur_end = None
+    prev_bullet = False
+
+    def flush():
+        nonlocal cur_start, cur_end
+        if cur_start is not None:
+            chunks.append({
+                "text": " ".join(text[cur_start:cur_end].split()),
+                "section": section,
+                "start": cur_start,
+                "end": cur_end,
+            })
+        cur_start = cur_end = None
+
+    for m in _LINE.finditer(text):
+        line = m.group()
+        stripped = line.strip()
+        if not stripped:
+            continue
+        heading = detect_section(stripped)
+        if heading:
+            flush()
+            section, prev_bullet = heading, False
+            continue
+
+        is_bullet = bool(_BULLET_LINE.match(line))
+        # A title line after bullets, or a dated line, opens a new entry
+        if not is_bullet and (prev_bullet or _DATE.search(stripped)) and section != "skills":
+            flush()
+        prev_bullet = is_bullet
+
+        offset = m.start() + (len(line) - len(line.lstrip()))
+        for start, end in _split_long(stripped, offset, max_chars):
+            if cur_start is not None and end - cur_start > max_chars:
+                flush()
+            if cur_start is None:
+                cur_start = start
+            cur_end = end
+    flush()
+    return chunks
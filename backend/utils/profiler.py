@@ -0,0 +1,129 @@
+"""Opt-in per-request sampling profiler.
+
+A request carrying `X-Profile-Token: <PROFILE_TOKEN>` runs with a sampler
+thread that records every busy thread's Python stack each PROFILE_INTERVAL
+seconds, so work on the event loop and in the threadpool (Groq, Supabase,
+embedding) are both covered.  The samples are written to PROFILE_DIR as
+folded stacks (`frame;frame;frame count`, readable by speedscope or
+flamegraph.pl) and the file name is returned in `X-Profile-File`.
+
+Profiling is disabled unless PROFILE_TOKEN is set; a wrong token is
+ignored.  Threads serving other requests at the same time show up in the
+samples too, so profile on a quiet box where possible.
+"""
+
+import hmac
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from fastapi.concurrency import run_in_threadpool
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "desierai-profiles"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.002"))
+PROFILE_HEADER = b"x-profile-token"
+
+# Leaf frames of threads that are parked rather than working
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("_asyncio.py", "run"),
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Counts folded stacks of busy threads on a background thread."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_label(frame))
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _profile_requested(scope) -> bool:
+    if not PROFILE_TOKEN:
+        return False
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return hmac.compare_digest(value, PROFILE_TOKEN.encode())
+    return False
+
+
+class ProfileMiddleware:
+    """ASGI middleware running admin-flagged HTTP requests under the sampler."""
+
+    def __init__(self, app, profile_dir: str | None = None):
+        self.app = app
+        self.profile_dir = profile_dir
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        route = scope["path"].strip("/").replace("/", "-") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{scope['method'].lower()}-{route}-{uuid.uuid4().hex[:6]}.folded"
+
+        async def send_with_file(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"x-profile-file", name.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_file)
+        finally:
+            # Joining the sampler and writing the file block; keep them off the event loop
+            await run_in_threadpool(self._save, profiler, name)
+
+    def _save(self, profiler: SamplingProfiler, name: str):
+        profiler.stop()
+        profile_dir = self.profile_dir or PROFILE_DIR
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(os.path.join(profile_dir, name), "w") as f:
+            f.write(profiler.folded())
+        logger.info(f"Wrote request profile {name} ({sum(profiler.samples.values())} samples)")
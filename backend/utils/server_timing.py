@@ -0,0 +1,83 @@
+"""Per-request stage timings, returned in a `Server-Timing` header.
+
+ServerTimingMiddleware opens a collector for each HTTP request under the
+given path prefixes; the latency histograms in utils.metrics that carry a
+`stage` (auth, db, stt, llm, parse, retrieval) add every observation to it.
+The collector lives in a ContextVar, so work handed to run_in_threadpool
+(which copies the context) is attributed to the request that started it.
+
+    Server-Timing: auth;dur=0.4, db;dur=38.2;desc="2 calls", stt;dur=412.0, total;dur=1203.5
+
+Stages that overlap (STT and the resume fetch in listen-and-answer) each
+report their own duration; `total` is the wall time to the response headers.
+For streamed responses the header only covers work done before the first
+byte.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+
+_collector: ContextVar["TimingCollector | None"] = ContextVar("server_timing", default=None)
+
+
+class TimingCollector:
+    """Summed durations and call counts per stage for one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: dict[str, list] = {}  # stage -> [seconds, calls]
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def header(self) -> str:
+        with self._lock:
+            stages = list(self.stages.items())
+        parts = []
+        for stage, (seconds, calls) in stages:
+            part = f"{stage};dur={seconds * 1000:.1f}"
+            if calls > 1:
+                part += f';desc="{calls} calls"'
+            parts.append(part)
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def record_stage(stage: str, seconds: float):
+    """Add to the current request's Server-Timing, if it is collecting."""
+    collector = _collector.get()
+    if collector is not None:
+        collector.add(stage, seconds)
+
+
+class ServerTimingMiddleware:
+    """ASGI middleware adding Server-Timing to responses under `prefixes`."""
+
+    def __init__(self, app, prefixes: tuple = ("/audio", "/interview")):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        collector = TimingCollector()
+        token = _collector.set(collector)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", collector.header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _collector.reset(token)
@@ -14,6 +14,13 @@ let liveSessionHistory = []; // Session memory
 let isVoiceModeActive = false;
 let mediaRecorder = null;
 let voiceCycleInterval = null;
+let voiceSocket = null;
+
+// Log the backend's per-stage breakdown (auth, db, stt, llm, parse)
+function logServerTiming(label, res) {
+    const timing = res.headers.get("Server-Timing");
+    if (timing) console.log(`[timing] ${label}: ${timing}`);
+}
 
 // ── Supabase Login ───────────────────────────────
 async function handleLogin() {
@@ -134,6 +141,7 @@ async function askQuestion() {
             throw new Error(errText);
         }
 
+        logServerTiming("live-answer", res);
         const data = await res.json();
 
         // Store in history
@@ -208,7 +216,7 @@ async function toggleVoiceMode() {
         document.getElementById("voice-status").classList.remove("hidden");
         document.getElementById("voice-status").textContent = "🎙️ Mic Active";
 
-        startVoiceCycle(stream);
+        startVoiceStream(stream);
     } catch (err) {
         console.error("Mic access denied:", err);
         errorEl.textContent = "Microphone access denied: " + err.message;
@@ -233,6 +241,86 @@ function stopVoiceMode() {
     if (voiceCycleInterval) {
         clearInterval(voiceCycleInterval);
     }
+
+    if (voiceSocket) {
+        voiceSocket.close();
+        voiceSocket = null;
+    }
+}
+
+// Continuous mode: one recording streamed over /audio/stream. The server
+// transcribes as audio arrives and answers once the question is finished.
+function startVoiceStream(stream) {
+    const socket = new WebSocket(`${API.replace(/^http/, "ws")}/audio/stream`);
+    voiceSocket = socket;
+    let opened = false;
+    let answerText = "";
+
+    socket.onopen = () => {
+        opened = true;
+        // Token in the first message, not the URL (URLs end up in access logs)
+        socket.send(JSON.stringify({ type: "auth", token: accessToken }));
+        socket.send(JSON.stringify({
+            type: "config",
+            role: document.getElementById("input-role").value.trim(),
+            level: document.getElementById("input-level").value,
+            history: liveSessionHistory,
+        }));
+
+        const mimeType = ['audio/webm;codecs=opus', 'audio/webm', ''].find(m => m === '' || MediaRecorder.isTypeSupported(m));
+        mediaRecorder = new MediaRecorder(stream, mimeType ? { mimeType } : {});
+        mediaRecorder.ondataavailable = (e) => {
+            if (e.data.size > 0 && socket.readyState === WebSocket.OPEN) socket.send(e.data);
+        };
+        mediaRecorder.start(250); // 250 ms timeslices
+        document.getElementById("voice-status").textContent = "🎙️ Listening...";
+    };
+
+    socket.onmessage = (e) => {
+        const msg = JSON.parse(e.data);
+        const questionEl = document.getElementById("input-question");
+        if (msg.type === "partial") {
+            questionEl.value = msg.transcript;
+        } else if (msg.type === "transcript") {
+            questionEl.value = msg.transcript;
+            answerText = "";
+            document.getElementById("voice-status").textContent = "📤 Analyzing...";
+        } else if (msg.type === "answer") {
+            answerText += msg.delta;
+            document.getElementById("answer-text").textContent = answerText;
+            document.getElementById("answer-area").classList.remove("hidden");
+        } else if (msg.type === "done") {
+            displayLiveAnswer({ ...msg, transcript: questionEl.value });
+            liveSessionHistory.push({ question: questionEl.value, answer: msg.answer || "" });
+            if (liveSessionHistory.length > 10) liveSessionHistory.shift();
+            document.getElementById("voice-status").textContent = "🎙️ Listening...";
+        } else if (msg.type === "error") {
+            console.error(msg.detail);
+            const errEl = document.getElementById("ask-error");
+            errEl.textContent = msg.detail;
+            errEl.classList.remove("hidden");
+        }
+    };
+
+    socket.onclose = (e) => {
+        if (voiceSocket === socket) voiceSocket = null;
+        if (mediaRecorder && mediaRecorder.state !== "inactive") {
+            mediaRecorder.stop();
+        }
+        if (!isVoiceModeActive) return;
+
+        if (e.code === 1008) {
+            alert("Your session has expired. Please log in again.");
+            logout();
+        } else if (!opened) {
+            // No /audio/stream on this server: upload fixed-length clips instead
+            startVoiceCycle(stream);
+        } else {
+            setTimeout(() => {
+                if (isVoiceModeActive) startVoiceStream(stream);
+            }, 1000);
+        }
+    };
 }
 
 async function startVoiceCycle(stream) {
@@ -280,12 +368,15 @@ async function processVoiceChunk(blob) {
 
     const formData = new FormData();
     formData.append("file", blob, "chunk.webm");
-    formData.append("role", document.getElementById("input-role").value.trim());
-    formData.append("level", document.getElementById("input-level").value);
-    formData.append("history", JSON.stringify(liveSessionHistory));
+    // The route reads these from the query string; the prompt only uses the last 3 turns
+    const params = new URLSearchParams({
+        role: document.getElementById("input-role").value.trim(),
+        level: document.getElementById("input-level").value,
+        history: JSON.stringify(liveSessionHistory.slice(-3)),
+    });
 
     try {
-        const res = await fetch(`${API}/audio/listen-and-answer`, {
+        const res = await fetch(`${API}/audio/listen-and-answer?${params}`, {
             method: "POST",
             headers: {
                 Authorization: `Bearer ${accessToken}`,
@@ -314,6 +405,7 @@ async function processVoiceChunk(blob) {
             return;
         }
 
+        logServerTiming("listen-and-answer", res);
         const data = await res.json();
         console.log("Transcription:", data.transcript);
 
@@ -322,7 +414,7 @@ async function processVoiceChunk(blob) {
 
             liveSessionHistory.push({
                 question: data.transcript,
-                answer: data.answer
+                answer: data.answer || ""
             });
             if (liveSessionHistory.length > 10) liveSessionHistory.shift();
         }
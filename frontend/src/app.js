@@ -216,9 +216,10 @@ async function initDashboard() {
 
     // Check history
     try {
-        const history = await apiFetch("/interview/history");
+        const history = await apiFetch(`/interview/history?limit=${HISTORY_PAGE_SIZE}`);
+        const more = history.length >= HISTORY_PAGE_SIZE ? "+" : "";
         document.getElementById("history-count-text").textContent =
-            `${history.length} past session${history.length !== 1 ? "s" : ""}`;
+            `${history.length}${more} past session${history.length !== 1 ? "s" : ""}`;
     } catch {
         document.getElementById("history-count-text").textContent = "Could not load";
     }
@@ -228,40 +229,69 @@ async function initDashboard() {
 //  HISTORY
 // ══════════════════════════════════════════════
 
-async function loadHistory() {
+const HISTORY_PAGE_SIZE = 20;
+
+function renderHistoryItems(history) {
+    return history
+        .map(
+            (s, i) => `
+                <div class="history-item" onclick="loadSessionDetail('${s.session_id}')" style="animation-delay: ${i * 0.08}s">
+                    <div class="history-item-info">
+                        <h4>${escapeHtml(s.role)}</h4>
+                        <p>${formatDate(s.created_at)} · ${s.message_count} messages</p>
+                    </div>
+                    <div class="history-item-stat">View Details</div>
+                </div>`
+        )
+        .join("");
+}
+
+async function loadHistory(before = null, beforeId = null) {
     const list = document.getElementById("history-list");
     const listView = document.getElementById("history-list-view");
     const detailView = document.getElementById("history-detail-view");
 
-    // Always show list view when loading
-    listView.classList.remove("hidden");
-    detailView.classList.add("hidden");
+    if (!before) {
+        // Always show list view when loading
+        listView.classList.remove("hidden");
+        detailView.classList.add("hidden");
 
-    list.innerHTML = '<div class="empty-state"><p style="animation: pulse 1.5s infinite">Loading sessions...</p></div>';
+        list.innerHTML = '<div class="empty-state"><p style="animation: pulse 1.5s infinite">Loading sessions...</p></div>';
+    }
 
     try {
-        const history = await apiFetch("/interview/history");
+        const params = new URLSearchParams({ limit: HISTORY_PAGE_SIZE });
+        if (before) {
+            params.set("before", before);
+            params.set("before_id", beforeId);
+        }
+        const history = await apiFetch(`/interview/history?${params}`);
+
+        document.getElementById("history-load-more")?.remove();
 
-        if (history.length === 0) {
+        if (!before && history.length === 0) {
             list.innerHTML = `
                 <div class="empty-state">
                     <div class="empty-state-icon">🎤</div>
                     <p>No interview sessions yet.</p>
                     <p style="margin-top: 8px"><button class="btn btn-primary btn-sm" onclick="navigate('interview')">Start Your First Interview</button></p>
                 </div>`;
+            return;
+        }
+
+        if (before) {
+            list.insertAdjacentHTML("beforeend", renderHistoryItems(history));
         } else {
-            list.innerHTML = history
-                .map(
-                    (s, i) => `
-                <div class="history-item" onclick="loadSessionDetail('${s.session_id}')" style="animation-delay: ${i * 0.08}s">
-                    <div class="history-item-info">
-                        <h4>${escapeHtml(s.role)}</h4>
-                        <p>${formatDate(s.created_at)} · ${s.message_count} messages</p>
-                    </div>
-                    <div class="history-item-stat">View Details</div>
-                </div>`
-                )
-                .join("");
+            list.innerHTML = renderHistoryItems(history);
+        }
+
+        // A full page means there may be older sessions (keyset cursor = last created_at, id)
+        if (history.length === HISTORY_PAGE_SIZE) {
+            const last = history[history.length - 1];
+            list.insertAdjacentHTML(
+                "beforeend",
+                `<button id="history-load-more" class="btn btn-ghost btn-sm" onclick="loadHistory('${escapeHtml(last.created_at)}', '${escapeHtml(last.session_id)}')">Load more</button>`
+            );
         }
     } catch (err) {
         list.innerHTML = `<div class="empty-state"><p>Failed to load: ${escapeHtml(err.message)}</p></div>`;
@@ -433,9 +463,6 @@ async function uploadResume(file) {
     formData.append("file", file);
 
     try {
-        fill.style.width = "50%";
-        statusText.textContent = "Extracting text & generating embeddings...";
-
         const data = await fetch(`${API}/resume/upload`, {
             method: "POST",
             headers: authHeaders(),
@@ -447,7 +474,12 @@ async function uploadResume(file) {
             throw new Error(err.detail || "Upload failed");
         }
 
-        const json = await data.json();
+        let json = await data.json();
+
+        // 202: processed in the background – poll until the job finishes
+        if (json.job_id) {
+            json = await pollUploadJob(json.job_id, fill, statusText);
+        }
 
         fill.style.width = "100%";
         statusText.textContent = "Done!";
@@ -465,6 +497,28 @@ async function uploadResume(file) {
     }
 }
 
+const UPLOAD_STAGE_TEXT = {
+    parse: "Extracting text...",
+    chunk: "Splitting into sections...",
+    embed: "Generating embeddings...",
+    store: "Saving your resume...",
+    index: "Almost done...",
+};
+
+async function pollUploadJob(jobId, fill, statusText) {
+    statusText.textContent = "Queued for processing...";
+    while (true) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const { job } = await apiFetch(`/resume/status?job_id=${encodeURIComponent(jobId)}`);
+        if (job.state === "done") return job;
+        if (job.state === "failed") throw new Error(job.error || "Processing failed");
+
+        // 20% once uploaded, the rest tracks the job's stages
+        fill.style.width = `${20 + Math.round(job.progress * 80)}%`;
+        if (job.stage) statusText.textContent = UPLOAD_STAGE_TEXT[job.stage] || "Processing...";
+    }
+}
+
 // ══════════════════════════════════════════════
 //  INTERVIEW
 // ══════════════════════════════════════════════